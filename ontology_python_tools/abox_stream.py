@@ -0,0 +1,187 @@
+"""
+Streaming OWL/XML reader for large instance files.
+
+Loading a generated inventory through owlready2 parses every element into
+the quadstore before the converter can start. This reader feeds the OWL/XML
+to expat chunk by chunk instead, keeps only the class, data property and
+object property assertions the converter needs and never builds an element
+tree, so memory holds the indexes and not the document.
+
+It builds the same three indexes as ontology_index.py (class memberships,
+data properties, object property links), keyed the same way, so the
+deployment plan and the emitters do not care which reader produced them.
+Only the OWL/XML syntax used by entity.owx and instances.owl is understood.
+"""
+from xml.parsers import expat
+
+from ontology_names import INDEXED_CLASSES, class_closure, local_name
+
+XML_BASE = "xml:base"
+
+# Typed literals are converted like owlready2 does; everything else stays a string.
+_XSD = "http://www.w3.org/2001/XMLSchema#"
+_LITERAL_TYPES = {
+    _XSD + "integer": int, _XSD + "int": int, _XSD + "long": int, _XSD + "short": int,
+    _XSD + "nonNegativeInteger": int, _XSD + "positiveInteger": int,
+    _XSD + "decimal": float, _XSD + "double": float, _XSD + "float": float,
+    _XSD + "boolean": lambda text: text.strip() in ("true", "1"),
+}
+
+
+def _iter_axioms(source, chunk_size=1 << 16):
+    """
+    Yield (axiom tag, [(child tag, IRI or literal, datatype IRI)]) for every
+    top-level element of an OWL/XML document (a path or a binary file object).
+
+    The document is fed to expat chunk by chunk and no element tree is built,
+    so memory does not depend on the size of the document.
+    """
+    prefixes = {}
+    tags = {}
+    iris = {"base": "", "ontology": ""}
+    ready = []
+    depth = 0
+    axiom = None        # [tag, children] of the top-level element being read
+    literal = None      # [datatype IRI, text parts] of the Literal being read
+
+    def resolve(attrs):
+        iri = attrs.get("IRI")
+        if iri is None:
+            abbreviated = attrs.get("abbreviatedIRI")
+            if abbreviated is None:
+                return None  # anonymous expression
+            prefix, _, name = abbreviated.partition(":")
+            return prefixes.get(prefix, "") + name
+        if ":" in iri.split("/", 1)[0]:
+            return iri  # absolute
+        if iri.startswith("#"):
+            return iris["ontology"] + iri  # owlready2 resolves fragments against the ontology IRI
+        return iris["base"] + iri
+
+    def start(name, attrs):
+        nonlocal depth, axiom, literal
+        depth += 1
+        tag = tags.get(name)
+        if tag is None:
+            tag = tags[name] = name.rsplit(":", 1)[-1]  # "owl:Declaration" -> "Declaration"
+        if depth == 1:
+            iris["base"] = attrs.get(XML_BASE, "")
+            iris["ontology"] = attrs.get("ontologyIRI", iris["base"])
+        elif depth == 2:
+            if tag == "Prefix":
+                prefixes[attrs.get("name", "")] = attrs.get("IRI", "")
+            axiom = [tag, []]
+        elif depth == 3:
+            if tag == "Literal":
+                literal = [attrs.get("datatypeIRI"), []]
+            else:
+                axiom[1].append((tag, resolve(attrs), None))
+
+    def end(name):
+        nonlocal depth, axiom, literal
+        if depth == 3 and literal is not None:
+            axiom[1].append(("Literal", "".join(literal[1]), literal[0]))
+            literal = None
+        elif depth == 2 and axiom[0] not in ("Prefix", "Import"):
+            ready.append(tuple(axiom))
+        depth -= 1
+
+    def text(data):
+        if literal is not None:
+            literal[1].append(data)
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = text
+
+    f = open(source, "rb") if isinstance(source, str) else source
+    try:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            parser.Parse(chunk, False)
+            yield from ready
+            ready.clear()
+        parser.Parse(b"", True)
+        yield from ready
+    finally:
+        if f is not source:
+            f.close()
+
+
+def read_tbox(class_file):
+    """
+    Return ({class name: {direct subclass names}}, {data property name: rank})
+    from the SubClassOf axioms and data property declarations of the TBox.
+    """
+    subclasses = {}
+    data_property_ranks = {}
+    for tag, children in _iter_axioms(class_file):
+        if tag == "SubClassOf" and [c[0] for c in children] == ["Class", "Class"]:
+            sub, sup = children[0][1], children[1][1]
+            subclasses.setdefault(local_name(sup), set()).add(local_name(sub))
+        elif tag == "Declaration" and children and children[0][0] == "DataProperty":
+            data_property_ranks.setdefault(local_name(children[0][1]), len(data_property_ranks))
+    return subclasses, data_property_ranks
+
+
+def stream_abox(instance_file, tbox, class_names=INDEXED_CLASSES):
+    """
+    Build (class_index, data_index, link_index) from an OWL/XML ABox (a path
+    or a binary file object), with `tbox` as returned by read_tbox(). The
+    indexes have the same shape and ordering as the
+    ontology_index.build_*_index() ones.
+    """
+    subclasses, data_property_ranks = tbox
+    subclasses = {name: set(subs) for name, subs in subclasses.items()}
+
+    order = {}          # individual IRI -> position of its first mention
+    types = []          # (individual IRI, class name)
+    data_index = {}
+    link_index = {}
+
+    def seen(iri):
+        if iri not in order:
+            order[iri] = len(order)
+        return iri
+
+    for tag, children in _iter_axioms(instance_file):
+        kinds = [c[0] for c in children]
+        if tag == "Declaration":
+            if kinds == ["NamedIndividual"]:
+                seen(children[0][1])
+        elif tag == "ClassAssertion":
+            if kinds == ["Class", "NamedIndividual"]:
+                types.append((seen(children[1][1]), local_name(children[0][1])))
+        elif tag == "DataPropertyAssertion":
+            if kinds == ["DataProperty", "NamedIndividual", "Literal"]:
+                prop = local_name(children[0][1])
+                text, datatype = children[2][1], children[2][2]
+                convert = _LITERAL_TYPES.get(datatype)
+                value = text if convert is None else convert(text)
+                data_index.setdefault(seen(children[1][1]), {}).setdefault(prop, []).append(value)
+        elif tag == "ObjectPropertyAssertion":
+            if kinds == ["ObjectProperty", "NamedIndividual", "NamedIndividual"]:
+                prop = local_name(children[0][1])
+                subject, target = seen(children[1][1]), seen(children[2][1])
+                link_index.setdefault(subject, {}).setdefault(prop, []).append(target)
+        elif tag == "SubClassOf" and kinds == ["Class", "Class"]:
+            sub, sup = children[0][1], children[1][1]
+            subclasses.setdefault(local_name(sup), set()).add(local_name(sub))
+
+    closure = class_closure(subclasses, class_names)
+    members = {class_name: {} for class_name in class_names}
+    for iri, type_name in sorted(types, key=lambda t: order[t[0]]):
+        for class_name in closure.get(type_name, ()):
+            members[class_name].setdefault(iri, None)
+
+    # Same property order as build_data_property_index: declaration order
+    # in the TBox, then properties the TBox does not declare.
+    rank = lambda name: (data_property_ranks.get(name, len(data_property_ranks)), name)
+    data_index = {
+        iri: {name: props[name] for name in sorted(props, key=rank)}
+        for iri, props in data_index.items()
+    }
+
+    class_index = {class_name: list(iris) for class_name, iris in members.items()}
+    return class_index, data_index, link_index
@@ -0,0 +1,215 @@
+"""
+Benchmark harness.
+
+Generates synthetic ABoxes of the given sizes (see generate_abox.py) and
+times, for each one, the phases of a validation and of a conversion:
+
+    load            ontology_cache.load_ontologies (get_ontology().load() of the TBox and the ABox)
+    reasoner        sync_reasoner() (needs Java; --no-reasoner skips it)
+    restrictions    validator.validate_restrictions
+    ranges          validator.validate_data_ranges
+    plan            ontology indexes and deployment plan
+    docker_compose  docker_functions.generate_docker_compose
+    kubernetes      kubernetes_functions.generate_kubernetes_yaml_files
+    emit            YAML emission of every generated file (generated_output.render_outputs)
+
+Every size is measured in a fresh worker process, so the quadstores of the
+sizes do not add up and the peak memory reported is the one of that size.
+The results are written as JSON; --compare prints every phase against a
+previous result file, to spot regressions between commits:
+
+    python benchmark.py --classes entity.owx --sizes 10,1000,10000 --output bench.json
+    python benchmark.py --classes entity.owx --no-reasoner --compare bench.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+
+import generate_abox
+import generated_output
+
+PHASES = ("load", "reasoner", "restrictions", "ranges", "plan", "docker_compose", "kubernetes", "emit")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark loading, reasoning and conversion on synthetic ABoxes")
+    parser.add_argument("--classes", required=True, help="Path to the class (TBox) OWL file")
+    parser.add_argument("--sizes", default="10,1000,10000",
+                        help="Comma-separated numbers of individuals (default: 10,1000,10000)")
+    parser.add_argument("--env", type=int, default=2, help="env_* properties per pod and container")
+    parser.add_argument("--output", default="benchmark.json", help="JSON file the results are written to")
+    parser.add_argument("--abox-dir", help="Keep the generated ABoxes in this directory (default: a temporary one)")
+    parser.add_argument("--reasoner", choices=("hermit", "pellet"), default="hermit")
+    parser.add_argument("--no-reasoner", action="store_true", help="Skip the reasoner phase")
+    parser.add_argument("--compare", help="Previous result file to compare with")
+    return parser.parse_args(argv)
+
+
+# ----------------------------------------------------------
+# ONE SIZE (in a worker process)
+# ----------------------------------------------------------
+def benchmark_abox(class_file, instance_file, reasoner=None):
+    """
+    Time every phase on one ABox; return {"phases": {name: seconds},
+    "errors": {name: message}, "counts": {...}, "max_rss_mb": ...}.
+    reasoner is "hermit", "pellet" or None to skip that phase.
+    """
+    # Imported here, so the parent process does not load owlready2 at all
+    from owlready2 import default_world
+
+    import converter
+    import deployment_plan
+    import docker_functions
+    import kubernetes_functions
+    import ontology_cache
+    import validator
+
+    phases, errors, counts = {}, {}, {}
+
+    def timed(name, function, *args):
+        start = time.perf_counter()
+        try:
+            # The tools (and owlready2) report as they go; only the timings matter here
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                result = function(*args)
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+            return None
+        phases[name] = time.perf_counter() - start
+        return result
+
+    loaded = timed("load", ontology_cache.load_ontologies, class_file, instance_file)
+    if loaded is None:
+        return {"phases": phases, "errors": errors, "counts": counts, "max_rss_mb": _max_rss_mb()}
+    onto = loaded[0]
+    counts["triples"] = (default_world.graph.execute("SELECT COUNT(*) FROM objs").fetchone()[0]
+                         + default_world.graph.execute("SELECT COUNT(*) FROM datas").fetchone()[0])
+
+    if reasoner:
+        inferences = default_world.get_ontology(validator.INFERENCES_IRI)
+        result = timed("reasoner", validator.run_reasoner, inferences, reasoner)
+        if result is not None and not result[0]:
+            errors["reasoner"] = validator.INCONSISTENT
+
+    problems = timed("restrictions", validator.validate_restrictions, onto)
+    counts["restriction_problems"] = len(problems or ())
+    violations = timed("ranges", validator.validate_data_ranges, onto)
+    counts["range_violations"] = len(violations or ())
+
+    def build_plan():
+        class_index, data_index, link_index = converter.index_world()
+        return deployment_plan.build_deployment_plan(class_index, data_index, link_index), data_index
+
+    plan, data_index = timed("plan", build_plan) or (None, None)
+    if plan is not None:
+        compose = timed("docker_compose", docker_functions.generate_docker_compose, plan)
+        counts["compose_services"] = len((compose or {}).get("services", {}))
+        kubernetes = timed("kubernetes", kubernetes_functions.generate_kubernetes_yaml_files, plan)
+        counts["kubernetes_deployments"] = len(kubernetes[1]) if kubernetes else 0
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            outputs = converter.build_outputs(plan, data_index)
+        files = timed("emit", generated_output.render_outputs, outputs)
+        counts["files"] = len(files or ())
+        counts["yaml_bytes"] = sum(len(text) for text in (files or {}).values())
+
+    return {"phases": phases, "errors": errors, "counts": counts, "max_rss_mb": _max_rss_mb()}
+
+
+def _max_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+# ----------------------------------------------------------
+# RESULTS
+# ----------------------------------------------------------
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_results(results):
+    print("\n%12s" % "individuals" + "".join("%15s" % phase for phase in PHASES) + "%10s" % "RSS MB")
+    for result in results:
+        cells = []
+        for phase in PHASES:
+            seconds = result["phases"].get(phase)
+            cells.append("%15s" % ("-" if seconds is None else "%.1f ms" % (seconds * 1000)))
+        print("%12d" % result["individuals"] + "".join(cells) + "%10.1f" % result["max_rss_mb"])
+        for phase, error in result["errors"].items():
+            print(f"{'':12} {phase}: {error}")
+
+
+def compare(results, previous):
+    """Print every phase against the result of the same size in previous (a result file's content)."""
+    before = {result["individuals"]: result for result in previous["results"]}
+    print(f"\nCompared with {previous.get('commit') or 'previous run'} ({previous.get('created')}):")
+    for result in results:
+        old = before.get(result["individuals"])
+        if old is None:
+            continue
+        for phase in PHASES:
+            seconds, old_seconds = result["phases"].get(phase), old["phases"].get(phase)
+            if seconds is None or not old_seconds:
+                continue
+            print(f" {result['individuals']:>8} {phase:<15} {old_seconds * 1000:10.1f} ms -> "
+                  f"{seconds * 1000:10.1f} ms  x{seconds / old_seconds:.2f}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    class_file = os.path.abspath(args.classes)
+    reasoner = None if args.no_reasoner else args.reasoner
+
+    with contextlib.ExitStack() as stack:
+        abox_dir = args.abox_dir or stack.enter_context(tempfile.TemporaryDirectory(prefix="cado-benchmark-"))
+        os.makedirs(abox_dir, exist_ok=True)
+
+        results = []
+        for size in sizes:
+            shape = generate_abox.AboxShape.for_individuals(size, args.env)
+            instance_file = os.path.join(abox_dir, "abox-%d.owl" % size)
+            generate_abox.write_abox(shape, instance_file)
+            print(f"Benchmarking {shape.individuals} individuals...")
+            # A fresh process per size
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(benchmark_abox, class_file, instance_file, reasoner).result()
+            results.append(dict(individuals=shape.individuals, shape=asdict(shape),
+                                abox_bytes=os.path.getsize(instance_file), **result))
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "yaml_dumper": generated_output.DUMPER_NAME,
+        "reasoner": reasoner,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    print_results(results)
+    print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Validate-then-convert pipeline.
+
+Running validator.py and then converter.py loads the TBox and the ABox twice
+and throws the reasoner's work away in between. This entry point loads them
+once, optionally reasons once, and converts the same world: the inferred
+class memberships are still in it (in the inferences ontology), so instance
+discovery and the emitters see them too.
+
+    python cado.py validate convert --classes entity.owx --instances instances.owl
+    python cado.py validate convert --quick --classes entity.owx --instances instances.owl
+    python cado.py convert --classes entity.owx --instances instances.owl
+
+If validation fails the run stops with exit status 1 before any file is
+written. --report, --fail-fast and --max-violations work like the
+validator's (see validation_report.py).
+"""
+import argparse
+import contextlib
+
+from owlready2 import default_world
+
+import converter
+import generated_output
+import profiling
+import validation_report
+from validator import INFERENCES_IRI, REASONERS, Validator
+
+STEPS = ("validate", "convert")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Validate an ABox and convert it, loading it once")
+    parser.add_argument("steps", nargs="+", choices=STEPS, help="Steps to run, in this order: validate, convert")
+    parser.add_argument("--classes", required=True, help="Path to the class (TBox) OWL file")
+    parser.add_argument("--instances", required=True, help="Path to the instance (ABox) OWL file")
+    parser.add_argument("--output-dir", default=converter.DEFAULT_OUTPUT_DIR, help="Where generated files go")
+    parser.add_argument("--cache-dir",
+                        help="Directory of the parsed-ontology and reasoner caches (disabled if omitted)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Validate the asserted facts only, without the reasoner (no Java)")
+    parser.add_argument("--reasoner", choices=sorted(REASONERS), default="hermit")
+    parser.add_argument("--force-reasoner", action="store_true",
+                        help="Run the reasoner even if its result for these files is cached")
+    parser.add_argument("--module", action="store_true",
+                        help="Reason only over the module of the ontology around the deployment units")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes for the restriction and datatype checks and the namespaces (default: 1)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rewrite the generated files whose content changed")
+    parser.add_argument("--bundle", choices=generated_output.BUNDLE_MODES,
+                        help="Write the Kubernetes resources as one multi-document file, or one per namespace")
+    parser.add_argument("--shard-namespaces", action="store_true",
+                        help="Write the Kubernetes resources of each namespace to its own sub-directory, in parallel")
+    parser.add_argument("--namespace", action="append",
+                        help="Only regenerate this namespace (repeatable; implies --shard-namespaces)")
+    validation_report.add_arguments(parser)
+    profiling.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def validate(validator, onto, instance_file, inferences, quick=False, report=None):
+    """Validate the loaded ontologies; return the number of errors found."""
+    report = validation_report.Report() if report is None else report
+    if quick:
+        validator.quick_check(report)
+    else:
+        validator.check(onto, instance_file, inferences, report)
+    return report.errors
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    steps = set(args.steps)
+
+    # The report is only opened when there is something to validate
+    reporting = validation_report.opened(args) if "validate" in steps else contextlib.nullcontext()
+    with reporting as report, profiling.profiled("cado", args):
+        validator = Validator(args.classes, args.cache_dir, args.reasoner, args.force_reasoner, args.jobs,
+                              args.module)
+        onto, instances = validator.load(args.instances)
+        inferences = default_world.get_ontology(INFERENCES_IRI)
+        try:
+            if "validate" in steps:
+                errors = validate(validator, onto, args.instances, inferences, args.quick, report)
+                if errors:
+                    print(f"\nValidation failed ({errors} errors): no files written.")
+                    raise SystemExit(1)
+                print("\nValidation completed.")
+
+            if "convert" in steps:
+                print("\nConverting...")
+                converter.convert(*converter.index_world(), args.output_dir, args.incremental, args.bundle,
+                                  args.shard_namespaces, args.jobs, args.namespace)
+        finally:
+            inferences.destroy()
+            validator.unload(onto, instances)
+
+
+if __name__ == "__main__":
+    main()
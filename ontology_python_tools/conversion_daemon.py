@@ -0,0 +1,135 @@
+"""
+Conversion daemon.
+
+Keeps the class file (TBox) loaded in a converter.Converter and serves
+conversions over a small HTTP/1.1 interface on localhost (or a Unix socket),
+so deployment tooling does not pay process startup and TBox loading on every
+conversion:
+
+    POST /convert[?bundle=single|namespace]   body: the ABox (OWL/XML)
+        -> 200 {"files": {file name: YAML text}, "seconds": ...}
+    GET /health
+        -> 200 {"status": "ok", "classes": ..., "stream": ...}
+
+Errors are answered with {"error": message} and a 4xx/5xx status.
+Conversions are run one at a time, in a worker thread, so the event loop
+keeps accepting connections meanwhile.
+"""
+import argparse
+import asyncio
+import io
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import generated_output
+from converter import Converter
+
+MAX_PAYLOAD = 256 << 20
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ConversionDaemon:
+    def __init__(self, converter):
+        self.converter = converter
+        self._lock = asyncio.Lock()
+
+    async def convert(self, payload, bundle=None):
+        start = time.perf_counter()
+        async with self._lock:
+            files = await asyncio.get_running_loop().run_in_executor(
+                None, self.converter.render, io.BytesIO(payload), bundle)
+        return {"files": files, "seconds": time.perf_counter() - start}
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == "/health":
+            return 200, {"status": "ok", "classes": self.converter.class_file, "stream": self.converter.stream}
+        if url.path != "/convert":
+            return 404, {"error": f"unknown path {url.path}"}
+        if method != "POST":
+            return 405, {"error": "use POST with the ABox as body"}
+
+        bundle = parse_qs(url.query).get("bundle", [None])[0]
+        if bundle is not None and bundle not in generated_output.BUNDLE_MODES:
+            return 400, {"error": f"bundle must be one of {', '.join(generated_output.BUNDLE_MODES)}"}
+        try:
+            return 200, await self.convert(body, bundle)
+        except Exception as e:
+            # Unparsable ABoxes are the client's fault; everything is reported the same way
+            return 400, {"error": f"{type(e).__name__}: {e}"}
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            if length > MAX_PAYLOAD:
+                status, result = 413, {"error": f"payload larger than {MAX_PAYLOAD} bytes"}
+            else:
+                body = await reader.readexactly(length) if length else b""
+                status, result = await self.route(method, target, body)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, result = 400, {"error": f"malformed request: {e}"}
+        except Exception as e:
+            status, result = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        data = json.dumps(result).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(converter, host="127.0.0.1", port=8765, socket_path=None):
+    daemon = ConversionDaemon(converter)
+    if socket_path:
+        server = await asyncio.start_unix_server(daemon.handle, path=socket_path)
+        print(f"Listening on {socket_path}")
+    else:
+        server = await asyncio.start_server(daemon.handle, host, port)
+        print(f"Listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Conversion daemon keeping the TBox loaded")
+    parser.add_argument("--classes", required=True, help="Path to the class (TBox) OWL file")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--owlready", action="store_true",
+                        help="Load each ABox with owlready2 (any syntax) instead of streaming it (OWL/XML only)")
+    args = parser.parse_args(argv)
+
+    print("Loading Classes...")
+    start = time.perf_counter()
+    converter = Converter(args.classes, stream=not args.owlready)
+    print(f"Loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+    try:
+        asyncio.run(serve(converter, args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,109 +1,284 @@
-from owlready2 import get_ontology, default_world, onto_path # <-- Import onto_path
+from owlready2 import default_world, get_ontology, onto_path
 import argparse
-import yaml
-import docker_functions
-import kubernetes_functions
+import contextlib
+import glob
+import io
+import logging
+import time
+import abox_stream
+import deployment_plan
+import generated_output
+import ontology_cache
+import ontology_index
+import ontology_snapshot
 import os # <-- Import os
+import profiling
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+# The emitters do not need owlready2 (see ontology_snapshot.py)
+from emitters import DEFAULT_OUTPUT_DIR, build_outputs, convert
+
+log = logging.getLogger(__name__)
+
+
 # -------------------------------
 # Parse command-line arguments
 # -------------------------------
-parser = argparse.ArgumentParser(description="OWL Ontology Validator")
-parser.add_argument("--classes", required=True, help="Path to the class (TBox) OWL file")
-parser.add_argument("--instances", required=True, help="Path to the instance (ABox) OWL file")
-args = parser.parse_args()
-
-CLASS_FILE = args.classes
-INSTANCE_FILE = args.instances
-
-
-ontology_dir = os.path.dirname(CLASS_FILE)
-if ontology_dir and ontology_dir not in onto_path:
-    onto_path.append(ontology_dir)
-# --- New Code Ends Here ---
-
-print("Loading Classes...")
-# The TBox file is loaded first, so its imports (if any) are resolved.
-onto = get_ontology(CLASS_FILE).load()
-
-print("Loading Instances...")
-# The ABox file is loaded, and it will now search the directory in onto_path
-# for its imports (like 'entity.owx').
-instances_onto = get_ontology(INSTANCE_FILE).load()
-onto.imported_ontologies.append(instances_onto)
-
-print("\nLoaded ontologies:")
-print(" Classes:", onto.base_iri)
-print(" Instances:", instances_onto.base_iri)
-
-
-all_instances = list(default_world.individuals())
-
-
-def find_platform_type():
-    kubernetes_deployment_plan = False
-    docker_deployment_plan = False
-
-    DOCKER_IDENTIFIERS = {"2024.Docker_Compose", "2024.Docker_Swarm", "2024.Docker_Engine", "2024.Docker"}
-
-    for instance in all_instances:
-        # Get the string representation of the instance (e.g., "2024.Docker")
-        instance_str = str(instance)
-
-        # 1. CORRECT DOCKER CHECK
-        if instance_str in DOCKER_IDENTIFIERS:
-            docker_deployment_plan = True
-
-        # 2. CORRECT KUBERNETES CHECK
-        if instance_str == "2024.Kubernetes":
-            kubernetes_deployment_plan = True
-
-        # Optimization: Stop early if both are found
-        if docker_deployment_plan and kubernetes_deployment_plan:
-            break
-
-    return kubernetes_deployment_plan, docker_deployment_plan
-
-
-# After this correction, the output should be (True, True) because both
-# '2024.Docker' and '2024.Kubernetes' exist in your all_instances list.
-
-print("\nAll instances in ontology:")
-for inst in all_instances:
-    print(" -", inst)
-
-os.makedirs("../generated_files", exist_ok=True)
-kubernetes_deployment_plan, docker_deployment_plan = find_platform_type()
-print(kubernetes_deployment_plan,docker_deployment_plan)
-if kubernetes_deployment_plan:
-    print("Generate Kubernetes deployment plan")
-    pods_list = kubernetes_functions.find_kubernetes_instances(all_instances)
-    kubernetes_functions.find_kubernetes_data_assertions(pods_list, onto)
-    namespace, deployments, volumes,pvcs, = kubernetes_functions.generate_kubernetes_yaml_files(pods_list, onto)
-    deployment_counter=0
-    volume_counter=0
-    pvc_counter=0
-    for deployment in deployments:
-        deployment_counter = deployment_counter +1
-        with open("../generated_files/kubernetes-deployment"+str(deployment_counter)+".generated.yml", "w") as f:
-            yaml.dump(deployment, f, sort_keys=False)
-    with open("../generated_files/kubernetes-namespace.generated.yml", "w") as f:
-        yaml.dump(namespace, f, sort_keys=False)
-    for volume in volumes:
-        volume_counter = volume_counter +1
-        with open("../generated_files/kubernetes-volume"+str(volume_counter)+".generated.yml", "w") as f:
-            yaml.dump(volume, f, sort_keys=False)
-    for pvc in pvcs:
-        pvc_counter = pvc_counter +1
-        with open("../generated_files/kubernetes-pvc"+str(pvc_counter)+".generated.yml", "w") as f:
-            yaml.dump(pvc, f, sort_keys=False)
-    print("Generated Kubernetes files")
-if docker_deployment_plan:
-    print("Generate Docker deployment plan")
-    container_list = docker_functions.find_docker_instances(all_instances)
-    docker_functions.find_docker_data_assertions(container_list, onto)
-    compose = docker_functions.generate_docker_compose(container_list, onto)
-
-    with open("../generated_files/docker-compose.generated.yml", "w") as f:
-        yaml.dump(compose, f, sort_keys=False)
-
-    print("Generated Docker Compose file")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the deployment files of a CADO ABox")
+    parser.add_argument("--classes", required=True, help="Path to the class (TBox) OWL file")
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument("--instances", help="Path to the instance (ABox) OWL file")
+    inputs.add_argument("--batch",
+                        help="Directory or glob of instance files, converted in parallel against one TBox")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help="Where generated files go; with --batch, one sub-directory per instance file")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="Worker processes for --batch or --shard-namespaces (default: number of CPUs)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rewrite the generated files whose content changed")
+    parser.add_argument("--bundle", choices=generated_output.BUNDLE_MODES,
+                        help="Write the Kubernetes resources as one multi-document file, or one per namespace")
+    parser.add_argument("--shard-namespaces", action="store_true",
+                        help="Write the Kubernetes resources of each namespace to its own sub-directory, in parallel")
+    parser.add_argument("--namespace", action="append",
+                        help="Only regenerate this namespace (repeatable; implies --shard-namespaces)")
+    parser.add_argument("--cache-dir", help="Directory of the parsed-ontology cache (disabled if omitted)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream the instance file instead of loading it into owlready2 (OWL/XML only)")
+    parser.add_argument("--export-snapshot", metavar="FILE",
+                        help="Write a snapshot of the instance file to FILE (see ontology_snapshot.py) "
+                             "instead of the generated files")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.batch and args.export_snapshot:
+        parser.error("--export-snapshot needs a single --instances file")
+    return args
+
+
+# -------------------------------
+# Build the ontology indexes
+# -------------------------------
+def index_world():
+    """Indexes over everything loaded in default_world."""
+    # One bulk pass over the asserted data properties.
+    with profiling.phase("assertion_extraction"):
+        data_index = ontology_index.build_data_property_index(default_world)
+    # Class memberships (rdf:type + subclass closure) and object property links,
+    # also read once, for instance discovery.
+    with profiling.phase("instance_discovery"):
+        class_index = ontology_index.build_class_index(default_world)
+        link_index = ontology_index.build_object_property_index(default_world)
+    return class_index, data_index, link_index
+
+
+def load_indexes(class_file, instance_file, cache_dir=None, stream=False):
+    """Load the ontologies (or stream the ABox) and return (class_index, data_index, link_index)."""
+    if stream:
+        # Fast path: read only the assertions the emitters need straight from the
+        # OWL/XML, without loading the ABox into owlready2.
+        print("Streaming Instances...")
+        start = time.perf_counter()
+        with profiling.phase("tbox_load"):
+            tbox = abox_stream.read_tbox(class_file)
+        # Discovery and extraction happen while streaming
+        with profiling.phase("abox_load"):
+            indexes = abox_stream.stream_abox(instance_file, tbox)
+        print(f"Streamed in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return indexes
+
+    print("Loading Classes and Instances...")
+    # The TBox file is loaded first, so its imports (if any) are resolved. The
+    # ABox is then loaded with the TBox directory in onto_path, so that its
+    # import of 'entity.owx' is found. With --cache-dir both come from the
+    # on-disk quadstore when the files did not change.
+    onto, instances_onto, cache_status, load_seconds = ontology_cache.load_ontologies(
+        class_file, instance_file, cache_dir)
+    print(f"Loaded in {load_seconds * 1000:.1f} ms (cache: {cache_status})")
+
+    print("\nLoaded ontologies:")
+    print(" Classes:", onto.base_iri)
+    print(" Instances:", instances_onto.base_iri)
+
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("\nAll instances in ontology:")
+        for inst in default_world.individuals():
+            log.debug(" - %s", inst)
+
+    return index_world()
+
+
+# -------------------------------
+# Importable API
+# -------------------------------
+class Converter:
+    """
+    Converts instance files (ABoxes) against one class file (TBox) that is
+    loaded once, for callers that convert many ABoxes in the same process
+    (batch workers, conversion_daemon.py).
+
+    With stream=True the TBox is read by abox_stream and every ABox is
+    streamed (OWL/XML only); otherwise the TBox is loaded into default_world
+    and each ABox is loaded on top of it and destroyed once converted. An
+    ABox is a path or a binary file object.
+    """
+
+    def __init__(self, class_file, stream=False, tbox=None):
+        self.class_file = class_file
+        self.stream = stream
+        if stream:
+            self.tbox = tbox or abox_stream.read_tbox(class_file)
+        else:
+            ontology_dir = os.path.dirname(class_file)
+            if ontology_dir and ontology_dir not in onto_path:
+                onto_path.append(ontology_dir)
+            with profiling.phase("tbox_load"):
+                self.onto = get_ontology(class_file).load()
+        self._payloads = 0
+
+    @contextlib.contextmanager
+    def indexes(self, instance_file):
+        """Context manager giving the (class_index, data_index, link_index) of an ABox."""
+        if self.stream:
+            yield abox_stream.stream_abox(instance_file, self.tbox)
+            return
+
+        with profiling.phase("abox_load"):
+            if isinstance(instance_file, str):
+                instances_onto = get_ontology(ontology_cache.file_iri(instance_file)).load()
+            else:
+                # owlready2 renames the ontology after the IRI declared in the payload
+                self._payloads += 1
+                instances_onto = get_ontology(f"http://localhost/cado-payload/{self._payloads}#").load(
+                    fileobj=instance_file)
+            self.onto.imported_ontologies.append(instances_onto)
+        try:
+            yield index_world()
+        finally:
+            # Leave only the TBox in the world for the next ABox
+            self.onto.imported_ontologies.remove(instances_onto)
+            instances_onto.destroy()
+
+    def convert(self, instance_file, output_dir=DEFAULT_OUTPUT_DIR, incremental=False, bundle=None,
+                shard=False, namespaces=None):
+        """Write the generated files of an ABox to output_dir; return (plan, report)."""
+        with self.indexes(instance_file) as indexes:
+            return convert(*indexes, output_dir, incremental, bundle, shard, 1, namespaces)
+
+    def render(self, instance_file, bundle=None):
+        """Return the generated files of an ABox as {file name: YAML text}, without writing them."""
+        with self.indexes(instance_file) as (class_index, data_index, link_index):
+            plan = deployment_plan.build_deployment_plan(class_index, data_index, link_index)
+            return generated_output.render_outputs(build_outputs(plan, data_index), bundle)
+
+
+# -------------------------------
+# Batch mode
+# -------------------------------
+# Per worker process: the Converter (and so the TBox) is created once by the
+# initializer, then every ABox handed to the worker is converted with it.
+_worker = {}
+
+
+def find_instance_files(pattern, class_file=None):
+    """
+    Instance files of a --batch argument: every .owl/.owx file of a directory,
+    or a glob, except class_file (the TBox often sits next to the ABoxes).
+    """
+    if os.path.isdir(pattern):
+        paths = [os.path.join(pattern, name) for name in os.listdir(pattern) if name.endswith((".owl", ".owx"))]
+    else:
+        paths = glob.glob(pattern)
+    tbox = os.path.abspath(class_file) if class_file else None
+    return sorted(path for path in paths if os.path.abspath(path) != tbox)
+
+
+def _init_worker(class_file, stream, tbox):
+    _worker["converter"] = Converter(class_file, stream, tbox)
+
+
+def _convert_one(instance_file, output_dir, incremental=False, bundle=None, shard=False, namespaces=None):
+    start = time.perf_counter()
+    try:
+        # Per-instance dumps of many workers would only interleave
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, report = _worker["converter"].convert(instance_file, output_dir, incremental, bundle, shard,
+                                                     namespaces)
+        return instance_file, output_dir, report, None, time.perf_counter() - start
+    except Exception as e:
+        return instance_file, output_dir, None, f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+
+def batch_output_dirs(instance_files, output_dir):
+    """
+    The output directory of each instance file: output_dir/<its path from the
+    directory of the batch, without extension>, or with its extension if that
+    names another file's directory too (app.owl and app.owx).
+    """
+    paths = [os.path.abspath(path) for path in instance_files]
+    root = os.path.commonpath([os.path.dirname(path) for path in paths]) if paths else ""
+    relative = [os.path.relpath(path, root) for path in paths]
+    stems = Counter(os.path.splitext(path)[0] for path in relative)
+    output_dirs = []
+    for path in relative:
+        stem = os.path.splitext(path)[0]
+        output_dirs.append(os.path.join(output_dir, stem if stems[stem] == 1 else path))
+    return output_dirs
+
+
+def run_batch(class_file, instance_files, output_dir, jobs, stream=False, incremental=False, bundle=None,
+              shard=False, namespaces=None):
+    """Convert every instance file into its batch_output_dirs() directory; return the number of failures."""
+    tbox = abox_stream.read_tbox(class_file) if stream else None
+    output_dirs = batch_output_dirs(instance_files, output_dir)
+
+    print(f"Converting {len(instance_files)} instance files with {jobs} workers...")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(class_file, stream, tbox)) as executor:
+        count = len(instance_files)
+        # The namespaces of each instance file are then written by its worker
+        results = list(executor.map(_convert_one, instance_files, output_dirs, [incremental] * count,
+                                    [bundle] * count, [shard] * count, [namespaces] * count))
+    elapsed = time.perf_counter() - start
+
+    failures = 0
+    print("\nBatch summary:")
+    for instance_file, file_output_dir, report, error, seconds in results:
+        if error:
+            failures += 1
+            print(f" FAILED {instance_file}: {error}")
+        else:
+            changes = ", ".join(f"{len(report[status])} {status}" for status in ("added", "changed", "removed"))
+            print(f" OK     {instance_file} -> {file_output_dir} ({changes}; {seconds * 1000:.1f} ms)")
+    print(f"{len(results) - failures} converted, {failures} failed in {elapsed:.2f} s")
+    return failures
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    with profiling.profiled("converter", args):
+        if args.batch:
+            instance_files = find_instance_files(args.batch, args.classes)
+            if not instance_files:
+                raise SystemExit(f"No instance files match {args.batch}")
+            # The phases run in the workers: only the whole batch is recorded
+            with profiling.phase("batch"):
+                failures = run_batch(args.classes, instance_files, args.output_dir, args.jobs,
+                                     args.stream, args.incremental, args.bundle, args.shard_namespaces,
+                                     args.namespace)
+            raise SystemExit(1 if failures else 0)
+
+        indexes = load_indexes(args.classes, args.instances, args.cache_dir, args.stream)
+        if args.export_snapshot:
+            with profiling.phase("snapshot_write"):
+                size = ontology_snapshot.write_snapshot(args.export_snapshot, *indexes)
+            print(f"Snapshot written to {args.export_snapshot} ({size} bytes)")
+            return
+        convert(*indexes, args.output_dir, args.incremental, args.bundle, args.shard_namespaces, args.jobs,
+                args.namespace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Backend-neutral deployment plan.
+
+The plan is extracted from the ontology indexes (see ontology_index.py) in a
+single traversal and then handed to every emitter, so the Docker Compose and
+Kubernetes generators no longer walk the ontology themselves and enabling
+both platforms does not cost a second extraction.
+"""
+from dataclasses import dataclass, field
+
+from ontology_names import local_name
+
+
+@dataclass(slots=True)
+class Container:
+    """A deployment unit: a Docker container or a Kubernetes pod."""
+    iri: str
+    name: str                       # local name in the ontology, e.g. "MySQL_Pod"
+    container_name: str = None
+    image: str = None
+    restart: str = None
+    env: dict = field(default_factory=dict)         # {"MYSQL_DATABASE": "example_db"}
+    volumes: list = field(default_factory=list)     # Compose style "name:/mount/path"
+    networks: list = field(default_factory=list)
+    volume_mount_path: str = None
+    deployment_name: str = None
+    namespace: str = None
+    replicas: str = None
+    binds: list = field(default_factory=list)       # IRIs of the bound storages
+    related_volumes: list = field(default_factory=list)  # related_volume values ("name" or "name:/mount/path")
+    mounts: dict = field(default_factory=dict)      # bound storage IRI -> its mount path (pods)
+    hosts: list = field(default_factory=list)       # IRIs of the hosts (hostedBy)
+
+
+@dataclass(slots=True)
+class Volume:
+    """A persistent storage bound by a pod."""
+    iri: str
+    name: str
+    volume_name: str = None
+    host_path: str = None
+    storage: str = None
+    mount_path: str = None
+
+
+@dataclass(slots=True)
+class Service:
+    """Pods sharing a deployment_name, deployed and scaled together."""
+    name: str
+    namespace: str = "default"
+    replicas: int = 1
+    containers: list = field(default_factory=list)  # Container records (pods)
+
+
+@dataclass(slots=True)
+class Namespace:
+    name: str
+    services: list = field(default_factory=list)    # names of the services in it
+
+
+@dataclass(slots=True)
+class Network:
+    name: str
+    containers: list = field(default_factory=list)  # names of the containers on it
+
+
+@dataclass(slots=True)
+class DeploymentPlan:
+    platforms: set = field(default_factory=set)     # names of the platform individuals
+    deploying: set = field(default_factory=set)     # names of those that deploy at least one unit
+    containers: list = field(default_factory=list)  # Docker containers
+    pods: list = field(default_factory=list)        # Kubernetes pods
+    services: dict = field(default_factory=dict)    # (namespace, name) -> Service
+    volumes: dict = field(default_factory=dict)     # IRI -> Volume
+    namespaces: dict = field(default_factory=dict)  # name -> Namespace
+    networks: dict = field(default_factory=dict)    # name -> Network
+
+
+def _first(props, name):
+    values = props.get(name)
+    return str(values[0]) if values else None
+
+
+def _build_container(iri, props, links):
+    props = {name.lower(): values for name, values in props.items()}
+    container = Container(
+        iri=iri,
+        name=local_name(iri),
+        container_name=_first(props, "container_name"),
+        image=_first(props, "related_image"),
+        restart=_first(props, "restart_policy"),
+        volumes=[str(v) for v in props.get("volumes", [])],
+        networks=[str(v) for v in props.get("networks", [])],
+        volume_mount_path=_first(props, "volume_mount_path"),
+        deployment_name=_first(props, "deployment_name"),
+        namespace=_first(props, "related_namespace"),
+        replicas=_first(props, "replicas"),
+        binds=list(links.get("binds", [])),
+        related_volumes=[str(v) for v in props.get("related_volume", [])],
+        hosts=list(links.get("hostedBy", [])),
+    )
+    for prop_name, values in props.items():
+        if prop_name.startswith("env_"):
+            container.env[prop_name.replace("env_", "").upper()] = str(values[0])
+    return container
+
+
+def _build_volume(iri, props):
+    props = {name.lower(): values for name, values in props.items()}
+    return Volume(
+        iri=iri,
+        name=local_name(iri),
+        volume_name=_first(props, "volume_name"),
+        host_path=_first(props, "volume_host_path"),
+        storage=_first(props, "reserved_storage"),
+        mount_path=_first(props, "volume_mount_path"),
+    )
+
+
+def build_deployment_plan(class_index, data_index, link_index):
+    """
+    Extract the deployment plan from the class-membership, data property and
+    object property indexes.
+
+    Docker containers are the minimal deployment units, pods the remaining
+    deployment units, and Kubernetes volumes the persistent storages bound by
+    a pod, either through binds or by naming them in related_volume. Pods are
+    grouped into services by their namespace and deployment_name.
+
+    Each storage a pod binds is mounted at the path of its own binding: the
+    one of its related_volume ("name:/mount/path"), else the storage's
+    volume_mount_path, else the pod's. A path is mounted once per pod, so
+    the pod's volume_mount_path goes to the first storage without one.
+    """
+    plan = DeploymentPlan(
+        platforms={local_name(inst) for inst in class_index["platform"]},
+        deploying={local_name(inst) for inst in class_index["platform"] if link_index.get(inst, {}).get("deploys")},
+    )
+    minimal_units = set(class_index["minimal_deployment_unit"])
+
+    # related_volume names a storage by its volume_name or its individual name
+    volumes_by_name = {}
+    mount_paths = {}    # storage IRI -> its own volume_mount_path
+    for iri in class_index["persistent"]:
+        volumes_by_name.setdefault(local_name(iri), iri)
+        props = {name.lower(): values for name, values in data_index.get(iri, {}).items()}
+        for value in props.get("volume_name", []):
+            volumes_by_name.setdefault(str(value), iri)
+        mount_path = _first(props, "volume_mount_path")
+        if mount_path:
+            mount_paths[iri] = mount_path
+
+    bound = set()
+    for iri in class_index["deployment_unit"]:
+        container = _build_container(iri, data_index.get(iri, {}), link_index.get(iri, {}))
+
+        if iri in minimal_units:
+            plan.containers.append(container)
+            for network_name in container.networks:
+                network = plan.networks.setdefault(network_name, Network(network_name))
+                network.containers.append(container.name)
+            continue
+
+        plan.pods.append(container)
+        binding_paths = {}
+        for related_volume in container.related_volumes:
+            volume_name, _, mount_path = related_volume.partition(":")
+            volume_iri = volumes_by_name.get(volume_name)
+            if volume_iri is None:
+                continue
+            if volume_iri not in container.binds:
+                container.binds.append(volume_iri)
+            if mount_path:
+                binding_paths.setdefault(volume_iri, mount_path)
+        _mount(container, binding_paths, mount_paths)
+        bound.update(container.binds)
+        if not container.deployment_name:
+            continue
+
+        # Deployments of the same name in different namespaces are different services
+        key = (container.namespace or "default", container.deployment_name)
+        service = plan.services.get(key)
+        if service is None:
+            service = plan.services[key] = Service(container.deployment_name, key[0])
+        try:
+            service.replicas = int(container.replicas or service.replicas)
+        except ValueError:
+            pass  # Keep the previous value if the conversion fails
+        service.containers.append(container)
+
+    for service in plan.services.values():
+        namespace = plan.namespaces.setdefault(service.namespace, Namespace(service.namespace))
+        namespace.services.append(service.name)
+
+    for iri in class_index["persistent"]:
+        if iri in bound:
+            plan.volumes[iri] = _build_volume(iri, data_index.get(iri, {}))
+
+    return plan
+
+
+def _mount(container, binding_paths, mount_paths):
+    """Fill container.mounts from the paths of its bindings (see build_deployment_plan)."""
+    paths = {}
+    for volume_iri in container.binds:
+        path = binding_paths.get(volume_iri) or mount_paths.get(volume_iri)
+        if path and path not in paths.values():
+            paths[volume_iri] = path
+    if container.volume_mount_path and container.volume_mount_path not in paths.values():
+        unmounted = [volume_iri for volume_iri in container.binds if volume_iri not in paths]
+        if unmounted:
+            paths[unmounted[0]] = container.volume_mount_path
+    # In the order of the bindings
+    container.mounts = {volume_iri: paths[volume_iri] for volume_iri in container.binds if volume_iri in paths}
+
+
+def volume_namespaces(plan):
+    """
+    {volume IRI: namespace} for the volumes of the plan. A claim lives in one
+    namespace, so a volume bound by pods of several namespaces goes to the
+    first one; pods outside any service count as their own namespace.
+    """
+    namespaces = {}
+    for service in plan.services.values():
+        for pod in service.containers:
+            for iri in pod.binds:
+                namespaces.setdefault(iri, service.namespace)
+    for pod in plan.pods:
+        for iri in pod.binds:
+            namespaces.setdefault(iri, pod.namespace or "default")
+    return namespaces
+
+
+def namespace_plans(plan):
+    """
+    Split the Kubernetes side of the plan by namespace: {namespace: plan
+    holding only its services, their pods and the volumes assigned to it}.
+    A volume bound only by pods outside any service gets the shard of its
+    namespace (see volume_namespaces) even if no service is in it, so the
+    shards hold the same resources as the whole plan.
+    """
+    plans = {}
+
+    def shard_of(namespace):
+        shard = plans.get(namespace)
+        if shard is None:
+            shard = plans[namespace] = DeploymentPlan(platforms=set(plan.platforms), deploying=set(plan.deploying))
+        return shard
+
+    for service in plan.services.values():
+        shard = shard_of(service.namespace)
+        shard.namespaces.setdefault(service.namespace, Namespace(service.namespace))
+        shard.services[service.namespace, service.name] = service
+        shard.pods.extend(service.containers)
+        shard.namespaces[service.namespace].services.append(service.name)
+
+    for iri, namespace in volume_namespaces(plan).items():
+        if iri in plan.volumes:
+            shard_of(namespace).volumes[iri] = plan.volumes[iri]
+    return plans
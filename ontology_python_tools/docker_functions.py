@@ -1,98 +1,80 @@
-def find_docker_instances(all_instances):
-    container_list = []
-    for inst in all_instances:
-        if "Docker_Container" in inst.name:
-            container_list.append(inst)
-            continue
-        for cls in inst.is_a:
-            if "Docker_Container" in cls.name:
-                container_list.append(inst)
-                break
-
-    print("\nContainer instances found:")
-    for inst in container_list:
-        print(" -", inst)
-    return container_list
-
+import logging
 
-def find_docker_data_assertions(container_list, onto):
-    print("\nData assertions for container instances:\n")
-    for inst in container_list:
-        print(f"Instance: {inst}")
-        for prop in onto.data_properties():
-            values = getattr(inst, prop.python_name, [])
-            if values:
-                print(f"  {prop.name} -> {values}")
+log = logging.getLogger(__name__)
 
 
-def generate_docker_compose(container_list, onto):
-    compose = {
-        "version": "3.9",
-        "services": {}
-    }
-
-    for inst in container_list:
-        service_name = inst.name.lower().replace("2024.", "").replace("_docker_container", "")
-        service = {}
-        env_vars = {}
+def find_docker_instances(plan):
+    # Docker containers are the minimal deployment units of the plan
+    container_list = list(plan.containers)
 
-        # Loop over all data properties
-        for prop in onto.data_properties():
-            # --- FIX: Use getattr(inst, prop.python_name) for retrieving values ---
-            values = getattr(inst, prop.python_name, [])
-            # --- END FIX ---
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("\nContainer instances found:")
+        for container in container_list:
+            log.debug(" - %s", container.name)
+    return container_list
 
-            if not values:
-                continue
 
-            # Force convert all values into Python strings
-            # Use list(values) to handle potential generator/set returns
-            values = [str(v) for v in list(values)]
+def find_docker_data_assertions(container_list, data_index):
+    # Listing only: the emitters read the deployment plan
+    if not log.isEnabledFor(logging.DEBUG):
+        return
+    log.debug("\nData assertions for container instances:\n")
+    for container in container_list:
+        log.debug("Instance: %s", container.name)
+        for prop_name, values in data_index.get(container.iri, {}).items():
+            log.debug("  %s -> %s", prop_name, values)
 
-            prop_name = prop.name.lower()
 
-            if prop_name == "related_image":
-                service["image"] = values[0]
+def service_name(container):
+    # "MySQL_Docker_Container" -> "mysql"
+    return container.name.lower().replace("_docker_container", "")
 
-            elif prop_name == "container_name":
-                service["container_name"] = values[0]
 
-            elif prop_name == "volumes":
-                # 'volumes' can be a list of strings (e.g., ["data:/path", "logs:/logs"])
-                service["volumes"] = values
+def container_replicas(container):
+    try:
+        return int(container.replicas or 1)
+    except ValueError:
+        return 1
 
-            elif prop_name == "networks":
-                # 'networks' can be a list of strings (e.g., ["my_net"])
-                service["networks"] = values
 
-            elif prop_name == "restart_policy":
-                service["restart"] = values[0]
+def generate_docker_compose(plan):
+    compose = {
+        "version": "3.9",
+        "services": {}
+    }
 
-            elif prop_name.startswith("env_"):
-                key = prop_name.replace("env_", "").upper()
-                service.setdefault("environment", {})  # Ensure 'environment' key exists
-                service["environment"][key] = values[0]
+    for container in plan.containers:
+        service = {}
 
-        compose["services"][service_name] = service
+        # Keys follow the order of the data properties in entity.owx
+        if container.container_name:
+            service["container_name"] = container.container_name
+        if container.env:
+            service["environment"] = dict(container.env)
+        if container.networks:
+            # 'networks' can be a list of strings (e.g., ["my_net"])
+            service["networks"] = list(container.networks)
+        if container.image:
+            service["image"] = container.image
+        if container.restart:
+            service["restart"] = container.restart
+        if container.volumes:
+            # 'volumes' can be a list of strings (e.g., ["data:/path", "logs:/logs"])
+            service["volumes"] = list(container.volumes)
+
+        compose["services"][service_name(container)] = service
 
     # ------------------------------------------------------
     # AUTO-GENERATE NETWORKS AND VOLUMES FROM SERVICES
     # ------------------------------------------------------
-    networks = set()
-    volumes = set()
-
-    for svc_name, svc in compose["services"].items():
-        # Collect networks
-        if "networks" in svc:
-            for net in svc["networks"]:
-                networks.add(net)
-
-        # Collect volumes
-        if "volumes" in svc:
-            for vol in svc["volumes"]:
-                # The format is typically "vol_name:mount_path"
-                vol_name = vol.split(":")[0]
-                volumes.add(vol_name)
+    # dicts rather than sets, so the output order is stable between runs
+    networks = dict.fromkeys(plan.networks)
+    volumes = {}
+
+    for container in plan.containers:
+        for vol in container.volumes:
+            # The format is typically "vol_name:mount_path"
+            volumes[vol.split(":")[0]] = None
 
     # Add to compose file
     if networks:
@@ -101,4 +83,44 @@ def generate_docker_compose(container_list, onto):
     if volumes:
         compose["volumes"] = {name: {} for name in volumes}
 
-    return compose
\ No newline at end of file
+    return compose
+
+
+# ------------------------------------------------------
+# DOCKER SWARM STACK
+# ------------------------------------------------------
+# Top-level extension field marking the stack files written here, which
+# manifest_import.py skips: their services are the Compose file's
+STACK_MARKER = ("x-cado", "swarm-stack")
+# Compose restart policies -> Swarm deploy.restart_policy conditions
+SWARM_RESTART_CONDITIONS = {"no": "none", "always": "any", "unless-stopped": "any", "on-failure": "on-failure"}
+
+
+def generate_swarm_stack(plan):
+    """
+    The stack file of the Docker containers (docker stack deploy -c): the
+    Compose file without the settings Swarm ignores (container_name,
+    restart), with the replicas and restart policy under deploy, overlay
+    networks and the STACK_MARKER.
+    """
+    stack = generate_docker_compose(plan)
+    stack[STACK_MARKER[0]] = STACK_MARKER[1]
+
+    for container in plan.containers:
+        service = stack["services"][service_name(container)]
+        service.pop("container_name", None)
+        deploy = {"replicas": container_replicas(container)}
+        restart = service.pop("restart", None)
+        if restart:
+            # "on-failure:5" retries at most 5 times
+            policy, _, attempts = restart.partition(":")
+            condition = SWARM_RESTART_CONDITIONS.get(policy)
+            if condition:
+                deploy["restart_policy"] = {"condition": condition}
+                if attempts.isdigit():
+                    deploy["restart_policy"]["max_attempts"] = int(attempts)
+        service["deploy"] = deploy
+
+    if "networks" in stack:
+        stack["networks"] = {name: {"driver": "overlay"} for name in stack["networks"]}
+    return stack
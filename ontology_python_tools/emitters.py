@@ -0,0 +1,263 @@
+"""
+The emitters: from the backend-neutral deployment plan to the generated files.
+
+Every backend is an Emitter in the EMITTERS registry: the platform
+individuals it targets and a function rendering the plan into
+generated_output entries. The emitters of the platforms that deploy
+something run concurrently over the one deployment plan extracted from the
+ontology, so another target only adds its rendering time. A new backend is
+one register_emitter() call; its renderer reports its progress with
+progress(), whose messages are printed in registry order once every
+emitter is done instead of interleaving.
+
+Nothing here imports owlready2, so the files can be generated from the
+ontology indexes whichever reader built them: the converter (owlready2 or
+the streaming reader) or a snapshot (see ontology_snapshot.py).
+"""
+import contextlib
+import io
+import logging
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+import deployment_plan
+import docker_functions
+import generated_output
+import kubernetes_functions
+import nomad_functions
+import profiling
+
+log = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_DIR = "../generated_files"
+
+# Messages of the emitter running in the current thread (see build_outputs)
+_messages = threading.local()
+
+
+def progress(message):
+    """Print message, or keep it for build_outputs while an emitter runs concurrently."""
+    lines = getattr(_messages, "lines", None)
+    if lines is None:
+        print(message)
+    else:
+        lines.append(message)
+
+
+# -------------------------------
+# Generate the deployment files
+# -------------------------------
+def kubernetes_outputs(plan, data_index):
+    """The generated_output entries of the Kubernetes resources of the plan."""
+    progress("Generate Kubernetes deployment plan")
+    outputs = []
+    pods_list = kubernetes_functions.find_kubernetes_instances(plan)
+    kubernetes_functions.find_kubernetes_data_assertions(pods_list, data_index)
+    namespaces, deployments, volumes, pvcs = kubernetes_functions.generate_kubernetes_yaml_files(plan)
+    # A name used in several namespaces gets the namespace in its file names
+    counts = Counter(deployment["metadata"]["name"] for deployment in deployments)
+    for deployment in deployments:
+        name = deployment["metadata"]["name"]
+        prefix = "kubernetes-deployment"
+        if counts[name] > 1:
+            prefix += "-" + deployment["metadata"]["namespace"]
+        outputs.append((generated_output.resource_filename(prefix, name), "Deployment", name, deployment))
+    for namespace in namespaces:
+        name = namespace["metadata"]["name"]
+        outputs.append((generated_output.resource_filename("kubernetes-namespace", name),
+                        "Namespace", name, namespace))
+    for volume in volumes:
+        name = volume["metadata"]["name"]
+        outputs.append((generated_output.resource_filename("kubernetes-volume", name),
+                        "PersistentVolume", name, volume))
+    for pvc in pvcs:
+        name = pvc["metadata"]["name"]
+        outputs.append((generated_output.resource_filename("kubernetes-pvc", name),
+                        "PersistentVolumeClaim", name, pvc))
+    progress("Generated Kubernetes files")
+    return outputs
+
+
+def docker_outputs(plan, data_index):
+    """The generated_output entry of the Docker Compose file of the plan."""
+    progress("Generate Docker deployment plan")
+    container_list = docker_functions.find_docker_instances(plan)
+    docker_functions.find_docker_data_assertions(container_list, data_index)
+    compose = docker_functions.generate_docker_compose(plan)
+    progress("Generated Docker Compose file")
+    return [("docker-compose.generated.yml", "Compose", "docker-compose", compose)]
+
+
+def swarm_outputs(plan, data_index):
+    """The generated_output entry of the Docker Swarm stack file of the plan."""
+    stack = docker_functions.generate_swarm_stack(plan)
+    progress("Generated Docker Swarm stack file")
+    return [("docker-stack.generated.yml", "Stack", "docker-stack", stack)]
+
+
+def nomad_outputs(plan, data_index):
+    """The generated_output entry of the Nomad job of the plan."""
+    job = nomad_functions.generate_nomad_job(plan)
+    progress("Generated Nomad job")
+    return [("nomad-job.generated.json", "NomadJob", job["Job"]["ID"], job)]
+
+
+# -------------------------------
+# Emitter registry
+# -------------------------------
+@dataclass(slots=True)
+class Emitter:
+    name: str
+    platforms: frozenset    # names of the platform individuals it generates files for
+    render: object          # render(plan, data_index) -> generated_output entries
+
+
+EMITTERS = {}   # name -> Emitter, in the order their outputs are listed
+
+
+def register_emitter(name, platforms, render):
+    """Add (or replace) the emitter name, run for plans in which one of platforms deploys something."""
+    EMITTERS[name] = Emitter(name, frozenset(platforms), render)
+    return EMITTERS[name]
+
+
+register_emitter("kubernetes", {"Kubernetes"}, kubernetes_outputs)
+# A stack file is a Compose file, so Swarm deployments get one too
+register_emitter("docker_compose", {"Docker_Compose", "Docker_Swarm", "Docker_Engine", "Docker"}, docker_outputs)
+register_emitter("docker_swarm", {"Docker_Swarm"}, swarm_outputs)
+register_emitter("nomad", {"Hashicorp_Nomad"}, nomad_outputs)
+
+
+def select_emitters(plan):
+    """
+    The emitters of the platforms of the plan that deploy at least one unit.
+    Catalogue platforms deploying nothing get no files; if no platform states
+    what it deploys, every platform of the plan counts.
+    """
+    platforms = plan.deploying or plan.platforms
+    return [emitter for emitter in EMITTERS.values() if not emitter.platforms.isdisjoint(platforms)]
+
+
+def _render(emitter, plan, data_index):
+    """(outputs, progress messages) of one emitter, in a worker thread."""
+    _messages.lines = []
+    try:
+        return emitter.render(plan, data_index), _messages.lines
+    finally:
+        _messages.lines = None
+
+
+def build_outputs(plan, data_index, emitters=None):
+    """
+    The generated_output (file name, kind, resource name, document) list of
+    the emitters (default: select_emitters), run in one thread each. Their
+    progress() messages are printed in registry order once they are done.
+    """
+    if emitters is None:
+        emitters = select_emitters(plan)
+    log.debug("Emitters: %s", ", ".join(emitter.name for emitter in emitters) or "none")
+
+    # The phases of a profile nest, so they are timed one after the other
+    if len(emitters) > 1 and not profiling.active():
+        with ThreadPoolExecutor(max_workers=len(emitters)) as executor:
+            rendered = list(executor.map(lambda emitter: _render(emitter, plan, data_index), emitters))
+        results = []
+        for outputs, messages in rendered:
+            for message in messages:
+                print(message)
+            results.append(outputs)
+    else:
+        results = []
+        for emitter in emitters:
+            with profiling.phase(emitter.name + "_emitter"):
+                results.append(emitter.render(plan, data_index))
+    # (file name, kind, resource name, document), file names derived from the resource names
+    return [output for outputs in results for output in outputs]
+
+
+# -------------------------------
+# Namespace shards
+# -------------------------------
+def _write_shard(plan, output_dir, incremental=False, bundle=None):
+    # The progress lines of many shards would only interleave
+    with contextlib.redirect_stdout(io.StringIO()):
+        outputs = kubernetes_outputs(plan, {})
+    return generated_output.write_outputs(outputs, output_dir, incremental, bundle)
+
+
+def write_namespace_shards(plan, output_dir=DEFAULT_OUTPUT_DIR, incremental=False, bundle=None, jobs=1,
+                           namespaces=None):
+    """
+    Write the Kubernetes resources of every namespace of the plan (or only
+    of namespaces) to output_dir/<namespace>/, each with its own manifest,
+    with jobs worker processes; return {namespace: generated_output report}.
+    """
+    shards = deployment_plan.namespace_plans(plan)
+    if namespaces:
+        for namespace in namespaces:
+            if namespace not in shards:
+                print(f"Namespace {namespace} is not in the deployment plan")
+        shards = {namespace: shard for namespace, shard in shards.items() if namespace in namespaces}
+    directories = [generated_output.namespace_dir(output_dir, namespace) for namespace in shards]
+
+    count = len(shards)
+    with contextlib.ExitStack() as stack:
+        if jobs > 1 and count > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=min(jobs, count)))
+            reports = executor.map(_write_shard, shards.values(), directories, [incremental] * count,
+                                   [bundle] * count)
+        else:
+            reports = map(_write_shard, shards.values(), directories, [incremental] * count, [bundle] * count)
+        return dict(zip(shards, reports))
+
+
+def write_generated_files(plan, data_index, output_dir=DEFAULT_OUTPUT_DIR, incremental=False, bundle=None,
+                          shard=False, jobs=1, namespaces=None):
+    """
+    Emit the files of every platform of the plan; return the generated_output report.
+    With shard=True the Kubernetes resources go to one directory per namespace
+    (see write_namespace_shards), and the files of the other platforms stay in
+    output_dir unless only some namespaces are regenerated.
+    """
+    if not shard and not namespaces:
+        outputs = build_outputs(plan, data_index)
+        with profiling.phase("file_writes"):
+            report = generated_output.write_outputs(outputs, output_dir, incremental, bundle)
+        generated_output.print_report(report)
+        return report
+
+    emitters = select_emitters(plan)
+    report = {"added": [], "changed": [], "removed": [], "unchanged": [], "seconds": 0}
+    if EMITTERS["kubernetes"] in emitters:
+        with profiling.phase("kubernetes_shards"):
+            shards = write_namespace_shards(plan, output_dir, incremental, bundle, jobs, namespaces)
+        for namespace, shard_report in shards.items():
+            directory = os.path.basename(generated_output.namespace_dir(output_dir, namespace))
+            for status in ("added", "changed", "removed", "unchanged"):
+                report[status] += [dict(entry, file=os.path.join(directory, entry["file"]))
+                                   for entry in shard_report[status]]
+            report["seconds"] += shard_report["seconds"]
+        print(f"\n{len(shards)} namespaces written to {output_dir}")
+    if not namespaces:
+        # The other platforms' files, and the removal of resources written before without shards
+        outputs = build_outputs(plan, data_index, [emitter for emitter in emitters if emitter.name != "kubernetes"])
+        with profiling.phase("file_writes"):
+            root_report = generated_output.write_outputs(outputs, output_dir, incremental, bundle)
+        for status in ("added", "changed", "removed", "unchanged"):
+            report[status] += root_report[status]
+        report["seconds"] += root_report["seconds"]
+    generated_output.print_report(report)
+    return report
+
+
+def convert(class_index, data_index, link_index, output_dir=DEFAULT_OUTPUT_DIR, incremental=False,
+            bundle=None, shard=False, jobs=1, namespaces=None):
+    """Build the deployment plan and write its files; return (plan, report)."""
+    # Everything the emitters need, extracted once and shared by all of them
+    with profiling.phase("deployment_plan"):
+        plan = deployment_plan.build_deployment_plan(class_index, data_index, link_index)
+    report = write_generated_files(plan, data_index, output_dir, incremental, bundle, shard, jobs, namespaces)
+    return plan, report
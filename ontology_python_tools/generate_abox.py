@@ -0,0 +1,201 @@
+"""
+Synthetic ABox generator.
+
+Writes CADO instance files (OWL/XML, importing entity.owx, in the same shape
+as instances.owl) with a chosen number of Kubernetes pods, Docker containers,
+persistent volumes, namespaces and env_* properties, to measure the tools at
+sizes the WordPress/MySQL example does not reach (see benchmark.py):
+
+    python generate_abox.py --individuals 10000 --output abox-10k.owl
+    python generate_abox.py --pods 500 --containers 200 --volumes 100 --namespaces 5 --env 8 --output abox.owl
+
+Every generated file is deterministic: the same shape gives the same file.
+"""
+import argparse
+from dataclasses import dataclass
+from xml.sax.saxutils import escape, quoteattr
+
+BASE_IRI = "http://www.semanticweb.org/container-ontologies/2024/"
+
+# Platforms, runtime and hosts every generated application is deployed with
+CATALOGUE = (
+    ("Docker", ("runtime_environment", "#platform")),
+    ("Docker_Compose", ("subplatform",)),
+    ("Kubernetes", ("subplatform", "#platform")),
+    ("Physical_Machine", ("#hosts",)),
+    ("Virtual_Machine", ("#hosts",)),
+    ("Network", ("group_by",)),
+)
+HOSTS = ("Physical_Machine", "Virtual_Machine")
+NETWORK_NAME = "generated_network"
+
+
+@dataclass(slots=True)
+class AboxShape:
+    pods: int = 1           # Kubernetes pods (deployment units)
+    containers: int = 1     # Docker containers (minimal deployment units)
+    volumes: int = 1        # persistent volumes, volume i bound by pod i
+    namespaces: int = 1     # pods are spread over them round-robin
+    env: int = 2            # env_* properties per pod and container
+
+    @classmethod
+    def for_individuals(cls, individuals, env=2):
+        """
+        A shape of about that many individuals (at least 10): the catalogue,
+        one namespace per 100 individuals, and the rest split evenly between
+        pods, containers and volumes.
+        """
+        rest = max(individuals, 10) - len(CATALOGUE)
+        namespaces = max(1, rest // 100)
+        units = rest - namespaces
+        containers = volumes = units // 3
+        return cls(units - containers - volumes, containers, volumes, namespaces, env)
+
+    @property
+    def individuals(self):
+        return len(CATALOGUE) + self.pods + self.containers + self.volumes + self.namespaces
+
+
+def _literal(value):
+    return "<Literal>%s</Literal>" % escape(str(value))
+
+
+def _individual(name):
+    return "<NamedIndividual IRI=%s/>" % quoteattr(name)
+
+
+def header_lines(data_properties=()):
+    """The start of an instance file importing entity.owx, declaring data_properties."""
+    yield '<?xml version="1.0"?>\n'
+    yield ('<Ontology xmlns="http://www.w3.org/2002/07/owl#"\n'
+           '     xml:base="%s"\n'
+           '     xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"\n'
+           '     xmlns:xml="http://www.w3.org/XML/1998/namespace"\n'
+           '     xmlns:xsd="http://www.w3.org/2001/XMLSchema#"\n'
+           '     xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#"\n'
+           '     ontologyIRI="%sindividuals">\n' % (BASE_IRI, BASE_IRI))
+    yield '    <Prefix name="" IRI="%s"/>\n' % BASE_IRI
+    yield "    <Import>entity.owx</Import>\n"
+    for prop in data_properties:
+        yield '    <Declaration> <DataProperty IRI=%s/> </Declaration>\n' % quoteattr(prop)
+
+
+FOOTER = "</Ontology>\n"
+
+
+def declare(name, *classes):
+    """The declaration of individual name and its class assertions."""
+    yield "    <Declaration> %s </Declaration>\n" % _individual(name)
+    for cls in classes:
+        yield "    <ClassAssertion> <Class IRI=%s/> %s </ClassAssertion>\n" % (quoteattr(cls), _individual(name))
+
+
+def data(name, prop, value):
+    return "    <DataPropertyAssertion> <DataProperty IRI=%s/> %s %s </DataPropertyAssertion>\n" % (
+        quoteattr(prop), _individual(name), _literal(value))
+
+
+def link(subject, prop, obj):
+    return "    <ObjectPropertyAssertion> <ObjectProperty IRI=%s/> %s %s </ObjectPropertyAssertion>\n" % (
+        quoteattr(prop), _individual(subject), _individual(obj))
+
+
+def abox_lines(shape):
+    """The lines of the OWL/XML instance file of shape."""
+    # entity.owx only declares the env_* properties of the example applications
+    yield from header_lines("env_app_setting_%d" % j for j in range(shape.env))
+
+    # ---- Catalogue
+    for name, classes in CATALOGUE:
+        yield from declare(name, *classes)
+    yield data("Docker_Compose", "version", "3.7")
+    yield data("Network", "network_name", NETWORK_NAME)
+    yield link("Docker", "utilizes", "Docker_Compose")
+    yield link("Docker", "generatesGroupBy", "Network")
+
+    # ---- Namespaces
+    namespaces = ["namespace-%d" % i for i in range(shape.namespaces)]
+    for i, namespace in enumerate(namespaces):
+        name = "Namespace_%d" % i
+        yield from declare(name, "group_by")
+        yield data(name, "namespace_name", namespace)
+        yield link("Kubernetes", "generatesGroupBy", name)
+
+    # ---- Persistent volumes
+    for i in range(shape.volumes):
+        name = "Volume_%d" % i
+        yield from declare(name, "#persistent")
+        yield data(name, "volume_name", "volume-%d" % i)
+        yield data(name, "volume_host_path", "/mnt/data/volume-%d" % i)
+        yield data(name, "reserved_storage", "%dGi" % (1 + i % 10))
+
+    # ---- Kubernetes pods; pod i binds volume i
+    for i in range(shape.pods):
+        name = "App%d_Pod" % i
+        namespace = namespaces[i % len(namespaces)]
+        yield from declare(name, "#deployment_unit")
+        yield data(name, "container_name", "app%d" % i)
+        yield data(name, "deployment_name", "app%d-deployment" % i)
+        yield data(name, "related_image", "registry.local/app%d:1.%d" % (i, i % 10))
+        yield data(name, "related_namespace", namespace)
+        yield data(name, "replicas", 1 + i % 3)
+        for j in range(shape.env):
+            yield data(name, "env_app_setting_%d" % j, "value-%d-%d" % (i, j))
+        yield link("Kubernetes", "#deploys", name)
+        yield link(name, "#hostedBy", HOSTS[i % len(HOSTS)])
+        yield link("Namespace_%d" % (i % len(namespaces)), "includesRunningInstance", name)
+        if i < shape.volumes:
+            yield data(name, "volume_mount_path", "/var/lib/app%d" % i)
+            yield link(name, "#binds", "Volume_%d" % i)
+
+    # ---- Docker containers
+    for i in range(shape.containers):
+        name = "App%d_Docker_Container" % i
+        yield from declare(name, "minimal_deployment_unit", "#deployment_unit")
+        yield data(name, "container_name", "app%d-container" % i)
+        yield data(name, "related_image", "registry.local/app%d:1.%d" % (i, i % 10))
+        yield data(name, "restart_policy", "always")
+        yield data(name, "networks", NETWORK_NAME)
+        yield data(name, "volumes", "app%d_data:/var/lib/app%d" % (i, i))
+        for j in range(shape.env):
+            yield data(name, "env_app_setting_%d" % j, "value-%d-%d" % (i, j))
+        yield link("Docker", "#deploys", name)
+        yield link(name, "#hostedBy", HOSTS[i % len(HOSTS)])
+        yield link("Network", "includesRunningInstance", name)
+
+    yield FOOTER
+
+
+def write_abox(shape, path):
+    """Write the instance file of shape to path; return its number of individuals."""
+    with open(path, "w", buffering=1 << 20) as f:
+        f.writelines(abox_lines(shape))
+    return shape.individuals
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic CADO ABox")
+    parser.add_argument("--output", required=True, help="Instance file to write (OWL/XML)")
+    parser.add_argument("--individuals", type=int,
+                        help="Approximate total number of individuals (10 to 100000); sets the counts below")
+    parser.add_argument("--pods", type=int, default=1)
+    parser.add_argument("--containers", type=int, default=1)
+    parser.add_argument("--volumes", type=int, default=1)
+    parser.add_argument("--namespaces", type=int, default=1)
+    parser.add_argument("--env", type=int, default=2, help="env_* properties per pod and container")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.individuals:
+        shape = AboxShape.for_individuals(args.individuals, args.env)
+    else:
+        shape = AboxShape(args.pods, args.containers, args.volumes, max(1, args.namespaces), args.env)
+    count = write_abox(shape, args.output)
+    print(f"Wrote {args.output}: {count} individuals ({shape.pods} pods, {shape.containers} containers, "
+          f"{shape.volumes} volumes, {shape.namespaces} namespaces, {shape.env} env properties each)")
+
+
+if __name__ == "__main__":
+    main()
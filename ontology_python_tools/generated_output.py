@@ -0,0 +1,168 @@
+"""
+Writing the generated deployment files.
+
+Every emitted resource goes to a file named after the resource itself
+(e.g. kubernetes-deployment-mysql-deployment.generated.yml) instead of a loop
+counter, so adding a pod does not rename the files of all the pods after it.
+The SHA-256 of every rendered file is kept in a manifest next to them; the
+next run compares against it to report which resources were added, changed
+or removed, and with incremental=True only writes the files whose content
+changed. Files of resources that disappeared are deleted.
+
+The YAML is emitted with libyaml's C dumper when PyYAML was built with it,
+and with the pure-Python one otherwise; both produce the same text. The
+Kubernetes resources can also be written as multi-document bundles, one for
+all of them or one per namespace, instead of one file each. Documents of the
+JSON_KINDS (the Nomad job) are written as JSON.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+
+import yaml
+
+MANIFEST_FILE = "generated-manifest.json"
+
+# Same output as yaml.dump() for the plain dicts/lists/strings we emit, much faster
+try:
+    Dumper = yaml.CSafeDumper
+    DUMPER_NAME = "libyaml"
+except AttributeError:
+    Dumper = yaml.SafeDumper
+    DUMPER_NAME = "pure Python"
+
+JSON_KINDS = {"NomadJob"}
+BUNDLE_MODES = ("single", "namespace")
+BUNDLE_KIND = "Bundle"
+# Apply order inside a bundle: a resource comes after the ones it refers to
+_KIND_ORDER = {"Namespace": 0, "PersistentVolume": 1, "PersistentVolumeClaim": 2, "Deployment": 3}
+
+
+def resource_filename(prefix, name):
+    """Stable file name of a resource: '<prefix>-<name>.generated.yml'."""
+    return "%s-%s.generated.yml" % (prefix, re.sub(r"[^A-Za-z0-9_.-]+", "-", str(name)))
+
+
+def namespace_dir(output_dir, namespace):
+    """Directory of the resources of a namespace when they are written per namespace."""
+    return os.path.join(output_dir, re.sub(r"[^A-Za-z0-9_.-]+", "-", str(namespace)))
+
+
+def render(kind, document):
+    if kind == BUNDLE_KIND:
+        return yaml.dump_all(document, Dumper=Dumper, sort_keys=False)
+    if kind in JSON_KINDS:
+        return json.dumps(document, indent=2) + "\n"
+    return yaml.dump(document, Dumper=Dumper, sort_keys=False)
+
+
+def bundle_outputs(outputs, mode):
+    """
+    Regroup the Kubernetes resources of outputs (see write_outputs) into
+    '---'-separated bundles: kubernetes.generated.yml with mode "single", or
+    kubernetes-<namespace>.generated.yml per namespace with mode "namespace".
+    Other outputs (the Compose file) are left as they are.
+    """
+    bundles = {}
+    rest = []
+    for output in outputs:
+        document = output[3]
+        if "apiVersion" not in document:
+            rest.append(output)
+            continue
+        if mode == "single":
+            key = None
+        elif document["kind"] == "Namespace":
+            key = document["metadata"]["name"]
+        else:
+            key = document["metadata"].get("namespace") or "default"
+        bundles.setdefault(key, []).append(output)
+
+    for key, members in bundles.items():
+        members.sort(key=lambda output: _KIND_ORDER.get(output[1], len(_KIND_ORDER)))
+        filename = "kubernetes.generated.yml" if key is None else resource_filename("kubernetes", key)
+        rest.append((filename, BUNDLE_KIND, key or "kubernetes", [output[3] for output in members]))
+    return rest
+
+
+def render_outputs(outputs, bundle=None):
+    """{file name: YAML text} of outputs (see write_outputs), without writing anything."""
+    if bundle:
+        outputs = bundle_outputs(outputs, bundle)
+    return {filename: render(kind, document) for filename, kind, name, document in outputs}
+
+
+def read_manifest(output_dir):
+    """{file name: {"kind", "name", "sha256"}} of the previous run, empty if there is none."""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE)) as f:
+            return json.load(f)["files"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def write_outputs(outputs, output_dir, incremental=False, bundle=None):
+    """
+    Write the rendered resources to output_dir and update the manifest.
+
+    outputs is a list of (file name, kind, resource name, document). With
+    incremental=True a file is only rewritten when its content hash differs
+    from the manifest (or the file is missing). bundle is None, "single" or
+    "namespace" (see bundle_outputs). Returns the report
+    {"added": [...], "changed": [...], "removed": [...], "unchanged": [...]}
+    of manifest entries, with the file name under "file", and the emission
+    time in seconds under "seconds".
+    """
+    start = time.perf_counter()
+    if bundle:
+        outputs = bundle_outputs(outputs, bundle)
+    os.makedirs(output_dir, exist_ok=True)
+    previous = read_manifest(output_dir)
+    manifest = {}
+    report = {"added": [], "changed": [], "removed": [], "unchanged": []}
+
+    for filename, kind, name, document in outputs:
+        text = render(kind, document)
+        entry = {"kind": kind, "name": name,
+                 "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest()}
+        manifest[filename] = entry
+        path = os.path.join(output_dir, filename)
+
+        old = previous.get(filename)
+        if old is None:
+            report["added"].append(dict(entry, file=filename))
+        elif old["sha256"] != entry["sha256"]:
+            report["changed"].append(dict(entry, file=filename))
+        else:
+            report["unchanged"].append(dict(entry, file=filename))
+            if incremental and os.path.exists(path):
+                continue
+        # One write through one buffered handle, also for a bundle of thousands of documents
+        with open(path, "w", buffering=1 << 20) as f:
+            f.write(text)
+
+    # Only files this tool wrote before are deleted
+    for filename, old in previous.items():
+        if filename not in manifest:
+            report["removed"].append(dict(old, file=filename))
+            path = os.path.join(output_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w") as f:
+        json.dump({"files": manifest}, f, indent=2)
+        f.write("\n")
+
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def print_report(report):
+    print("\nGenerated resources: %d added, %d changed, %d removed, %d unchanged" % (
+        len(report["added"]), len(report["changed"]), len(report["removed"]), len(report["unchanged"])))
+    for status, sign in (("added", "+"), ("changed", "~"), ("removed", "-")):
+        for entry in report[status]:
+            print(f" {sign} {entry['kind']} {entry['name']} ({entry['file']})")
+    print(f"Emitted in {report['seconds'] * 1000:.1f} ms ({DUMPER_NAME} YAML dumper)")
@@ -1,80 +1,60 @@
 # kube_generator.py
-import yaml
-from owlready2 import get_ontology, default_world
+import logging
 
+import deployment_plan
 
+log = logging.getLogger(__name__)
 
 
-# ----------------------------------------------------------
-# 1. FIND KUBERNETES POD INSTANCES (UNCHANGED)
-# ----------------------------------------------------------
-def find_kubernetes_instances(all_instances):
-    # ... (unchanged)
-    container_list = []
-
 
-    for inst in all_instances:
 
-        # Direct name match
-        if "Pod" in inst.name or "Kubernetes_Volume" in inst.name:
-            container_list.append(inst)
-            continue
-
-        # Class-based match
-        for cls in inst.is_a:
-            if "Pod" in cls.name or "Kubernetes_Volume" in inst.name:
-                container_list.append(inst)
-                break
-    print("\nPod instances found:")
-    for inst in container_list:
-        print(" -", inst)
+# ----------------------------------------------------------
+# 1. FIND KUBERNETES POD INSTANCES
+# ----------------------------------------------------------
+def find_kubernetes_instances(plan):
+    """
+    Returns the pods of the deployment plan followed by the volumes they
+    bind (see deployment_plan.build_deployment_plan for how they are found).
+    """
+    container_list = list(plan.pods) + list(plan.volumes.values())
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("\nPod instances found:")
+        for inst in container_list:
+            log.debug(" - %s", inst.name)
     return container_list
 
 
-# ----------------------------------------------------------
-# 2. FIND KUBERNETES DATA ASSERTIONS (UNCHANGED)
-# ----------------------------------------------------------
 # ----------------------------------------------------------
 # 2. FIND KUBERNETES DATA ASSERTIONS (REVISED FOR ROBUSTNESS)
 # ----------------------------------------------------------
-def find_kubernetes_data_assertions(container_list, onto):
+def find_kubernetes_data_assertions(container_list, data_index):
     """
-    Prints data properties asserted on Pod instances, handling potential
-    Owlready2 naming inconsistencies.
+    Logs (at DEBUG) the data properties asserted on Pod instances. The data
+    index is keyed by the properties' local names, so no python_name/name
+    fallback is needed.
     """
-    print("\nData assertions for Pod instances:\n")
+    if not log.isEnabledFor(logging.DEBUG):
+        return
+    log.debug("\nData assertions for Pod instances:\n")
 
     for inst in container_list:
-        print(f"Instance: {inst.name}")
-
-        # 1. Iterate over all defined data properties in the ontology
-        for prop in onto.data_properties():
-
-            # --- Attempt 1: Use Owlready2's designated Python property name ---
-            values = getattr(inst, prop.python_name, [])
+        log.debug("Instance: %s", inst.name)
 
-            # --- Attempt 2: Use the raw property name (local name) if attempt 1 fails ---
-            # This is common if the ontology doesn't set a python_name correctly.
-            if not values:
-                values = getattr(inst, prop.name, [])
+        for prop_name, values in data_index.get(inst.iri, {}).items():
+            log.debug("  %s -> %s", prop_name, values)
 
-            # Convert values to a list if not already (for consistency)
-            if values:
-                # Use list(values) to handle case where values is a generator/set
-                print(f"  {prop.name} -> {list(values)}")
-                found_props = True
 
 
 
 
-
-# ----------------------------------------------------------
-# 3. GENERATE KUBERNETES YAML FILES (FIXED TO RETURN ARRAYS AND SINGLE NAMESPACE)
-# ----------------------------------------------------------
 # ----------------------------------------------------------
 # 3. GENERATE KUBERNETES YAML FILES (FIXED LOGIC)
 # ----------------------------------------------------------
-def generate_kubernetes_yaml_files(container_list, onto):
+def generate_kubernetes_yaml_files(plan):
+    """
+    Return the (Namespace, Deployment, PersistentVolume, PersistentVolumeClaim)
+    documents of the plan, one list per kind.
+    """
     resources = {
         "namespaces": set(),
         "deployments": [],
@@ -83,87 +63,62 @@ def generate_kubernetes_yaml_files(container_list, onto):
     # Temporary structure to hold all pod/deployment config data
     deployment_configs = {}
 
-    data_props = {prop.name.lower(): prop for prop in onto.data_properties()}
-
     # =======================================================
     # PASS 1: AGGREGATE ALL DATA (VOLUMES AND DEPLOYMENT CONFIGS)
     # =======================================================
-    for inst in container_list:
-        ont_name = inst.name
-        prefix = ont_name.split("_")[0]
-
-        # --- Common Data Extraction ---
-        instance_data = {}
-        for prop_name, prop in data_props.items():
-            values = list(getattr(inst, prop.python_name, []))
-            if not values:
-                continue
-            instance_data[prop_name] = values[0]
-
-        # -------------------------------------------------------
-        # PARSE VOLUME DATA (Store in resources["volumes"])
-        # -------------------------------------------------------
-        if "volume" in ont_name.lower():
-            if instance_data.get("volume_name"):
-                resources["volumes"][prefix] = {
-                    "name": instance_data["volume_name"],
-                    "hostPath": instance_data.get("volume_host_path"),
-                    "storage": instance_data.get("reserved_storage") or "1Gi",
-                    "accessMode": "ReadWriteOnce"
-                }
 
-        # -------------------------------------------------------
-        # PARSE POD DATA (Store in temporary deployment_configs)
-        # -------------------------------------------------------
-        elif "pod" in ont_name.lower():
-            deployment_name = instance_data.get("deployment_name")
-            if deployment_name:
-
-                # Initialize config for this deployment if it doesn't exist
-                if deployment_name not in deployment_configs:
-                    deployment_configs[deployment_name] = {
-                        "namespace_name": "default",
-                        "replicas_value": 1,
-                        "containers": [],  # List to support multi-container pods if needed
-                        "volume_mounts": []
-                    }
-
-                config = deployment_configs[deployment_name]
-
-                # Deployment Metadata
-                config["namespace_name"] = instance_data.get("related_namespace", config["namespace_name"])
-                resources["namespaces"].add(config["namespace_name"])
-                try:
-                    config["replicas_value"] = int(instance_data.get("replicas", config["replicas_value"]))
-                except (ValueError, TypeError):
-                    pass  # Keep default if conversion fails
-
-                # Container Spec
-                container_spec = {}
-                env_vars = []
-
-                if instance_data.get("container_name"):
-                    container_spec["name"] = instance_data["container_name"]
-                if instance_data.get("related_image"):
-                    container_spec["image"] = instance_data["related_image"]
-
-                for prop_name, value in instance_data.items():
-                    if prop_name.startswith("env_"):
-                        key = prop_name.replace("env_", "").upper()
-                        env_vars.append({"name": key, "value": value})
-
-                # Volume Mounts (store *which* pod/deployment/volume connection this is)
-                if instance_data.get("volume_mount_path"):
-                    config["volume_mounts"].append({
-                        "prefix": prefix,  # Use the prefix to link to the volume data later
-                        "mountPath": instance_data["volume_mount_path"]
+    # -------------------------------------------------------
+    # VOLUME DATA (Store in resources["volumes"], keyed by IRI)
+    # -------------------------------------------------------
+    for volume in plan.volumes.values():
+        if volume.volume_name:
+            resources["volumes"][volume.iri] = {
+                "name": volume.volume_name,
+                "hostPath": volume.host_path,
+                "storage": volume.storage or "1Gi",
+                "accessMode": "ReadWriteOnce"
+            }
+
+    # -------------------------------------------------------
+    # POD DATA (Store in temporary deployment_configs)
+    # -------------------------------------------------------
+    for service in plan.services.values():
+        config = deployment_configs[service.namespace, service.name] = {
+            "namespace_name": service.namespace,
+            "replicas_value": service.replicas,
+            "containers": [],  # List to support multi-container pods if needed
+            "volume_mounts": [],
+            "pod_volumes": []
+        }
+        resources["namespaces"].add(service.namespace)
+        used_volumes = set()
+
+        for pod in service.containers:
+            # Container Spec
+            container_spec = {}
+            if pod.container_name:
+                container_spec["name"] = pod.container_name
+            if pod.image:
+                container_spec["image"] = pod.image
+
+            # Volume Mounts: the storages the pod binds (binds / related_volume),
+            # each at the path of its binding, looked up by IRI in the volume index
+            for iri, mount_path in pod.mounts.items():
+                vol = resources["volumes"].get(iri)
+                if vol is None:
+                    continue
+                config["volume_mounts"].append({"name": vol["name"], "mountPath": mount_path})
+                # One PVC reference per volume of the deployment
+                if iri not in used_volumes:
+                    used_volumes.add(iri)
+                    config["pod_volumes"].append({
+                        "name": vol["name"],
+                        "persistentVolumeClaim": {"claimName": vol["name"]+"c"}
                     })
 
-                # Dedup and add container
-                if container_spec:
-                    dedup = {e["name"]: e["value"] for e in env_vars}
-                    container_spec["env"] = [{"name": k, "value": v} for k, v in dedup.items()]
-                    config["containers"].append(container_spec)
+            if container_spec:
+                container_spec["env"] = [{"name": k, "value": v} for k, v in pod.env.items()]
+                config["containers"].append(container_spec)
 
     # =======================================================
     # PASS 2: GENERATE YAML RESOURCES
@@ -172,44 +127,20 @@ def generate_kubernetes_yaml_files(container_list, onto):
     # -------------------------------------------------------
     # BUILD DEPLOYMENTS
     # -------------------------------------------------------
-    for deployment_name, config in deployment_configs.items():
+    for (_, deployment_name), config in deployment_configs.items():
 
         container_blocks = []
         for container_spec in config["containers"]:
             container_block = dict(container_spec)
-
-            # Add volumeMounts to the container block
-            volume_mounts = []
-            for vm_data in config["volume_mounts"]:
-                # Link volume mount to the volume data using the prefix
-                prefix = vm_data["prefix"]
-                if prefix in resources["volumes"]:
-                    vol = resources["volumes"][prefix]
-                    volume_mounts.append({"name": vol["name"], "mountPath": vm_data["mountPath"]})
-
-            if volume_mounts:
-                container_block["volumeMounts"] = volume_mounts
-
+            if config["volume_mounts"]:
+                container_block["volumeMounts"] = [dict(vm) for vm in config["volume_mounts"]]
             container_blocks.append(container_block)
 
         template_spec = {"containers": container_blocks}
 
-        # Add Volume specs (PVCs) to the Pod Template
-        pod_volumes = []
-        # Check all volume mounts for the deployment and add a volume spec for each unique volume
-        used_volumes = set()
-        for vm_data in config["volume_mounts"]:
-            prefix = vm_data["prefix"]
-            if prefix in resources["volumes"] and prefix not in used_volumes:
-                vol = resources["volumes"][prefix]
-                pod_volumes.append({
-                    "name": vol["name"],
-                    "persistentVolumeClaim": {"claimName": vol["name"]+"c"}
-                })
-                used_volumes.add(prefix)
-
-        if pod_volumes:
-            template_spec["volumes"] = pod_volumes
+        # Volume specs (PVCs) of the Pod Template, collected in pass 1
+        if config["pod_volumes"]:
+            template_spec["volumes"] = config["pod_volumes"]
 
         # Assume single container for selector label for simplicity
         app_label = config["containers"][0]["name"] if config["containers"] else deployment_name
@@ -232,21 +163,22 @@ def generate_kubernetes_yaml_files(container_list, onto):
     # -------------------------------------------------------
     # NAMESPACE, PV, PVC (This section remains largely the same)
     # -------------------------------------------------------
-    # ... (remaining logic for NS, PV, PVC as in the original code)
-    ns = None
+    # One Namespace per namespace of the plan, and every PV/PVC in the
+    # namespace of the pods binding it (see deployment_plan.namespace_plans)
     namespaces = sorted({n for n in resources["namespaces"] if n.lower() != "default"})
-    if namespaces:
-        print(namespaces)
-        ns = {"apiVersion": "v1", "kind": "Namespace", "metadata": {"name": namespaces[0]}}
+    log.debug("Namespaces: %s", namespaces)
+    ns_array = [{"apiVersion": "v1", "kind": "Namespace", "metadata": {"name": n}} for n in namespaces]
+    volume_namespaces = deployment_plan.volume_namespaces(plan)
 
     pv_array = []
     pvc_array = []
-    for prefix, v in resources["volumes"].items():
+    for iri, v in resources["volumes"].items():
+        namespace = volume_namespaces.get(iri, "default")
         # PersistentVolume
         pv = {
             "apiVersion": "v1",
             "kind": "PersistentVolume",
-            "metadata": {"name": v["name"], "namespace":namespaces[0]},
+            "metadata": {"name": v["name"], "namespace": namespace},
             "spec": {
                 "capacity": {"storage": v["storage"]},
                 "accessModes": [v["accessMode"]],
@@ -259,7 +191,7 @@ def generate_kubernetes_yaml_files(container_list, onto):
         pvc = {
             "apiVersion": "v1",
             "kind": "PersistentVolumeClaim",
-            "metadata": {"name": v["name"]+"c","namespace":namespaces[0]},
+            "metadata": {"name": v["name"]+"c", "namespace": namespace},
             "spec": {
                 "accessModes": [v["accessMode"]],
                 "resources": {"requests": {"storage": v["storage"]}},
@@ -268,4 +200,4 @@ def generate_kubernetes_yaml_files(container_list, onto):
         }
         pvc_array.append(pvc)
 
-    return ns, resources["deployments"], pv_array, pvc_array
+    return ns_array, resources["deployments"], pv_array, pvc_array
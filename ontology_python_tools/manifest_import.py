@@ -0,0 +1,480 @@
+"""
+Manifest importer: Docker Compose and Kubernetes YAML to a CADO ABox.
+
+The reverse of docker_functions.py and kubernetes_functions.py, to bring
+existing manifests under CADO without writing OWL/XML by hand. Every YAML
+document of the given files and directories is read in turn and mapped
+onto the individuals and properties instances.owl uses:
+
+    Compose service         <service>_Docker_Container   minimal_deployment_unit, deployed by Docker
+                            (container_name, related_image, restart_policy, networks, volumes, env_*)
+    Compose network         <network>_Network            group_by (network_name)
+    Compose named volume    <volume>_Docker_Volume       persistent (volume_name)
+    Deployment container    <deployment>_Pod             deployment_unit, deployed by Kubernetes
+                            (<deployment>_<n>_Pod if the name is taken, e.g. in another namespace)
+                            (container_name, deployment_name, related_image, related_namespace,
+                             replicas, volume_mount_path, related_volume, env_*)
+    Namespace               Namespace_<name>             group_by (namespace_name)
+    PersistentVolume        <volume>_Kubernetes_Volume   persistent (volume_name, volume_host_path,
+                                                                     reserved_storage)
+
+A pod binds the persistent volume each PersistentVolumeClaim it mounts
+resolves to; its volume_mount_path is the path of the first one, and the
+others are also named in related_volume with their own path
+("<volume>:/mount/path", see deployment_plan.py). A claim resolves to
+its volumeName, the volume whose claimRef names it, or the volume
+named like the claim without its trailing "c" (the converter names the
+claim of volume "x" "xc"). A claim no volume matches becomes a volume of
+its own. Every deployment unit is hosted by Physical_Machine.
+
+The Swarm stack files the converter writes (marked with STACK_MARKER) hold
+the services of its Compose file again: they make Docker_Swarm deploy the
+Compose containers of their services instead of adding containers of their
+own (deploy.replicas becomes replicas). Only the services no Compose file
+declared are imported as containers.
+
+The ABox is written as OWL/XML (--output), which both the converter and
+its streaming reader load. insert_abox() puts it straight into an
+owlready2 quadstore instead, with one batched insert per table inside a
+single transaction rather than one individual at a time; --classes uses
+it to check the import (see quick_validation.py) without writing a file:
+
+    python manifest_import.py manifests/ --output imported.owl
+    python manifest_import.py docker-compose.yml k8s/ --output imported.owl --classes entity.owx
+"""
+import argparse
+import contextlib
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import yaml
+
+import generate_abox
+from docker_functions import STACK_MARKER
+
+try:
+    Loader = yaml.CSafeLoader
+except AttributeError:
+    Loader = yaml.SafeLoader
+
+ABOX_IRI = generate_abox.BASE_IRI + "individuals"
+# Classes of the platforms and the host, as in the generated ABoxes
+CATALOGUE = dict(generate_abox.CATALOGUE, Docker_Swarm=("#platform",))
+HOST = "Physical_Machine"
+MANIFEST_EXTENSIONS = (".yml", ".yaml")
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+@dataclass(slots=True)
+class Abox:
+    """The assertions of an instance file, by local name, in the order they were made."""
+    individuals: dict = field(default_factory=dict)     # name -> [class names]
+    data: list = field(default_factory=list)            # (individual, property, value)
+    links: list = field(default_factory=list)           # (subject, property, object)
+    data_properties: dict = field(default_factory=dict)  # env_* properties to declare
+    skipped: dict = field(default_factory=dict)         # kind -> number of documents not imported
+
+    def individual(self, name, *classes):
+        """Declare individual name (if new) with classes; return name."""
+        known = self.individuals.setdefault(name, [])
+        known.extend(cls for cls in classes if cls not in known)
+        return name
+
+
+def _name(*parts):
+    return _UNSAFE.sub("_", "_".join(str(part) for part in parts))
+
+
+def _unused_name(abox, *parts):
+    """_name(*parts), or with a number before its last part if an individual already has it."""
+    name = _name(*parts)
+    suffix = 1
+    while name in abox.individuals:
+        suffix += 1
+        name = _name(*parts[:-1], suffix, parts[-1])
+    return name
+
+
+# ----------------------------------------------------------
+# READ THE MANIFESTS
+# ----------------------------------------------------------
+def manifest_files(paths):
+    """The YAML files of paths: files as given, directories walked in name order."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for directory, subdirectories, names in os.walk(path):
+            subdirectories.sort()
+            for name in sorted(names):
+                if name.endswith(MANIFEST_EXTENSIONS):
+                    yield os.path.join(directory, name)
+
+
+def _load_file(path):
+    with open(path, "rb") as f:
+        return list(yaml.load_all(f, Loader=Loader))
+
+
+def manifest_documents(paths, jobs=1):
+    """
+    Yield (file, document) for every YAML document of paths, file by file.
+    With jobs > 1 the files are parsed by that many worker processes (most
+    of the time goes into building the Python objects of the YAML), and
+    still yielded in order.
+    """
+    files = list(manifest_files(paths))
+    with contextlib.ExitStack() as stack:
+        if jobs > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=jobs))
+            loaded = executor.map(_load_file, files, chunksize=64)
+        else:
+            loaded = map(_load_file, files)
+        for path, documents in zip(files, loaded):
+            for document in documents:
+                if isinstance(document, dict) and document.get("kind") == "List":
+                    for item in document.get("items") or ():
+                        yield path, item
+                elif document is not None:
+                    yield path, document
+
+
+# ----------------------------------------------------------
+# MAPPING
+# ----------------------------------------------------------
+class ManifestImporter:
+    """Maps manifests onto an Abox; call finish() once every document is added."""
+
+    def __init__(self):
+        self.abox = Abox()
+        self.volumes = {}           # PersistentVolume name -> individual
+        self.claim_refs = {}        # (namespace, claim) -> PersistentVolume name, from the volumes' claimRef
+        self.claims = {}            # (namespace, claim) -> PersistentVolumeClaim document
+        self.pending_binds = []     # (pod, namespace, claim, mount path unless it is the pod's)
+        self.services = {}          # Compose service -> container individual
+        self.stacks = []            # Swarm stack documents
+        self.compose_version = None
+
+    # ---- Shared individuals
+    def _catalogue(self, name):
+        if name not in self.abox.individuals:
+            self.abox.individual(name, *CATALOGUE[name])
+            if name in ("Docker_Compose", "Docker_Swarm"):
+                self.abox.links.append((self._catalogue("Docker"), "utilizes", name))
+        return name
+
+    def _env(self, name, key, value):
+        prop = "env_" + _UNSAFE.sub("_", str(key).lower())
+        self.abox.data_properties.setdefault(prop, None)
+        self.abox.data.append((name, prop, value))
+
+    def _namespace(self, namespace):
+        name = _name("Namespace", namespace)
+        if name not in self.abox.individuals:
+            self.abox.individual(name, "group_by")
+            self.abox.data.append((name, "namespace_name", namespace))
+            self.abox.links.append((self._catalogue("Kubernetes"), "generatesGroupBy", name))
+        return name
+
+    # ---- Docker Compose
+    def add_compose(self, document):
+        abox = self.abox
+        if document.get("version") and self.compose_version is None:
+            self.compose_version = str(document["version"])
+            abox.data.append((self._catalogue("Docker_Compose"), "version", self.compose_version))
+        self._catalogue("Docker_Compose")
+
+        for service_name, service in (document.get("services") or {}).items():
+            service = service or {}
+            name = abox.individual(_unused_name(abox, service_name, "Docker_Container"),
+                                   "minimal_deployment_unit", "#deployment_unit")
+            self.services.setdefault(service_name, name)
+
+            if service.get("container_name"):
+                abox.data.append((name, "container_name", service["container_name"]))
+            environment = service.get("environment") or {}
+            if isinstance(environment, list):
+                environment = dict(item.split("=", 1) if "=" in item else (item, "") for item in environment)
+            for key, value in environment.items():
+                self._env(name, key, "" if value is None else value)
+            for network in service.get("networks") or ():
+                abox.data.append((name, "networks", network))
+                network_individual = _name(network, "Network")
+                if network_individual not in abox.individuals:
+                    abox.individual(network_individual, "group_by")
+                    abox.data.append((network_individual, "network_name", network))
+                    abox.links.append((self._catalogue("Docker"), "generatesGroupBy", network_individual))
+                abox.links.append((network_individual, "includesRunningInstance", name))
+            if service.get("image"):
+                abox.data.append((name, "related_image", service["image"]))
+            if service.get("restart"):
+                abox.data.append((name, "restart_policy", service["restart"]))
+            for volume in service.get("volumes") or ():
+                if isinstance(volume, dict):
+                    source, target = volume.get("source"), volume.get("target")
+                    volume = f"{source}:{target}" if source else target
+                abox.data.append((name, "volumes", volume))
+                source = volume.split(":", 1)[0]
+                if ":" in volume and not source.startswith(("/", ".", "~")):
+                    # A named volume, not a bind mount
+                    volume_individual = _name(source, "Docker_Volume")
+                    if volume_individual not in abox.individuals:
+                        abox.individual(volume_individual, "#persistent")
+                        abox.data.append((volume_individual, "volume_name", source))
+                        abox.links.append((self._catalogue("Docker"), "generatesStorage", volume_individual))
+                    abox.links.append((name, "#binds", volume_individual))
+
+            abox.links.append((self._catalogue("Docker"), "#deploys", name))
+            abox.links.append((name, "#hostedBy", self._catalogue(HOST)))
+
+    # ---- Kubernetes
+    def add_deployment(self, document):
+        abox = self.abox
+        metadata = document.get("metadata") or {}
+        spec = document.get("spec") or {}
+        template = (spec.get("template") or {}).get("spec") or {}
+        deployment = metadata.get("name", "deployment")
+        namespace = metadata.get("namespace")
+        claims = {
+            volume["name"]: volume["persistentVolumeClaim"].get("claimName")
+            for volume in template.get("volumes") or () if volume.get("persistentVolumeClaim")
+        }
+
+        containers = template.get("containers") or ()
+        for container in containers:
+            # Deployments of the same name in other namespaces get numbered individuals
+            parts = (deployment, "Pod") if len(containers) == 1 else (deployment, container.get("name"), "Pod")
+            name = abox.individual(_unused_name(abox, *parts), "#deployment_unit")
+            if container.get("name"):
+                abox.data.append((name, "container_name", container["name"]))
+            abox.data.append((name, "deployment_name", deployment))
+            if container.get("image"):
+                abox.data.append((name, "related_image", container["image"]))
+            if namespace:
+                abox.data.append((name, "related_namespace", namespace))
+            if spec.get("replicas") is not None:
+                abox.data.append((name, "replicas", spec["replicas"]))
+            for variable in container.get("env") or ():
+                # valueFrom (secrets, config maps, fields) has no CADO counterpart
+                if "value" in variable:
+                    self._env(name, variable["name"], variable["value"])
+
+            mounted = False
+            for mount in container.get("volumeMounts") or ():
+                claim = claims.get(mount.get("name"))
+                if claim is None:
+                    continue
+                if not mounted:
+                    # The pod's mount path is the one of its first volume
+                    abox.data.append((name, "volume_mount_path", mount.get("mountPath")))
+                    self.pending_binds.append((name, namespace or "default", claim, None))
+                    mounted = True
+                else:
+                    self.pending_binds.append((name, namespace or "default", claim, mount.get("mountPath")))
+
+            abox.links.append((self._catalogue("Kubernetes"), "#deploys", name))
+            abox.links.append((name, "#hostedBy", self._catalogue(HOST)))
+            if namespace:
+                abox.links.append((self._namespace(namespace), "includesRunningInstance", name))
+
+    def add_persistent_volume(self, document):
+        metadata = document.get("metadata") or {}
+        spec = document.get("spec") or {}
+        volume = metadata.get("name", "volume")
+        name = self.abox.individual(_name(volume, "Kubernetes_Volume"), "#persistent")
+        self.volumes[volume] = name
+        self.abox.data.append((name, "volume_name", volume))
+        if (spec.get("hostPath") or {}).get("path"):
+            self.abox.data.append((name, "volume_host_path", spec["hostPath"]["path"]))
+        if (spec.get("capacity") or {}).get("storage"):
+            self.abox.data.append((name, "reserved_storage", spec["capacity"]["storage"]))
+        claim_ref = spec.get("claimRef") or {}
+        if claim_ref.get("name"):
+            self.claim_refs[(claim_ref.get("namespace") or "default", claim_ref["name"])] = volume
+
+    def add(self, document):
+        """Map one YAML document; documents of other kinds are counted in abox.skipped."""
+        if not isinstance(document, dict):
+            return
+        kind = document.get("kind")
+        if kind is None and document.get(STACK_MARKER[0]) == STACK_MARKER[1]:
+            # Mapped once every Compose file was read (see finish)
+            self.stacks.append(document)
+        elif kind is None and "services" in document:
+            self.add_compose(document)
+        elif kind == "Deployment":
+            self.add_deployment(document)
+        elif kind == "PersistentVolume":
+            self.add_persistent_volume(document)
+        elif kind == "PersistentVolumeClaim":
+            metadata = document.get("metadata") or {}
+            self.claims[(metadata.get("namespace") or "default", metadata.get("name"))] = document
+        elif kind == "Namespace":
+            self._namespace((document.get("metadata") or {}).get("name"))
+        else:
+            kind = kind or "unknown"
+            self.abox.skipped[kind] = self.abox.skipped.get(kind, 0) + 1
+
+    def _claim_volume(self, namespace, claim):
+        """The individual of the volume a claim resolves to, created from the claim if none does."""
+        document = self.claims.get((namespace, claim)) or {}
+        spec = document.get("spec") or {}
+        volume = spec.get("volumeName") or self.claim_refs.get((namespace, claim))
+        if volume is None and claim.endswith("c") and claim[:-1] in self.volumes:
+            volume = claim[:-1]
+        volume = volume or claim
+        if volume not in self.volumes:
+            name = self.volumes[volume] = self.abox.individual(_name(volume, "Kubernetes_Volume"), "#persistent")
+            self.abox.data.append((name, "volume_name", volume))
+            storage = ((spec.get("resources") or {}).get("requests") or {}).get("storage")
+            if storage:
+                self.abox.data.append((name, "reserved_storage", storage))
+        return self.volumes[volume]
+
+    def _add_stack(self, document):
+        services = document.get("services") or {}
+        missing = {name: service for name, service in services.items() if name not in self.services}
+        if missing:
+            self.add_compose(dict(document, services=missing))
+        swarm = self._catalogue("Docker_Swarm")
+        for service_name, service in services.items():
+            name = self.services[service_name]
+            self.abox.links.append((swarm, "#deploys", name))
+            replicas = ((service or {}).get("deploy") or {}).get("replicas")
+            if replicas is not None and replicas != 1:
+                self.abox.data.append((name, "replicas", str(replicas)))
+
+    def finish(self):
+        """Map the stack files and bind the pods to the volumes of their claims; return the Abox."""
+        for document in self.stacks:
+            self._add_stack(document)
+        self.stacks = []
+        for pod, namespace, claim, mount_path in self.pending_binds:
+            volume = self._claim_volume(namespace, claim)
+            self.abox.links.append((pod, "#binds", volume))
+            if mount_path:
+                # The other volumes are mounted at the path of their binding
+                self.abox.data.append((pod, "related_volume", f"{volume}:{mount_path}"))
+        self.pending_binds = []
+        return self.abox
+
+
+def import_manifests(paths, jobs=1):
+    """The Abox of every manifest in paths (files or directories)."""
+    importer = ManifestImporter()
+    for _, document in manifest_documents(paths, jobs):
+        importer.add(document)
+    return importer.finish()
+
+
+# ----------------------------------------------------------
+# OUTPUT
+# ----------------------------------------------------------
+def abox_lines(abox):
+    """The lines of the OWL/XML instance file of abox (see generate_abox.py)."""
+    yield from generate_abox.header_lines(abox.data_properties)
+    for name, classes in abox.individuals.items():
+        yield from generate_abox.declare(name, *classes)
+    for subject, prop, obj in abox.links:
+        yield generate_abox.link(subject, prop, obj)
+    for name, prop, value in abox.data:
+        yield generate_abox.data(name, prop, value)
+    yield generate_abox.FOOTER
+
+
+def write_abox(abox, path):
+    with open(path, "w", buffering=1 << 20) as f:
+        f.writelines(abox_lines(abox))
+
+
+def _iri(name):
+    # Resolved like the OWL/XML written by write_abox: "#x" against the
+    # ontology IRI, everything else against xml:base
+    return ABOX_IRI + name if name.startswith("#") else generate_abox.BASE_IRI + name
+
+
+def insert_abox(abox, world=None, tbox=None):
+    """
+    Put abox into world (default_world if None) as the ontology ABOX_IRI,
+    importing tbox (an ontology) if given, with one batched insert per
+    quadstore table in a single transaction; return the ontology.
+    """
+    from owlready2 import default_world, owl_data_property, owl_named_individual, rdf_type
+
+    world = world or default_world
+    onto = world.get_ontology(ABOX_IRI)
+    if tbox is not None:
+        onto.imported_ontologies.append(tbox)
+
+    storids = {}
+
+    def storid(name):
+        value = storids.get(name)
+        if value is None:
+            value = storids[name] = world._abbreviate(_iri(name))
+        return value
+
+    c = onto.graph.c
+    objs = [(c, storid(prop), rdf_type, owl_data_property) for prop in abox.data_properties]
+    for name, classes in abox.individuals.items():
+        objs.append((c, storid(name), rdf_type, owl_named_individual))
+        objs.extend((c, storid(name), rdf_type, storid(cls)) for cls in classes)
+    objs.extend((c, storid(s), storid(p), storid(o)) for s, p, o in abox.links)
+    datas = [(c, storid(s), storid(p), *world._to_rdf(str(value))) for s, p, value in abox.data]
+
+    db = world.graph.db
+    with db:    # one transaction, committed at the end
+        db.executemany("INSERT OR IGNORE INTO objs VALUES (?, ?, ?, ?)", objs)
+        db.executemany("INSERT OR IGNORE INTO datas VALUES (?, ?, ?, ?, ?)", datas)
+    world.graph.analyze()
+    return onto
+
+
+# ----------------------------------------------------------
+# CLI
+# ----------------------------------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import Docker Compose and Kubernetes manifests into a CADO ABox")
+    parser.add_argument("manifests", nargs="+", help="Manifest files, or directories of .yml/.yaml files")
+    parser.add_argument("--output", help="Instance file to write (OWL/XML)")
+    parser.add_argument("--classes", help="Class (TBox) file: load the import on top of it and check it")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes parsing the YAML (default: 1)")
+    args = parser.parse_args(argv)
+    if not args.output and not args.classes:
+        parser.error("give --output, --classes or both")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    abox = import_manifests(args.manifests, args.jobs)
+    print(f"Imported {len(abox.individuals)} individuals, {len(abox.data)} data and {len(abox.links)} "
+          f"object property assertions in {(time.perf_counter() - start) * 1000:.1f} ms")
+    for kind, count in sorted(abox.skipped.items()):
+        print(f" skipped {count} {kind} documents")
+
+    if args.output:
+        write_abox(abox, args.output)
+        print(f"Wrote {args.output}")
+
+    if args.classes:
+        # Imported here, so that writing the instance file does not load owlready2
+        import quick_validation
+        from owlready2 import default_world, get_ontology, onto_path
+
+        onto_path.append(os.path.dirname(os.path.abspath(args.classes)))
+        tbox = get_ontology(args.classes).load()
+        start = time.perf_counter()
+        insert_abox(abox, default_world, tbox)
+        print(f"Inserted into the quadstore in {(time.perf_counter() - start) * 1000:.1f} ms")
+        violations = quick_validation.validate(default_world)
+        quick_validation.print_violations(violations)
+        raise SystemExit(1 if any(v.severity == "error" for v in violations) else 0)
+
+
+if __name__ == "__main__":
+    main()
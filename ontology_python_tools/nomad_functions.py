@@ -0,0 +1,44 @@
+"""
+HashiCorp Nomad job of the Docker containers of a deployment plan.
+
+The job is written in Nomad's JSON job format (nomad job run -json): one task
+group per container, each running one task with the docker driver. Named
+volumes ("name:/mount/path") need docker volumes enabled on the clients.
+"""
+from docker_functions import container_replicas, service_name
+
+JOB_NAME = "cado"
+
+
+def generate_nomad_job(plan, job_name=JOB_NAME):
+    groups = {}
+
+    for container in plan.containers:
+        name = service_name(container)
+        config = {}
+        if container.image:
+            config["image"] = container.image
+        if container.networks:
+            # The docker driver attaches a task to one network
+            config["network_mode"] = container.networks[0]
+        if container.volumes:
+            config["volumes"] = list(container.volumes)
+
+        task = {"Name": name, "Driver": "docker", "Config": config}
+        if container.env:
+            task["Env"] = dict(container.env)
+
+        group = {"Name": name, "Count": container_replicas(container), "Tasks": [task]}
+        if container.restart == "no":
+            group["RestartPolicy"] = {"Attempts": 0, "Mode": "fail"}
+        groups[name] = group
+
+    return {
+        "Job": {
+            "ID": job_name,
+            "Name": job_name,
+            "Type": "service",
+            "Datacenters": ["dc1"],
+            "TaskGroups": list(groups.values()),
+        }
+    }
@@ -0,0 +1,178 @@
+"""
+On-disk cache of the parsed TBox/ABox.
+
+Without a cache directory the class (TBox) and instance (ABox) files are
+parsed into the in-memory default_world, as they always were. With one, the
+parsed quadstore is kept in owlready2 SQLite worlds named after the content
+hashes of the files: one per class file holding only the TBox, and one per
+class and instance file pair holding both:
+
+* the pair is cached    -> its world is reopened, nothing is parsed ("warm")
+* only the TBox is      -> the cached TBox is reused and only the ABox is
+                           imported on top of it ("abox")
+* no usable cache       -> both files are parsed and both worlds saved ("cold")
+
+Each run works on a private copy of the cached world (see _open_working_copy),
+so runs over different ABoxes do not evict each other's world and concurrent
+runs do not write the same file. Reasoning results are never written back:
+the worlds are only saved right after loading, so the validator's inferences
+stay out of the cache.
+"""
+import atexit
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from owlready2 import default_world, get_ontology, onto_path
+
+import profiling
+
+# The hashes and ontology IRIs of what the working copy open in default_world holds
+_working = {}
+
+
+def file_hash(path):
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_tbox(class_file):
+    with profiling.phase("tbox_load"):
+        return get_ontology(class_file).load()
+
+
+def file_iri(path):
+    """
+    The file:// IRI of path. owlready2 looks a plain file name up in onto_path
+    first, where another directory's file of the same name would be loaded.
+    """
+    return "file://" + os.path.abspath(path)
+
+
+def _load_abox(onto, instance_file):
+    with profiling.phase("abox_load"):
+        instances_onto = get_ontology(file_iri(instance_file)).load()
+        onto.imported_ontologies.append(instances_onto)
+    return instances_onto
+
+
+def _read_meta(world_file):
+    try:
+        with open(world_file + ".json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _open_working_copy(cache_dir, world_file=None):
+    """
+    Open a private copy of world_file (or a new quadstore) in default_world.
+    owlready2 locks its SQLite file for as long as the world is open, and the
+    validator adds its inferences to the world: other runs never see either.
+    """
+    fd, path = tempfile.mkstemp(prefix="work-", suffix=".sqlite3", dir=cache_dir)
+    os.close(fd)
+    atexit.register(_remove, path)
+    if world_file:
+        shutil.copyfile(world_file, path)
+    default_world.set_backend(filename=path)
+
+
+def _remove(path):
+    with contextlib.suppress(OSError):
+        os.remove(path)
+
+
+def _publish(world_file, meta):
+    """
+    Save the working world and copy it to world_file, then its meta: each is
+    replaced at once, so concurrent runs building the same file cannot mix
+    their writes and a reader never sees a partial one.
+    """
+    with profiling.phase("cache_save"):
+        default_world.save()
+        tmp = "%s.%d.tmp" % (world_file, os.getpid())
+        shutil.copyfile(default_world.filename, tmp)
+        os.replace(tmp, world_file)
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, world_file + ".json")
+
+
+def load_ontologies(class_file, instance_file, cache_dir=None):
+    """
+    Load the TBox and the ABox into default_world.
+
+    Returns (onto, instances_onto, status, seconds) where status is one of
+    "nocache", "cold", "warm" or "abox" (see the module docstring).
+    """
+    start = time.perf_counter()
+
+    # The ABox imports 'entity.owx' by file name: make its directory searchable.
+    ontology_dir = os.path.dirname(class_file)
+    if ontology_dir and ontology_dir not in onto_path:
+        onto_path.append(ontology_dir)
+
+    if not cache_dir:
+        onto = _load_tbox(class_file)
+        instances_onto = _load_abox(onto, instance_file)
+        return onto, instances_onto, "nocache", time.perf_counter() - start
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tbox_hash = file_hash(class_file)
+    abox_hash = file_hash(instance_file)
+    tbox_file = os.path.join(cache_dir, "tbox-%s.sqlite3" % tbox_hash)
+    world_file = os.path.join(cache_dir, "tbox-%s-abox-%s.sqlite3" % (tbox_hash, abox_hash))
+
+    if _working.get("tbox_hash") == tbox_hash:
+        # Called again in the same process (validator.Validator): the working copy is open already
+        meta = dict(_working)
+    else:
+        meta = _read_meta(world_file)
+        if meta is not None:
+            _open_working_copy(cache_dir, world_file)
+        else:
+            meta = _read_meta(tbox_file)
+            _open_working_copy(cache_dir, tbox_file if meta is not None else None)
+
+    if meta is None:
+        status = "cold"
+        onto = _load_tbox(class_file)
+        meta = {"tbox_hash": tbox_hash, "tbox_iri": onto.base_iri}
+        _publish(tbox_file, meta)
+        instances_onto = _load_abox(onto, instance_file)
+    else:
+        with profiling.phase("tbox_load"):
+            onto = default_world.get_ontology(meta["tbox_iri"]).load()
+        if meta.get("abox_hash") == abox_hash:
+            status = "warm"
+            with profiling.phase("abox_load"):
+                instances_onto = default_world.get_ontology(meta["abox_iri"]).load()
+        else:
+            status = "abox"
+            if "abox_iri" in meta:
+                stale = default_world.get_ontology(meta["abox_iri"])
+                if stale in onto.imported_ontologies:
+                    onto.imported_ontologies.remove(stale)
+                stale.destroy()
+            instances_onto = _load_abox(onto, instance_file)
+
+    meta = {
+        "tbox_hash": tbox_hash,
+        "abox_hash": abox_hash,
+        "tbox_iri": onto.base_iri,
+        "abox_iri": instances_onto.base_iri,
+    }
+    if status != "warm":
+        _publish(world_file, meta)
+    _working.update(meta)
+
+    return onto, instances_onto, status, time.perf_counter() - start
@@ -0,0 +1,123 @@
+"""
+Bulk indexes over the owlready2 quadstore.
+
+The emitters used to probe every instance with getattr() for every data
+property declared in the TBox, which costs instances x properties and grows
+with every env_* property we model. The helpers below read the asserted
+triples straight out of the quadstore in one query and group them per
+instance, so the cost follows the number of asserted triples instead.
+
+The same goes for instance discovery: class memberships and object property
+links are read once from the rdf:type / object triples, instead of guessing
+types from substrings of the individuals' names.
+"""
+from owlready2 import default_world, rdf_type, rdfs_subclassof
+
+from ontology_names import INDEXED_CLASSES, class_closure, local_name
+
+# Built-in vocabularies, skipped when collecting object property links.
+_BUILTIN_PREFIXES = (
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "http://www.w3.org/2000/01/rdf-schema#",
+    "http://www.w3.org/2002/07/owl#",
+)
+
+
+# ----------------------------------------------------------
+# DATA PROPERTY INDEX
+# ----------------------------------------------------------
+def build_data_property_index(world=default_world):
+    """
+    Build {instance IRI: {property name: [values]}} from the asserted data
+    property triples of every ontology loaded in `world`.
+
+    Property names are the local names used in the ontology (e.g.
+    "related_image", "env_mysql_database") and, per instance, keep the order
+    in which the properties are declared so the generated files do not
+    depend on the order of the assertions in the ABox.
+    """
+    data_props = {}
+    for rank, prop in enumerate(world.data_properties()):
+        data_props[prop.storid] = (rank, prop.name)
+
+    index = {}
+    iris = {}
+    for s, p, o, d in world.graph.execute("SELECT s, p, o, d FROM datas"):
+        prop = data_props.get(p)
+        if prop is None or s < 0:
+            continue  # annotations, blank nodes
+        iri = iris.get(s)
+        if iri is None:
+            iri = iris[s] = world._unabbreviate(s)
+        index.setdefault(iri, {}).setdefault(prop, []).append(world._to_python(o, d))
+
+    return {
+        iri: {name: values for (rank, name), values in sorted(props.items())}
+        for iri, props in index.items()
+    }
+
+
+# ----------------------------------------------------------
+# CLASS MEMBERSHIP INDEX
+# ----------------------------------------------------------
+def build_class_index(world=default_world, class_names=INDEXED_CLASSES):
+    """
+    Build {class name: [instance IRIs]} for each of `class_names`, from the
+    rdf:type triples of every ontology loaded in `world` plus the subclass
+    closure of each class. Instances are listed in declaration order.
+
+    Classes are matched by local name: instances.owl writes '#deployment_unit'
+    and owlready2 resolves it against the ABox IRI, so those individuals are
+    typed '.../individuals#deployment_unit' instead of the TBox class.
+    """
+    subclasses = {}
+    for s, o in world.graph.execute("SELECT s, o FROM objs WHERE p=?", (rdfs_subclassof,)):
+        if s > 0 and o > 0:
+            subclasses.setdefault(local_name(world._unabbreviate(o)), set()).add(
+                local_name(world._unabbreviate(s)))
+
+    closure = class_closure(subclasses, class_names)
+
+    members = {class_name: {} for class_name in class_names}
+    type_names = {}
+    for s, o in world.graph.execute("SELECT s, o FROM objs WHERE p=? ORDER BY s", (rdf_type,)):
+        if s < 0 or o < 0:
+            continue
+        name = type_names.get(o)
+        if name is None:
+            name = type_names[o] = local_name(world._unabbreviate(o))
+        for class_name in closure.get(name, ()):
+            members[class_name].setdefault(s, None)
+
+    return {
+        class_name: [world._unabbreviate(s) for s in storids]
+        for class_name, storids in members.items()
+    }
+
+
+# ----------------------------------------------------------
+# OBJECT PROPERTY INDEX
+# ----------------------------------------------------------
+def build_object_property_index(world=default_world):
+    """
+    Build {subject IRI: {property name: [object IRIs]}} from the asserted
+    object property triples (rdf/rdfs/owl vocabulary excluded). Property names
+    are local names, so '#binds' is found as "binds" whatever IRI it got.
+    """
+    props = {}
+    iris = {}
+    index = {}
+    for s, p, o in world.graph.execute("SELECT s, p, o FROM objs"):
+        if s < 0 or o < 0:
+            continue
+        prop = props.get(p)
+        if prop is None:
+            prop_iri = world._unabbreviate(p)
+            prop = props[p] = "" if prop_iri.startswith(_BUILTIN_PREFIXES) else local_name(prop_iri)
+        if not prop:
+            continue
+        for storid in (s, o):
+            if storid not in iris:
+                iris[storid] = world._unabbreviate(storid)
+        index.setdefault(iris[s], {}).setdefault(prop, []).append(iris[o])
+    return index
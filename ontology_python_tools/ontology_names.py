@@ -0,0 +1,32 @@
+"""
+Naming helpers shared by every reader of CADO ontologies.
+
+Nothing here imports owlready2, so the streaming reader, the deployment plan
+and the emitters can run from a snapshot (see ontology_snapshot.py) without
+loading it.
+"""
+
+# Classes whose members the converter looks up (subclasses included).
+INDEXED_CLASSES = ("deployment_unit", "minimal_deployment_unit", "persistent", "platform")
+
+
+def local_name(iri):
+    """Return the last fragment/path segment of an IRI ("2024/MySQL_Pod" -> "MySQL_Pod")."""
+    return iri.rsplit("#", 1)[-1].rsplit("/", 1)[-1]
+
+
+def class_closure(subclasses, class_names=INDEXED_CLASSES):
+    """
+    Given {class name: {direct subclass names}}, return {class name: {indexed
+    classes it belongs to}} for every class below one of `class_names`.
+    """
+    closure = {}
+    for class_name in class_names:
+        pending = [class_name]
+        while pending:
+            name = pending.pop()
+            if class_name in closure.setdefault(name, set()):
+                continue
+            closure[name].add(class_name)
+            pending.extend(subclasses.get(name, ()))
+    return closure
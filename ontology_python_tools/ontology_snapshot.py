@@ -0,0 +1,316 @@
+"""
+Compiled ontology snapshots.
+
+Read-only consumers of an ABox (emitters in CI, queries) only need the three
+ontology indexes the converter builds (see ontology_index.py): class
+memberships, data property values and object property links. Parsing the
+OWL/XML through owlready2 to get them again on every start is wasted work.
+write_snapshot() stores them in a compact binary file instead, and
+Snapshot memory-maps it back: opening one only reads a header, string()
+decodes single strings on demand and indexes() rebuilds the three indexes
+in one pass over the arrays. Nothing here imports owlready2,
+and neither do the emitters, so generating files from a snapshot does not
+load it at all:
+
+    python converter.py --classes entity.owx --instances instances.owl --export-snapshot abox.cadosnap
+    python ontology_snapshot.py --snapshot abox.cadosnap --output-dir generated
+
+Layout (little-endian): the magic, the format version and a table of
+(offset, item count) for every section, then the sections, each aligned on
+8 bytes. Every string (IRIs, class and property names, string values) is
+stored once, in a table of UTF-8 offsets and bytes; the sections refer to
+strings and instances by their position:
+
+    string_offsets      uint32  N + 1 offsets into string_bytes
+    string_bytes        bytes   UTF-8 of every string, back to back
+    instances           uint32  string of each instance IRI
+    classes             uint32  string of each indexed class name
+    class_offsets       uint32  members of class i: class_members[class_offsets[i]:class_offsets[i + 1]]
+    class_members       uint32  instances
+    data_subjects       uint32  instance of each data property value
+    data_properties     uint32  string of its property name
+    data_kinds          uint8   VALUE_KINDS of its value
+    data_values         int64   the string, the integer, the bits of the float, 0/1, or the
+                                string of the decimal digits of an integer outside int64
+    link_subjects       uint32  instance of each object property link
+    link_properties     uint32  string of its property name
+    link_objects        uint32  instance it points to
+
+The values and links are stored in the order of the indexes, so the indexes
+read back, and the files generated from them, are the same.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import emitters
+import generated_output
+import profiling
+
+MAGIC = b"CADOSNAP"
+FORMAT_VERSION = 2
+
+# (name, array type code)
+SECTIONS = (
+    ("string_offsets", "I"),
+    ("string_bytes", "B"),
+    ("instances", "I"),
+    ("classes", "I"),
+    ("class_offsets", "I"),
+    ("class_members", "I"),
+    ("data_subjects", "I"),
+    ("data_properties", "I"),
+    ("data_kinds", "B"),
+    ("data_values", "q"),
+    ("link_subjects", "I"),
+    ("link_properties", "I"),
+    ("link_objects", "I"),
+)
+_HEADER = struct.Struct("<8sI%dQ" % (2 * len(SECTIONS)))
+
+# Kinds of data property values
+STRING, INTEGER, FLOAT, BOOLEAN, BIG_INTEGER = range(5)
+VALUE_KINDS = (STRING, INTEGER, FLOAT, BOOLEAN, BIG_INTEGER)
+_INT64 = (-2**63, 2**63 - 1)
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+# ----------------------------------------------------------
+# WRITE
+# ----------------------------------------------------------
+def _float_bits(value):
+    return struct.unpack("<q", struct.pack("<d", value))[0]
+
+
+def write_snapshot(path, class_index, data_index, link_index):
+    """Write the snapshot of the three ontology indexes to path; return its size in bytes."""
+    strings = {}
+
+    def string(text):
+        sid = strings.get(text)
+        if sid is None:
+            sid = strings[text] = len(strings)
+        return sid
+
+    instances = {}
+
+    def instance(iri):
+        index = instances.get(iri)
+        if index is None:
+            index = instances[iri] = len(instances)
+        return index
+
+    sections = {name: array(code) for name, code in SECTIONS}
+
+    sections["class_offsets"].append(0)
+    for class_name, members in class_index.items():
+        sections["classes"].append(string(class_name))
+        sections["class_members"].extend(instance(iri) for iri in members)
+        sections["class_offsets"].append(len(sections["class_members"]))
+
+    for iri, props in data_index.items():
+        subject = instance(iri)
+        for prop, values in props.items():
+            prop = string(prop)
+            for value in values:
+                if isinstance(value, bool):
+                    kind, value = BOOLEAN, int(value)
+                elif isinstance(value, int) and _INT64[0] <= value <= _INT64[1]:
+                    kind = INTEGER
+                elif isinstance(value, int):
+                    kind, value = BIG_INTEGER, string(str(value))
+                elif isinstance(value, float):
+                    kind, value = FLOAT, _float_bits(value)
+                else:
+                    # Anything else (dates, decimals, ...) is kept as its text
+                    kind, value = STRING, string(str(value))
+                sections["data_subjects"].append(subject)
+                sections["data_properties"].append(prop)
+                sections["data_kinds"].append(kind)
+                sections["data_values"].append(value)
+
+    for iri, props in link_index.items():
+        subject = instance(iri)
+        for prop, objects in props.items():
+            prop = string(prop)
+            for obj in objects:
+                sections["link_subjects"].append(subject)
+                sections["link_properties"].append(prop)
+                sections["link_objects"].append(instance(obj))
+
+    # Instance IRIs last, so that every instance is known
+    sections["instances"].extend(string(iri) for iri in instances)
+    offset = 0
+    sections["string_offsets"].append(0)
+    for text in strings:
+        encoded = text.encode("utf-8")
+        sections["string_bytes"].frombytes(encoded)
+        offset += len(encoded)
+        sections["string_offsets"].append(offset)
+
+    table = []
+    position = _HEADER.size
+    chunks = []
+    for name, _ in SECTIONS:
+        data = sections[name]
+        if not _LITTLE_ENDIAN:
+            data.byteswap()
+        padding = -position % 8
+        chunks.append(b"\0" * padding)
+        position += padding
+        table += [position, len(data)]
+        chunks.append(data.tobytes())
+        position += len(data) * data.itemsize
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, *table))
+        f.writelines(chunks)
+    return position
+
+
+# ----------------------------------------------------------
+# READ
+# ----------------------------------------------------------
+class Snapshot:
+    """
+    A snapshot file, memory-mapped. Every section is an attribute (a
+    memoryview of the file, or an array on big-endian machines). Close it
+    (or use it as a context manager) before the file is replaced.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _HEADER.size:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a CADO snapshot")
+        magic, version, *table = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a CADO snapshot")
+        if version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} has snapshot format {version}, this version reads format {FORMAT_VERSION}")
+
+        self.path = path
+        self._views = []
+        view = memoryview(self._mmap)
+        for i, (name, code) in enumerate(SECTIONS):
+            offset, count = table[2 * i], table[2 * i + 1]
+            data = view[offset:offset + count * array(code).itemsize].cast(code)
+            if not _LITTLE_ENDIAN:
+                data = array(code, data)
+                data.byteswap()
+            self._views.append(data)
+            setattr(self, name, data)
+        self._views.append(view)
+        self._strings = {}
+
+    def close(self):
+        for view in self._views:
+            if isinstance(view, memoryview):
+                view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def string(self, sid):
+        """The string numbered sid, decoded on first use."""
+        text = self._strings.get(sid)
+        if text is None:
+            start, end = self.string_offsets[sid], self.string_offsets[sid + 1]
+            text = self._strings[sid] = str(self.string_bytes[start:end], "utf-8")
+        return text
+
+    def iri(self, instance):
+        return self.string(self.instances[instance])
+
+    def value(self, kind, value):
+        if kind == STRING:
+            return self.string(value)
+        if kind == INTEGER:
+            return value
+        if kind == FLOAT:
+            return struct.unpack("<d", struct.pack("<q", value))[0]
+        if kind == BIG_INTEGER:
+            return int(self.string(value))
+        return bool(value)
+
+    def strings(self):
+        """Every string, decoded at once."""
+        data = bytes(self.string_bytes)
+        offsets = self.string_offsets.tolist()
+        return [str(data[start:end], "utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    def indexes(self):
+        """The (class_index, data_index, link_index) the snapshot was written from."""
+        # Lists of Python objects: indexing memoryviews item by item is slower
+        strings = self.strings()
+        iris = [strings[sid] for sid in self.instances.tolist()]
+        offsets = self.class_offsets.tolist()
+        members = self.class_members.tolist()
+        class_index = {
+            strings[sid]: [iris[member] for member in members[offsets[i]:offsets[i + 1]]]
+            for i, sid in enumerate(self.classes.tolist())
+        }
+
+        data_index = {}
+        for subject, prop, kind, value in zip(self.data_subjects.tolist(), self.data_properties.tolist(),
+                                              self.data_kinds.tolist(), self.data_values.tolist()):
+            data_index.setdefault(iris[subject], {}).setdefault(strings[prop], []).append(
+                strings[value] if kind == STRING else self.value(kind, value))
+
+        link_index = {}
+        for subject, prop, obj in zip(self.link_subjects.tolist(), self.link_properties.tolist(),
+                                      self.link_objects.tolist()):
+            link_index.setdefault(iris[subject], {}).setdefault(strings[prop], []).append(iris[obj])
+        return class_index, data_index, link_index
+
+
+def read_indexes(path):
+    """The (class_index, data_index, link_index) of a snapshot file."""
+    with Snapshot(path) as snapshot:
+        return snapshot.indexes()
+
+
+# ----------------------------------------------------------
+# GENERATE FROM A SNAPSHOT
+# ----------------------------------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the deployment files of a snapshot, without owlready2")
+    parser.add_argument("--snapshot", required=True, help="Snapshot file (converter.py --export-snapshot)")
+    parser.add_argument("--output-dir", default=emitters.DEFAULT_OUTPUT_DIR, help="Where generated files go")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rewrite the generated files whose content changed")
+    parser.add_argument("--bundle", choices=generated_output.BUNDLE_MODES,
+                        help="Write the Kubernetes resources as one multi-document file, or one per namespace")
+    parser.add_argument("--shard-namespaces", action="store_true",
+                        help="Write the Kubernetes resources of each namespace to its own sub-directory, in parallel")
+    parser.add_argument("--namespace", action="append",
+                        help="Only regenerate this namespace (repeatable; implies --shard-namespaces)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(),
+                        help="Worker processes for --shard-namespaces (default: number of CPUs)")
+    profiling.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with profiling.profiled("snapshot", args):
+        with profiling.phase("snapshot_load"):
+            indexes = read_indexes(args.snapshot)
+        emitters.convert(*indexes, args.output_dir, args.incremental, args.bundle, args.shard_namespaces, args.jobs,
+                         args.namespace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Queries over a deployment plan.
+
+"Which pods use image X", "which deployments mount volume Y", "what lives in
+namespace Z": build_plan_index() walks the plan once and builds inverted
+indexes from image, namespace, volume, network and host to the deployment
+units (pods and Docker containers), so each lookup is one dict access
+whatever the size of the ABox. The plan comes from a loaded ABox or from a
+snapshot (see ontology_snapshot.py), which answers without owlready2:
+
+    python plan_query.py --classes entity.owx --instances instances.owl --image mysql:5.7
+    python plan_query.py --snapshot abox.cadosnap --namespace wordpress-namespace --volume wp-pv
+    python plan_query.py --snapshot abox.cadosnap --list host
+
+Several filters return the units matching all of them.
+"""
+import argparse
+from dataclasses import dataclass, field
+
+import deployment_plan
+import ontology_snapshot
+from ontology_names import local_name
+
+KEYS = ("image", "namespace", "volume", "network", "host")
+
+
+@dataclass(slots=True)
+class PlanIndex:
+    """{key: {value: [Container records]}} for every key of KEYS."""
+    plan: deployment_plan.DeploymentPlan
+    index: dict = field(default_factory=lambda: {key: {} for key in KEYS})
+
+    def find(self, key, value):
+        """The deployment units whose key is value, in plan order."""
+        return self.index[key].get(value, [])
+
+    def values(self, key):
+        """{value: number of deployment units} of key."""
+        return {value: len(units) for value, units in self.index[key].items()}
+
+    def match(self, **filters):
+        """The deployment units matching every key=value filter."""
+        units = None
+        for key, value in filters.items():
+            found = self.find(key, value)
+            if units is None:
+                units = found
+            else:
+                iris = {unit.iri for unit in found}
+                units = [unit for unit in units if unit.iri in iris]
+        return units or []
+
+
+def _image_names(image):
+    """An image reference and, if it has one, the reference without its tag or digest."""
+    names = [image]
+    repository = image.split("@", 1)[0]
+    if repository.rfind(":") > repository.rfind("/"):
+        repository = repository.rsplit(":", 1)[0]
+    if repository != image:
+        names.append(repository)
+    return names
+
+
+def build_plan_index(plan):
+    """Index every pod and Docker container of the plan by image, namespace, volume, network and host."""
+    plan_index = PlanIndex(plan)
+    index = plan_index.index
+
+    def add(key, value, unit):
+        units = index[key].setdefault(value, [])
+        # A unit is listed once per value, even if it names it twice
+        if not units or units[-1] is not unit:
+            units.append(unit)
+
+    for unit in plan.pods:
+        add("namespace", unit.namespace or "default", unit)
+        for iri in unit.binds:
+            volume = plan.volumes.get(iri)
+            add("volume", local_name(iri), unit)
+            if volume is not None and volume.volume_name:
+                add("volume", volume.volume_name, unit)
+
+    for unit in plan.containers:
+        for network in unit.networks:
+            add("network", network, unit)
+        for volume in unit.volumes:
+            # Compose style "name:/mount/path"
+            add("volume", volume.split(":", 1)[0], unit)
+
+    for unit in plan.pods + plan.containers:
+        if unit.image:
+            for name in _image_names(unit.image):
+                add("image", name, unit)
+        for iri in unit.hosts:
+            add("host", local_name(iri), unit)
+    return plan_index
+
+
+# ----------------------------------------------------------
+# CLI
+# ----------------------------------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Query the deployment plan of an ABox")
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument("--instances", help="Path to the instance (ABox) OWL file (needs --classes)")
+    inputs.add_argument("--snapshot", help="Snapshot file (converter.py --export-snapshot), read without owlready2")
+    parser.add_argument("--classes", help="Path to the class (TBox) OWL file")
+    parser.add_argument("--cache-dir", help="Directory of the parsed-ontology cache (disabled if omitted)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream the instance file instead of loading it into owlready2 (OWL/XML only)")
+    for key in KEYS:
+        parser.add_argument("--" + key, help=f"Deployment units with this {key}")
+    parser.add_argument("--list", choices=KEYS, help="List the values of a key and their number of units")
+    args = parser.parse_args(argv)
+    if args.instances and not args.classes:
+        parser.error("--instances needs --classes")
+    if not args.list and not any(getattr(args, key) for key in KEYS):
+        parser.error("give --list or at least one of " + ", ".join("--" + key for key in KEYS))
+    return args
+
+
+def load_plan(args):
+    if args.snapshot:
+        indexes = ontology_snapshot.read_indexes(args.snapshot)
+    else:
+        # Imported here, so that queries on a snapshot do not load owlready2
+        import converter
+        indexes = converter.load_indexes(args.classes, args.instances, args.cache_dir, args.stream)
+    return deployment_plan.build_deployment_plan(*indexes)
+
+
+def print_units(units, plan):
+    pods = {pod.iri for pod in plan.pods}
+    for unit in units:
+        kind = "pod" if unit.iri in pods else "container"
+        print(f" {kind:<9} {unit.name:<30} image={unit.image or '-'} "
+              f"deployment={unit.deployment_name or '-'} namespace={unit.namespace or '-'}")
+    print(f"{len(units)} deployment units")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    plan_index = build_plan_index(load_plan(args))
+
+    if args.list:
+        print(f"\n{args.list} values:")
+        for value, count in sorted(plan_index.values(args.list).items()):
+            print(f" {value:<40} {count}")
+        return
+
+    filters = {key: getattr(args, key) for key in KEYS if getattr(args, key)}
+    print("\n" + ", ".join(f"{key}={value}" for key, value in filters.items()) + ":")
+    print_units(plan_index.match(**filters), plan_index.plan)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Per-phase profiling for the converter and the validator (--profile).
+
+The tools mark their phases with `with profiling.phase("abox_load"):`, which
+costs nothing until a profile is started. While one is, every phase records
+its wall time and the peak of the memory Python allocated during it
+(tracemalloc), and the phases named with --cprofile also run under cProfile
+(one .prof file each, next to the report, and their top functions in it).
+The report is printed as a table and written as JSON.
+
+The same flags also set the log level: the per-instance listings of the
+tools are logged at DEBUG, so they are neither printed nor even built unless
+--log-level DEBUG asks for them.
+"""
+import contextlib
+import cProfile
+import json
+import logging
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING")
+
+_profile = None     # the active Profile, if any
+
+
+class Profile:
+    def __init__(self, cprofile=()):
+        self.cprofile = set(cprofile)
+        self.phases = []            # report entries, in the order the phases ended
+        self._stack = []            # [entry, memory at start, running peak] of the open phases
+        self._profiling = False     # cProfile cannot run two profilers at once
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self.start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        entry = {"phase": name}
+        current, peak = tracemalloc.get_traced_memory()
+        # Keep the enclosing phase's peak before resetting it for this one
+        if self._stack:
+            self._stack[-1][2] = max(self._stack[-1][2], peak)
+        tracemalloc.reset_peak()
+        frame = [entry, current, current]
+        self._stack.append(frame)
+
+        profiler = None
+        if not self._profiling and ("all" in self.cprofile or name in self.cprofile):
+            profiler = cProfile.Profile()
+            self._profiling = True
+        start = time.perf_counter()
+        try:
+            if profiler:
+                profiler.enable()
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                self._profiling = False
+                entry["_profiler"] = profiler
+            entry["seconds"] = time.perf_counter() - start
+            self._stack.pop()
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(frame[2], peak)
+            entry["peak_bytes"] = peak - frame[1]
+            entry["allocated_bytes"] = current - frame[1]
+            if self._stack:
+                self._stack[-1][2] = max(self._stack[-1][2], peak)
+            self.phases.append(entry)
+
+    def report(self, tool, report_file=None):
+        """The JSON report; the cProfile stats are saved next to report_file."""
+        total = time.perf_counter() - self.start
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        base = os.path.splitext(report_file)[0] if report_file else tool
+        for n, entry in enumerate(self.phases):
+            profiler = entry.pop("_profiler", None)
+            if profiler is None:
+                continue
+            entry["cprofile"] = "%s-%d-%s.prof" % (base, n, entry["phase"])
+            profiler.dump_stats(entry["cprofile"])
+            stats = pstats.Stats(profiler).sort_stats("cumulative")
+            entry["cprofile_top"] = [
+                {"function": pstats.func_std_string(func), "calls": calls, "cumulative_seconds": cumulative}
+                for func, (_, calls, _, cumulative, _) in
+                sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:10]
+            ]
+        return {"tool": tool, "argv": sys.argv[1:], "total_seconds": total,
+                "traced_peak_bytes": peak, "phases": self.phases}
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Record the enclosed code as phase name of the active profile, if there is one."""
+    if _profile is None:
+        yield
+    else:
+        with _profile.phase(name):
+            yield
+
+
+def active():
+    """Whether a profile is being recorded (its phases must not run in several threads at once)."""
+    return _profile is not None
+
+
+def add_arguments(parser):
+    parser.add_argument("--profile", metavar="REPORT",
+                        help="Record wall time and peak memory of every phase and write them as JSON to REPORT")
+    parser.add_argument("--cprofile", metavar="PHASES",
+                        help="With --profile, also run these phases (comma-separated, or 'all') under cProfile")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="INFO",
+                        help="DEBUG also lists every instance and its data assertions")
+
+
+def print_report(report):
+    print("\nProfile (wall time, peak / net memory allocated by Python):")
+    for entry in report["phases"]:
+        print("  %-24s %10.1f ms %10.1f MiB %10.1f MiB%s" % (
+            entry["phase"], entry["seconds"] * 1000, entry["peak_bytes"] / 2**20,
+            entry["allocated_bytes"] / 2**20, "  -> " + entry["cprofile"] if "cprofile" in entry else ""))
+    print("  %-24s %10.1f ms %10.1f MiB" % ("total", report["total_seconds"] * 1000,
+                                          report["traced_peak_bytes"] / 2**20))
+
+
+@contextlib.contextmanager
+def profiled(tool, args):
+    """
+    Set the log level from args and, with --profile, profile the enclosed run;
+    the report is printed and written when it ends (also on SystemExit).
+    """
+    global _profile
+    logging.basicConfig(level=args.log_level, format="%(message)s", stream=sys.stdout)
+    if not args.profile:
+        yield
+        return
+
+    _profile = Profile(args.cprofile.split(",") if args.cprofile else ())
+    try:
+        yield
+    finally:
+        report = _profile.report(tool, args.profile)
+        _profile = None
+        print_report(report)
+        with open(args.profile, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Profile written to {args.profile}")
@@ -0,0 +1,369 @@
+"""
+Quick validation without a reasoner.
+
+The full validator starts HermiT in a JVM and then evaluates every class
+restriction on every instance from Python. This module checks the rules that
+matter for generating deployment files straight from the quadstore instead:
+the asserted rdf:type, subclass, object and data property triples are each
+read in one bulk query, and every rule is then evaluated against those
+indexes, so it runs in a fraction of the time and without Java.
+
+The rules come from two places:
+
+* the TBox: rdfs:domain / rdfs:range of properties, existential and
+  cardinality restrictions in SubClassOf axioms, and disjoint classes;
+* CADO_RULES / CADO_PROPERTY_RULES below: what the converter relies on but
+  entity.owx does not state (a deployment unit has exactly one related_image
+  and is hostedBy a host, deploys links a platform to a deployment unit, ...).
+
+Only asserted facts are used (no inference besides the subclass closure), so
+this is a gate for every commit while the reasoner stays the full check.
+Classes and properties are matched by local name, like in ontology_index.py.
+"""
+import datetime
+import itertools
+from dataclasses import dataclass
+
+from owlready2 import default_world, locstr, normstr, plainliteral, rdf_domain, rdf_range, rdf_type, rdfs_subclassof
+
+from ontology_names import local_name
+
+_OWL = "http://www.w3.org/2002/07/owl#"
+_RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+_XSD = "http://www.w3.org/2001/XMLSchema#"
+_BUILTIN_PREFIXES = (
+    _RDF,
+    "http://www.w3.org/2000/01/rdf-schema#",
+    _OWL,
+)
+
+# Range datatype IRI -> Python type of its values, as owlready2 parses them
+DATATYPES = {
+    **{_XSD + name: int for name in (
+        "integer", "byte", "short", "int", "long", "unsignedByte", "unsignedShort", "unsignedInt",
+        "unsignedLong", "negativeInteger", "nonNegativeInteger", "positiveInteger")},
+    **{_XSD + name: float for name in ("decimal", "double", "float")},
+    **{_XSD + name: normstr for name in (
+        "normalizedString", "anyURI", "Name", "NCName", "language", "token", "NMTOKEN", "ID", "IDREF", "ENTITY")},
+    _OWL + "real": float,
+    _XSD + "boolean": bool,
+    **{_XSD + name: str for name in ("string", "QName", "NOTATION")},
+    _RDF + "PlainLiteral": plainliteral,
+    _RDF + "langString": locstr,
+    _XSD + "dateTime": datetime.datetime,
+    _XSD + "date": datetime.date,
+    _XSD + "time": datetime.time,
+    _XSD + "duration": datetime.timedelta,
+    _XSD + "base64Binary": bytes,
+}
+
+# Cardinality predicates of restrictions -> (sets the minimum, sets the maximum)
+_CARDINALITIES = {
+    "cardinality": (True, True), "qualifiedCardinality": (True, True),
+    "minCardinality": (True, False), "minQualifiedCardinality": (True, False),
+    "maxCardinality": (False, True), "maxQualifiedCardinality": (False, True),
+}
+
+
+@dataclass(slots=True)
+class Violation:
+    rule: str                   # "cardinality", "domain", "range", "disjoint"
+    individual: str             # IRI of the offending individual
+    property: str = None        # local name of the property concerned
+    value: object = None        # offending value (IRI or literal), or the count
+    severity: str = "error"     # "error" or "warning"
+    message: str = ""
+
+    def __str__(self):
+        name = local_name(self.individual or "")
+        return f"{name}: {self.message}" if name else self.message
+
+
+@dataclass(slots=True, frozen=True)
+class CardinalityRule:
+    """Members of cls have between min and max values of prop (in on_class, if given)."""
+    cls: str
+    prop: str
+    min: int = 0
+    max: int = None
+    on_class: str = None
+    inverse: bool = False       # count the subjects pointing to the member instead
+    severity: str = "error"
+    source: str = "CADO"
+
+
+@dataclass(slots=True, frozen=True)
+class PropertyRule:
+    """
+    Subjects of prop belong to one of the domain classes, and its values to
+    one of the range classes (object properties) or of the Python types of
+    the range datatypes (data properties).
+    """
+    prop: str
+    domain: tuple = ()
+    range: tuple = ()
+    datatypes: tuple = ()
+    severity: str = "error"
+    source: str = "CADO"
+
+
+CADO_RULES = (
+    CardinalityRule("deployment_unit", "related_image", min=1, max=1),
+    CardinalityRule("deployment_unit", "hostedBy", min=1, on_class="hosts"),
+    CardinalityRule("deployment_unit", "deploys", min=1, on_class="platform", inverse=True, severity="warning"),
+)
+
+CADO_PROPERTY_RULES = (
+    PropertyRule("deploys", domain=("platform", "runtime_environment"), range=("deployment_unit",)),
+    PropertyRule("binds", domain=("deployment_unit",), range=("storage",)),
+    PropertyRule("hostedBy", domain=("deployment_unit",), range=("hosts",)),
+)
+
+
+# ----------------------------------------------------------
+# READING THE QUADSTORE
+# ----------------------------------------------------------
+class Facts:
+    """The asserted triples of a world, indexed by local names, read in two queries."""
+
+    def __init__(self, world=default_world):
+        self.world = world
+        names = {}
+
+        def name(storid):
+            n = names.get(storid)
+            if n is None:
+                n = names[storid] = local_name(world._unabbreviate(storid))
+            return n
+
+        self.iri = world._unabbreviate
+        self.name = name
+
+        # Subclass axioms and the blank nodes of restrictions
+        self.superclasses = {}          # class name -> {direct superclass names}
+        self.restrictions = {}          # class name -> [restriction blank nodes]
+        self.blank = {}                 # blank node -> {predicate IRI: object}
+        self.property_axioms = []       # (property name, "domain"/"range", class name or datatype storid)
+        self.disjoint = []              # (class name, class name)
+        self.types = {}                 # individual storid -> {class names, with superclasses}
+        self.objects = {}               # subject storid -> {property name: [object storids]}
+        self.subjects = {}              # object storid -> {property name: [subject storids]}
+        self.datas = {}                 # subject storid -> {property name: [(value, datatype)]}
+
+        disjoint_with = world._abbreviate(_OWL + "disjointWith")
+        self.all_disjoint_classes = world._abbreviate(_OWL + "AllDisjointClasses")
+        direct_types = []
+        for s, p, o in world.graph.execute("SELECT s, p, o FROM objs"):
+            if s < 0:
+                self.blank.setdefault(s, {})[self.iri(p)] = o
+            elif p == rdfs_subclassof:
+                if o > 0:
+                    self.superclasses.setdefault(name(s), set()).add(name(o))
+                else:
+                    self.restrictions.setdefault(name(s), []).append(o)
+            elif p == rdf_type:
+                if o > 0:
+                    direct_types.append((s, name(o)))
+            elif p in (rdf_domain, rdf_range) and o > 0:
+                self.property_axioms.append((name(s), "domain" if p == rdf_domain else "range", o))
+            elif p == disjoint_with and o > 0:
+                self.disjoint.append((name(s), name(o)))
+            elif o > 0 and not self.iri(p).startswith(_BUILTIN_PREFIXES):
+                prop = name(p)
+                self.objects.setdefault(s, {}).setdefault(prop, []).append(o)
+                self.subjects.setdefault(o, {}).setdefault(prop, []).append(s)
+
+        data_props = {prop.storid for prop in world.data_properties()}
+        for s, p, o, d in world.graph.execute("SELECT s, p, o, d FROM datas"):
+            if s < 0:
+                self.blank.setdefault(s, {})[self.iri(p)] = o
+            elif p in data_props:
+                self.datas.setdefault(s, {}).setdefault(name(p), []).append((o, d))
+
+        ancestors = {}
+        for s, class_name in direct_types:
+            self.types.setdefault(s, set()).update(self._ancestors(class_name, ancestors))
+
+    def _ancestors(self, class_name, cache):
+        result = cache.get(class_name)
+        if result is None:
+            result = cache[class_name] = {class_name}
+            for parent in self.superclasses.get(class_name, ()):
+                result |= self._ancestors(parent, cache)
+        return result
+
+    def values(self, s, prop, inverse=False):
+        if inverse:
+            return self.subjects.get(s, {}).get(prop, [])
+        return self.objects.get(s, {}).get(prop) or self.datas.get(s, {}).get(prop, [])
+
+
+# ----------------------------------------------------------
+# RULES FROM THE TBOX
+# ----------------------------------------------------------
+def _list_items(facts, node):
+    """The items of the RDF list starting at blank node node."""
+    items = []
+    while isinstance(node, int) and node < 0:
+        cell = facts.blank.get(node, {})
+        items.append(cell.get(_RDF + "first"))
+        node = cell.get(_RDF + "rest")
+    return items
+
+
+def _all_disjoint_pairs(facts):
+    """The class pairs of the AllDisjointClasses axioms (owlready2 states two disjoint classes with disjointWith)."""
+    for axiom in facts.blank.values():
+        if axiom.get(_RDF + "type") == facts.all_disjoint_classes:
+            members = [facts.name(c) for c in _list_items(facts, axiom.get(_OWL + "members"))
+                       if isinstance(c, int) and c > 0]
+            yield from itertools.combinations(members, 2)
+
+
+def compile_tbox_rules(facts):
+    """
+    Return (cardinality rules, property rules, disjoint pairs) stated in the
+    TBox, each once: a TBox reached through several imports states its
+    axioms once per import.
+    """
+    rules = {}
+    for class_name, nodes in facts.restrictions.items():
+        for node in nodes:
+            restriction = facts.blank.get(node, {})
+            prop = restriction.get(_OWL + "onProperty")
+            if prop is None or prop < 0:
+                continue
+            on_class = restriction.get(_OWL + "onClass") or restriction.get(_OWL + "someValuesFrom")
+            on_class = facts.name(on_class) if isinstance(on_class, int) and on_class > 0 else None
+            low = 1 if _OWL + "someValuesFrom" in restriction else 0
+            high = None
+            for predicate, (sets_min, sets_max) in _CARDINALITIES.items():
+                n = restriction.get(_OWL + predicate)
+                if n is not None:
+                    low = int(n) if sets_min else low
+                    high = int(n) if sets_max else high
+            if low or high is not None:
+                rule = CardinalityRule(class_name, facts.name(prop), low, high, on_class, source="TBox")
+                rules.setdefault(rule)
+
+    # (property, "domain"/"range", class name) -> rule, and property -> {Python types}
+    property_rules = {}
+    datatypes = {}
+    for prop, kind, o in facts.property_axioms:
+        python_type = DATATYPES.get(facts.iri(o))
+        if kind == "range" and python_type is not None:
+            datatypes.setdefault(prop, {}).setdefault(python_type)
+        elif kind == "domain":
+            property_rules.setdefault((prop, kind, facts.name(o)),
+                                      PropertyRule(prop, domain=(facts.name(o),), source="TBox"))
+        else:
+            property_rules.setdefault((prop, kind, facts.name(o)),
+                                      PropertyRule(prop, range=(facts.name(o),), source="TBox"))
+    property_rules = list(property_rules.values())
+    for prop, types in datatypes.items():
+        # Like the full validator, a value may match any of the declared ranges
+        property_rules.append(PropertyRule(prop, datatypes=tuple(types), source="TBox"))
+
+    disjoint = {tuple(sorted(pair)): pair for pair in itertools.chain(facts.disjoint, _all_disjoint_pairs(facts))}
+    return list(rules), property_rules, list(disjoint.values())
+
+
+# ----------------------------------------------------------
+# EVALUATION
+# ----------------------------------------------------------
+def check_cardinalities(facts, rules):
+    members = {}
+    for s, types in facts.types.items():
+        for class_name in types:
+            members.setdefault(class_name, []).append(s)
+
+    for rule in rules:
+        for s in members.get(rule.cls, ()):
+            values = facts.values(s, rule.prop, rule.inverse)
+            if rule.on_class:
+                values = [v for v in values if isinstance(v, int) and rule.on_class in facts.types.get(v, ())]
+            count = len(values)
+            if count < rule.min or (rule.max is not None and count > rule.max):
+                expected = f"exactly {rule.min}" if rule.min == rule.max else (
+                    f"at least {rule.min}" if rule.max is None else
+                    f"between {rule.min} and {rule.max}" if rule.min else f"at most {rule.max}")
+                if rule.inverse:
+                    what = f"{rule.on_class or 'individual'} that {rule.prop} it"
+                else:
+                    what = f"{rule.prop} {rule.on_class}" if rule.on_class else rule.prop
+                yield Violation(
+                    "cardinality", facts.iri(s), rule.prop, count, rule.severity,
+                    f"{rule.cls} needs {expected} {what}, has {count} ({rule.source})")
+
+
+def check_properties(facts, property_rules):
+    by_prop = {}
+    for rule in property_rules:
+        by_prop.setdefault(rule.prop, []).append(rule)
+
+    def out_of(s, classes):
+        return classes and facts.types.get(s, set()).isdisjoint(classes)
+
+    def check_domain(s, prop, rule):
+        if out_of(s, rule.domain):
+            yield Violation(
+                "domain", facts.iri(s), prop, None, rule.severity,
+                f"uses {prop} but is not a {' or '.join(rule.domain)} ({rule.source})")
+
+    for s in sorted(set(facts.objects) | set(facts.datas)):
+        for prop, values in facts.objects.get(s, {}).items():
+            for rule in by_prop.get(prop, ()):
+                yield from check_domain(s, prop, rule)
+                for value in values:
+                    if out_of(value, rule.range):
+                        yield Violation(
+                            "range", facts.iri(s), prop, facts.iri(value), rule.severity,
+                            f"{prop} -> {local_name(facts.iri(value))} is not a "
+                            f"{' or '.join(rule.range)} ({rule.source})")
+
+        for prop, values in facts.datas.get(s, {}).items():
+            for rule in by_prop.get(prop, ()):
+                yield from check_domain(s, prop, rule)
+                if not rule.datatypes:
+                    continue
+                for value, datatype in values:
+                    python_value = facts.world._to_python(value, datatype)
+                    if not isinstance(python_value, rule.datatypes):
+                        names = " or ".join(t.__name__ for t in rule.datatypes)
+                        yield Violation(
+                            "range", facts.iri(s), prop, python_value, rule.severity,
+                            f"{prop} = {python_value!r} is not a {names} ({rule.source})")
+
+
+def check_disjoint(facts, disjoint):
+    for s, types in facts.types.items():
+        for a, b in disjoint:
+            if a in types and b in types:
+                yield Violation(
+                    "disjoint", facts.iri(s), None, None, "error",
+                    f"is both {a} and {b}, which are disjoint (TBox)")
+
+
+def iter_violations(world=default_world, rules=CADO_RULES, property_rules=CADO_PROPERTY_RULES):
+    """
+    Run the TBox rules and the given CADO rules on everything loaded in world,
+    yielding the violations as they are found, so a caller can stop early.
+    """
+    facts = Facts(world)
+    tbox_rules, tbox_property_rules, disjoint = compile_tbox_rules(facts)
+    yield from check_cardinalities(facts, tbox_rules + list(rules))
+    yield from check_properties(facts, tbox_property_rules + list(property_rules))
+    yield from check_disjoint(facts, disjoint)
+
+
+def validate(world=default_world, rules=CADO_RULES, property_rules=CADO_PROPERTY_RULES):
+    """Run the TBox rules and the given CADO rules on everything loaded in world; return the violations."""
+    return list(iter_violations(world, rules, property_rules))
+
+
+def print_violations(violations):
+    errors = sum(1 for v in violations if v.severity == "error")
+    for violation in violations:
+        mark = "❌" if violation.severity == "error" else "⚠️"
+        print(f"{mark} {violation}")
+    print(f"\n{errors} error(s), {len(violations) - errors} warning(s)")
@@ -0,0 +1,78 @@
+"""
+Cache of reasoner results for the validator.
+
+Running HermiT (or Pellet) means starting a JVM and classifying the whole
+ontology, the slowest step of a validation. Its outcome only depends on the
+class file, the instance file and the reasoner, so the consistency verdict
+and every fact the reasoner inferred (the triples it added to the inferences
+ontology: inferred types, including owl:Nothing, and inferred subclasses)
+are stored in a JSON file named after the hash of those three. When the same
+inputs are validated again the facts are put back into the quadstore instead
+of running the reasoner.
+"""
+import hashlib
+import json
+import os
+
+from ontology_cache import file_hash
+
+
+def cache_key(class_file, instance_file, reasoner):
+    key = "\n".join((file_hash(class_file), file_hash(instance_file), reasoner))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _cache_file(cache_dir, key):
+    return os.path.join(cache_dir, "reasoner-%s.json" % key)
+
+
+def load(cache_dir, key):
+    """The cached result for key, or None."""
+    try:
+        with open(_cache_file(cache_dir, key)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def inferred_facts(inferences):
+    """{"objs": [[s, p, o]], "datas": [[s, p, o, d]]} of the triples the reasoner put into inferences, by IRI."""
+    world = inferences.world
+    c = inferences.graph.c
+    objs, datas = [], []
+    # Blank nodes (negative storids) cannot be named again in another world, and
+    # the declaration of the inferences ontology itself is not an inference
+    for s, p, o in world.graph.execute("SELECT s, p, o FROM objs WHERE c = ?", (c,)):
+        if s > 0 and o > 0 and s != inferences.storid:
+            objs.append([world._unabbreviate(s), world._unabbreviate(p), world._unabbreviate(o)])
+    for s, p, o, d in world.graph.execute("SELECT s, p, o, d FROM datas WHERE c = ?", (c,)):
+        if s > 0:
+            datas.append([world._unabbreviate(s), world._unabbreviate(p), o,
+                          world._unabbreviate(d) if isinstance(d, int) and d > 0 else d])
+    return {"objs": objs, "datas": datas}
+
+
+def store(cache_dir, key, reasoner, consistent, message, inferences):
+    """Store the verdict and the triples the reasoner put into the 'inferences' ontology."""
+    os.makedirs(cache_dir, exist_ok=True)
+    result = {"reasoner": reasoner, "consistent": consistent, "message": message}
+    result.update(inferred_facts(inferences))
+    path = _cache_file(cache_dir, key)
+    with open(path + ".tmp", "w") as f:
+        json.dump(result, f)
+    os.replace(path + ".tmp", path)
+    return result
+
+
+def restore(result, inferences):
+    """
+    Put the inferred triples of result (a cached result, or inferred_facts())
+    into the 'inferences' ontology; return their number.
+    """
+    world = inferences.world
+    for s, p, o in result["objs"]:
+        inferences._add_obj_triple_spo(world._abbreviate(s), world._abbreviate(p), world._abbreviate(o))
+    for s, p, o, d in result["datas"]:
+        inferences._add_data_triple_spod(world._abbreviate(s), world._abbreviate(p), o,
+                                         world._abbreviate(d) if isinstance(d, str) and "://" in d else d)
+    return len(result["objs"]) + len(result["datas"])
@@ -0,0 +1,107 @@
+"""
+Validation reports.
+
+The validators hand every violation to a Report as soon as they find it. The
+report prints it, writes it as one JSON Lines record to its stream (if it has
+one) and counts the errors:
+
+    {"rule": "range", "individual": "http://.../MySQL_Pod", "property": "replicas",
+     "value": "two", "severity": "error", "message": "replicas = two violates range [<class 'int'>]"}
+
+Once max_violations errors were reported, Report.add raises ViolationLimit,
+which ends the running pass: with --fail-fast a CI job stops at the first
+bad record instead of scanning the whole knowledge base. Warnings are
+reported but do not count towards the limit.
+"""
+import argparse
+import contextlib
+import json
+import sys
+
+_MARKS = {"error": "❌", "warning": "⚠️"}
+
+
+class ViolationLimit(Exception):
+    """Raised by Report.add when max_violations errors were reported."""
+
+
+def record(violation):
+    """The JSON Lines record of a quick_validation.Violation."""
+    return {
+        "rule": violation.rule,
+        "individual": violation.individual,
+        "property": violation.property,
+        "value": violation.value,
+        "severity": violation.severity,
+        "message": violation.message,
+    }
+
+
+class Report:
+    def __init__(self, stream=None, max_violations=None):
+        self.stream = stream                    # text file the JSON Lines go to, if any
+        self.max_violations = max_violations    # errors after which the checks stop
+        self.violations = []
+        self.errors = 0
+        self.stopped = False
+
+    def add(self, violation):
+        self.violations.append(violation)
+        print(f"{_MARKS.get(violation.severity, '❌')} {violation}")
+        if self.stream is not None:
+            # Literal values can be dates, decimals, ...
+            self.stream.write(json.dumps(record(violation), ensure_ascii=False, default=str) + "\n")
+            self.stream.flush()
+        if violation.severity == "error":
+            self.errors += 1
+            if self.max_violations and self.errors >= self.max_violations:
+                self.stopped = True
+                raise ViolationLimit(self.errors)
+
+    def extend(self, violations):
+        for violation in violations:
+            self.add(violation)
+
+    @property
+    def exit_status(self):
+        """0 if no error was found, 1 otherwise."""
+        return 1 if self.errors else 0
+
+    def print_summary(self):
+        print(f"\n{self.errors} error(s), {len(self.violations) - self.errors} warning(s)")
+        if self.stopped:
+            print(f"Stopped after {self.errors} error(s) (--max-violations {self.max_violations}): "
+                  "the rest was not checked.")
+
+
+# ----------------------------------------------------------
+# Command-line options
+# ----------------------------------------------------------
+def _positive(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return value
+
+
+def add_arguments(parser):
+    parser.add_argument("--report", metavar="FILE",
+                        help="Write every violation as a JSON Lines record to FILE "
+                             "('-': standard output, the other messages then go to standard error)")
+    parser.add_argument("--fail-fast", action="store_true", help="Stop at the first error (--max-violations 1)")
+    parser.add_argument("--max-violations", type=_positive, metavar="N", help="Stop the checks after N errors")
+
+
+@contextlib.contextmanager
+def opened(args):
+    """The Report of the --report, --fail-fast and --max-violations options."""
+    max_violations = 1 if args.fail_fast else args.max_violations
+    if not args.report:
+        yield Report(None, max_violations)
+    elif args.report == "-":
+        stdout = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            yield Report(stdout, max_violations)
+    else:
+        with open(args.report, "w", encoding="utf-8") as f:
+            yield Report(f, max_violations)
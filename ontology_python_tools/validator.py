@@ -1,67 +1,103 @@
 import argparse
+import contextlib
+import itertools
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from owlready2 import *
 from owlready2 import OwlReadyInconsistentOntologyError
+import ontology_cache
+import ontology_module
+import profiling
+import quick_validation
+import reasoner_cache
+import validation_report
+from quick_validation import Violation
+from validation_report import ViolationLimit
 
-# ------------------------------------------------------------
-# 0. Parse command-line arguments
-# ------------------------------------------------------------
+INCONSISTENT = "Ontology is inconsistent"
 
-parser = argparse.ArgumentParser(description="OWL Ontology Validator")
-parser.add_argument("--classes", required=True, help="Path to the class (TBox) OWL file")
-parser.add_argument("--instances", required=True, help="Path to the instance (ABox) OWL file")
-args = parser.parse_args()
+# Ontology the facts inferred by the reasoner are put into
+INFERENCES_IRI = "http://localhost/cado-inferences/"
 
-CLASS_FILE = args.classes
-INSTANCE_FILE = args.instances
+REASONERS = {"hermit": sync_reasoner, "pellet": sync_reasoner_pellet}
 
 # ------------------------------------------------------------
-# 1. Load schema (TBox) and instances (ABox)
+# 0. Parse command-line arguments
 # ------------------------------------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="OWL Ontology Validator")
+    parser.add_argument("--classes", required=True, help="Path to the class (TBox) OWL file")
+    parser.add_argument("--instances", required=True, help="Path to the instance (ABox) OWL file")
+    parser.add_argument("--cache-dir",
+                        help="Directory of the parsed-ontology and reasoner caches (disabled if omitted)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Check the TBox and CADO rules on the asserted facts only, without the reasoner (no Java)")
+    parser.add_argument("--reasoner", choices=sorted(REASONERS), default="hermit")
+    parser.add_argument("--force-reasoner", action="store_true",
+                        help="Run the reasoner even if its result for these files is cached")
+    parser.add_argument("--module", action="store_true",
+                        help="Reason only over the module of the ontology around the deployment units")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes for the restriction and datatype checks (default: 1)")
+    validation_report.add_arguments(parser)
+    profiling.add_arguments(parser)
+    return parser.parse_args(argv)
 
-print("Loading Classes...")
-onto = get_ontology(CLASS_FILE).load()
-
-print("Loading Instances...")
-instances = get_ontology(INSTANCE_FILE).load()
-onto.imported_ontologies.append(instances)
-
-print("\nLoaded ontologies:")
-print(" Classes:", onto.base_iri)
-print(" Instances:", instances.base_iri)
 
 # ------------------------------------------------------------
 # 2. Run reasoner (consistency & classification)
 # ------------------------------------------------------------
+def run_reasoner(inferences, reasoner="hermit", module=False):
+    """
+    Run the reasoner, with the inferred facts put into the 'inferences'
+    ontology. With module=True it only sees the module extracted around the
+    deployment units (see ontology_module.py). Returns (consistent, error message).
+    """
+    print("\nRunning reasoner...")
+    try:
+        if module:
+            ontology_module.reason_over_module(REASONERS[reasoner], inferences)
+        else:
+            with inferences:
+                REASONERS[reasoner]()
+        return True, None
+    except OwlReadyInconsistentOntologyError as e:
+        return False, str(e)
+
+
+def report_reasoner(consistent, message):
+    if consistent:
+        print("Reasoning completed. Ontology is consistent.\n")
+    else:
+        print("❌ Ontology is inconsistent!")
+        print(message)
 
-print("\nRunning reasoner...")
-try:
-    with onto:
-        sync_reasoner()
-    print("Reasoning completed. Ontology is consistent.\n")
-except OwlReadyInconsistentOntologyError as e:
-    print("❌ Ontology is inconsistent!")
-    print(e)
-    exit()
 
 # ------------------------------------------------------------
 # 3. Check for inconsistent individuals (owl:Nothing)
 # ------------------------------------------------------------
+def check_inconsistent_individuals(report=None):
+    """Report the individuals inferred to be owl:Nothing; return their Violation list."""
+    print("Checking for inconsistent individuals...")
+    report = validation_report.Report() if report is None else report
+    start = len(report.violations)
 
-print("Checking for inconsistent individuals...")
+    inconsistent_individuals = list(Nothing.instances())
 
-inconsistent_individuals = list(Nothing.instances())
+    if inconsistent_individuals:
+        print("\nInconsistent individuals detected:")
+        for ind in inconsistent_individuals:
+            report.add(Violation("inconsistent", ind.iri, message=f"{ind} is inconsistent"))
+    else:
+        print("No inconsistent individuals found.\n")
+    return report.violations[start:]
 
-if inconsistent_individuals:
-    print("\n❌ Inconsistent individuals detected:")
-    for ind in inconsistent_individuals:
-        print("  -", ind)
-else:
-    print("No inconsistent individuals found.\n")
 
 # ------------------------------------------------------------
 # 4. Validate individuals against class restrictions
 # ------------------------------------------------------------
-
 def check_restriction(ind, restriction):
     """Evaluate an OWL restriction for a given individual."""
     try:
@@ -69,55 +105,367 @@ def check_restriction(ind, restriction):
     except Exception:
         return False
 
-print("Validating against class restrictions...\n")
 
-for cls in onto.classes():
-    for ind in cls.instances():
-        for restriction in cls.is_a:
-            if isinstance(restriction, Restriction):
-                if not check_restriction(ind, restriction):
-                    print(f"❌ {ind} violates restriction {restriction} in class {cls}")
+def class_restrictions(cls):
+    """The restrictions of cls.is_a, each once: a TBox imported twice asserts them twice."""
+    unique = {}
+    for restriction in cls.is_a:
+        if isinstance(restriction, Restriction):
+            unique.setdefault(str(restriction), restriction)
+    return list(unique.values())
+
+
+def restriction_problems(cls, ind):
+    return [
+        Violation("restriction", ind.iri, getattr(restriction.property, "name", None), None, "error",
+                  f"{ind} violates restriction {restriction} in class {cls}")
+        for restriction in class_restrictions(cls)
+        if not check_restriction(ind, restriction)
+    ]
+
+
+def iter_instances(cls):
+    """
+    The instances of cls (its equivalent classes and subclasses included, as
+    cls.instances()), one class at a time so that the restriction pass can stop
+    at the limit before the others are fetched.
+    """
+    seen = set()
+    for descendant in cls.descendants():
+        for ind in cls.namespace.world.search(type=descendant):
+            if ind.storid not in seen:
+                seen.add(ind.storid)
+                yield ind
+
+
+def restricted_classes(onto):
+    """The classes of onto with restrictions: the instances of the others cannot violate any."""
+    return [cls for cls in onto.classes() if any(isinstance(r, Restriction) for r in cls.is_a)]
+
+
+def validate_restrictions(onto, executor=None, chunks=1, report=None):
+    """
+    Check every instance of every class of onto against the class restrictions,
+    reporting each Violation as it is found; return them. With an executor
+    (see worker_pool) the (class, instance) pairs are checked in chunks by its
+    workers (see run_chunks).
+    """
+    print("Validating against class restrictions...\n")
+    report = validation_report.Report() if report is None else report
+    start = len(report.violations)
+
+    if executor is None:
+        for cls in restricted_classes(onto):
+            for ind in iter_instances(cls):
+                report.extend(restriction_problems(cls, ind))
+    else:
+        pairs = [(cls.iri, ind.iri) for cls in restricted_classes(onto) for ind in iter_instances(cls)]
+        run_chunks(executor, _restrictions_chunk, _split(pairs, chunks), report)
+    return report.violations[start:]
+
 
 # ------------------------------------------------------------
 # 5. Validate datatype properties
 # ------------------------------------------------------------
+def resolve_data_ranges(onto):
+    """
+    {property storid: (property, declared ranges, allowed Python types)} for the
+    data properties of onto with a range, resolved once before the scan.
+    """
+    checks = {}
+    for prop in onto.data_properties():
+        expected_ranges = list(dict.fromkeys(prop.range))
+        # Built-in datatypes are Python types already (int, str, ...), others carry one
+        types = tuple(
+            r if isinstance(r, type) else r.python_type
+            for r in expected_ranges
+            if isinstance(r, type) or hasattr(r, "python_type")
+        )
+        if types:
+            checks[prop.storid] = (prop, expected_ranges, types)
+    return checks
 
-print("\nValidating datatype property ranges...\n")
 
-for prop in onto.data_properties():
-    expected_ranges = prop.range
+def scan_data_ranges(world, checks, low=None, high=None):
+    """
+    Check the asserted values of the properties of checks (see
+    resolve_data_ranges), of the subjects between storids low and high if
+    given; yield their Violations by subject, then property.
+    """
+    query = "SELECT s, p, o, d FROM datas WHERE p IN (%s)" % ",".join("?" * len(checks))
+    params = tuple(checks)
+    if low is not None:
+        query += " AND s BETWEEN ? AND ?"
+        params += (low, high)
 
-    # Case 1: property has declared domain
-    owners = list(prop.domain)
+    for s, p, o, d in world.graph.execute(query + " ORDER BY s, p", params):
+        if s < 0:
+            continue
+        prop, expected_ranges, types = checks[p]
+        val = world._to_python(o, d)
+        if not isinstance(val, types):
+            yield Violation("range", world._unabbreviate(s), prop.name, val, "error",
+                            f"{prop.name} = {val} violates range {expected_ranges}")
 
-    if owners:
-        individuals_to_check = set()
-        for owner in owners:
-            individuals_to_check.update(owner.instances())
-    else:
-        # Case 2: no domain declared → scan all individuals
-        individuals_to_check = set(onto.individuals())
 
-    for ind in individuals_to_check:
-        # Get values for this property on this individual
-        try:
-            values = getattr(ind, prop.python_name)
-        except AttributeError:
-            continue  # individual does not use this property
-
-        # Validate each value
-        for val in values:
-            if expected_ranges:
-                valid = False
-                for r in expected_ranges:
-                    if hasattr(r, "python_type") and isinstance(val, r.python_type):
-                        valid = True
-                        break
-
-                if not valid:
-                    print(f"❌ {ind}.{prop.name} = {val} violates range {expected_ranges}")
+def validate_data_ranges(onto, executor=None, chunks=1, report=None):
+    """
+    Check every asserted value of the data properties with a range, in one
+    pass over their triples, reporting each Violation as it is found; return
+    them. With an executor (see worker_pool) its workers scan contiguous
+    ranges of subjects (see run_chunks).
+    """
+    print("\nValidating datatype property ranges...\n")
+    report = validation_report.Report() if report is None else report
+    start = len(report.violations)
+
+    world = onto.world
+    checks = resolve_data_ranges(onto)
+    if checks and executor is None:
+        report.extend(scan_data_ranges(world, checks))
+    elif checks:
+        subjects = [s for (s,) in world.graph.execute(
+            "SELECT DISTINCT s FROM datas WHERE p IN (%s) AND s > 0 ORDER BY s" % ",".join("?" * len(checks)),
+            tuple(checks))]
+        bounds = [(chunk[0], chunk[-1]) for chunk in _split(subjects, chunks)]
+        run_chunks(executor, _data_ranges_chunk, bounds, report)
+    return report.violations[start:]
+
+
+# ------------------------------------------------------------
+# Parallel checks (--jobs)
+# ------------------------------------------------------------
+# Steps 4 and 5 only read the quadstore. With --jobs the reasoned quadstore
+# (TBox, ABox and inferences) is copied once to a temporary SQLite file, every
+# worker process opens it in its own World, and each checks contiguous chunks
+# of the work. The chunks are reported in order, so the problems reported are
+# the same, in the same order, as with one job.
+_worker = {}
+
+
+def snapshot_world(world, path):
+    """Copy the quadstore of world, including its uncommitted changes, to the SQLite file path."""
+    # sqlite3's backup() waits forever on the write transaction owlready keeps open
+    db = world.graph.db
+    target = sqlite3.connect(path)
+    try:
+        tables = db.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'").fetchall()
+        for name, sql in tables:
+            target.execute(sql)
+            rows = db.execute("SELECT * FROM %s" % name)
+            target.executemany("INSERT INTO %s VALUES (%s)" % (name, ",".join("?" * len(rows.description))), rows)
+        for (sql,) in db.execute(
+                "SELECT sql FROM sqlite_master WHERE type IN ('index', 'view') AND sql IS NOT NULL").fetchall():
+            target.execute(sql)
+        target.commit()
+    finally:
+        target.close()
+
+
+def _init_worker(snapshot, onto_iri, names):
+    world = World()
+    world.set_backend(filename=snapshot, exclusive=False)
+    _worker["onto"] = world.get_ontology(onto_iri).load()
+    # Same ontology names as in the parent, so entities print the same
+    for iri, name in names:
+        world.get_ontology(iri).name = name
+    _worker["checks"] = resolve_data_ranges(_worker["onto"])
+
+
+def _restrictions_chunk(pairs, limit=None):
+    world = _worker["onto"].world
+    problems = (problem for cls_iri, ind_iri in pairs
+                for problem in restriction_problems(world[cls_iri], world[ind_iri]))
+    return list(itertools.islice(problems, limit))
+
+
+def _data_ranges_chunk(bounds, limit=None):
+    return list(itertools.islice(scan_data_ranges(_worker["onto"].world, _worker["checks"], *bounds), limit))
+
+
+def run_chunks(executor, check, chunks, report):
+    """
+    Run check(chunk, limit) for every chunk in the executor and report their
+    Violations in chunk order. With a --max-violations limit, a worker stops
+    its chunk once it found as many errors as the report still takes, and the
+    chunks not started yet are cancelled once the report stopped.
+    """
+    limit = report.max_violations - report.errors if report.max_violations else None
+    futures = [executor.submit(check, chunk, limit) for chunk in chunks]
+    try:
+        for future in futures:
+            report.extend(future.result())
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _split(items, count):
+    """items in at most count contiguous, non-empty chunks."""
+    size = max(1, -(-len(items) // count))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+@contextlib.contextmanager
+def worker_pool(onto, jobs):
+    """A process pool whose workers each have a copy of onto's world loaded."""
+    with tempfile.TemporaryDirectory(prefix="cado-validator-") as tmp:
+        snapshot = os.path.join(tmp, "quadstore.sqlite3")
+        snapshot_world(onto.world, snapshot)
+        names = [(o.base_iri, o.name) for o in onto.world.ontologies.values()]
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(snapshot, onto.base_iri, names)) as executor:
+            yield executor
+
 
 # ------------------------------------------------------------
-# 6. Summary
+# Importable API
 # ------------------------------------------------------------
-print("\nValidation completed.")
+class Validator:
+    """
+    Validates instance files (ABoxes) against one class file (TBox).
+
+    The TBox stays loaded in default_world between calls. The facts the
+    reasoner inferred are removed after each validation, and so is the ABox
+    unless a cache_dir is used (the cached world then keeps the last ABox, so
+    validating it again is a warm load), so the next ABox is checked on its own.
+
+    With a cache_dir the reasoner results are cached too (see
+    reasoner_cache.py); force_reasoner=True ignores the cached ones. With
+    module=True the reasoner only sees the module around the deployment
+    units. With jobs > 1 the restriction and datatype checks run in that many
+    processes.
+    """
+
+    def __init__(self, class_file, cache_dir=None, reasoner="hermit", force_reasoner=False, jobs=1,
+                 module=False):
+        self.class_file = class_file
+        self.cache_dir = cache_dir
+        self.reasoner = reasoner
+        self.force_reasoner = force_reasoner
+        self.jobs = jobs
+        self.module = module
+
+    def reason(self, instance_file, inferences):
+        """Run the reasoner, or restore its cached result; return (consistent, error message)."""
+        if not self.cache_dir:
+            return run_reasoner(inferences, self.reasoner, self.module)
+
+        # A module may yield fewer inferences than the whole ontology: cached apart
+        reasoner = self.reasoner + "+module" if self.module else self.reasoner
+        key = reasoner_cache.cache_key(self.class_file, instance_file, reasoner)
+        cached = None if self.force_reasoner else reasoner_cache.load(self.cache_dir, key)
+        if cached is not None:
+            count = reasoner_cache.restore(cached, inferences)
+            print(f"\nReasoner results loaded from cache ({reasoner}, {count} inferred facts)")
+            return cached["consistent"], cached["message"]
+
+        consistent, message = run_reasoner(inferences, self.reasoner, self.module)
+        reasoner_cache.store(self.cache_dir, key, reasoner, consistent, message, inferences)
+        return consistent, message
+
+    def load(self, instance_file):
+        # ------------------------------------------------------------
+        # 1. Load schema (TBox) and instances (ABox)
+        # ------------------------------------------------------------
+        print("Loading Classes and Instances...")
+        onto, instances, cache_status, load_seconds = ontology_cache.load_ontologies(
+            self.class_file, instance_file, self.cache_dir)
+        print(f"Loaded in {load_seconds * 1000:.1f} ms (cache: {cache_status})")
+
+        print("\nLoaded ontologies:")
+        print(" Classes:", onto.base_iri)
+        print(" Instances:", instances.base_iri)
+        return onto, instances
+
+    def unload(self, onto, instances):
+        if not self.cache_dir:
+            onto.imported_ontologies.remove(instances)
+            instances.destroy()
+
+    def quick_check(self, report=None):
+        """
+        Run quick_validation on everything loaded, without the reasoner,
+        reporting the violations to report as they are found, until its
+        limit; return them.
+        """
+        report = validation_report.Report() if report is None else report
+        print("\nQuick validation (asserted facts, TBox and CADO rules)...\n")
+        with profiling.phase("quick_validation"), contextlib.suppress(ViolationLimit):
+            report.extend(quick_validation.iter_violations(default_world))
+        report.print_summary()
+        return report.violations
+
+    def quick_validate(self, instance_file, report=None):
+        """Run quick_validation on an ABox, without the reasoner; return the Violation list."""
+        onto, instances = self.load(instance_file)
+        try:
+            return self.quick_check(report)
+        finally:
+            self.unload(onto, instances)
+
+    def validate(self, instance_file, report=None):
+        """Run all checks on an ABox; return the Violation list (empty if valid)."""
+        onto, instances = self.load(instance_file)
+
+        inferences = default_world.get_ontology(INFERENCES_IRI)
+        try:
+            return self.check(onto, instance_file, inferences, report)
+        finally:
+            inferences.destroy()
+            self.unload(onto, instances)
+
+    def check(self, onto, instance_file, inferences, report=None):
+        """
+        Reason over the loaded ontologies, with the inferred facts put into
+        inferences, and run all checks, reporting the violations to report
+        (see validation_report.py) until its limit; return them.
+        The inferences stay in the world (see cado.py).
+        """
+        report = validation_report.Report() if report is None else report
+        with profiling.phase("reasoning"):
+            consistent, message = self.reason(instance_file, inferences)
+        report_reasoner(consistent, message)
+        try:
+            if not consistent:
+                report.add(Violation("consistency", None, None, None, "error", f"{INCONSISTENT}: {message}"))
+            else:
+                self._check_consistent(onto, report)
+        except ViolationLimit:
+            pass
+        report.print_summary()
+        return report.violations
+
+    def _check_consistent(self, onto, report):
+        with profiling.phase("inconsistent_individuals"):
+            check_inconsistent_individuals(report)
+        # Several chunks per worker, so one slow chunk does not hold up the rest
+        chunks = self.jobs * 4
+        pool = worker_pool(onto, self.jobs) if self.jobs > 1 else contextlib.nullcontext()
+        with pool as executor:
+            with profiling.phase("restrictions"):
+                validate_restrictions(onto, executor, chunks, report)
+            with profiling.phase("data_ranges"):
+                validate_data_ranges(onto, executor, chunks, report)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with validation_report.opened(args) as report, profiling.profiled("validator", args):
+        validator = Validator(args.classes, args.cache_dir, args.reasoner, args.force_reasoner, args.jobs,
+                              args.module)
+        if args.quick:
+            validator.quick_validate(args.instances, report)
+        else:
+            validator.validate(args.instances, report)
+
+        # ------------------------------------------------------------
+        # 6. Summary
+        # ------------------------------------------------------------
+        print("\nValidation completed." if not report.errors else "\nValidation failed.")
+    raise SystemExit(report.exit_status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "ontology_python_tools"))
+
+ONTOLOGY_DIR = os.path.join(ROOT, "ontology_files")
+ENTITY = os.path.join(ONTOLOGY_DIR, "entity.owx")
+INSTANCES = os.path.join(ONTOLOGY_DIR, "instances.owl")
+GENERATED_DIR = os.path.join(ROOT, "generated_files")
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+MULTI_NAMESPACE = os.path.join(FIXTURES, "multi_namespace.owl")
+
+
+@pytest.fixture(scope="session")
+def converter():
+    """A streaming Converter over entity.owx (it does not touch default_world)."""
+    import converter as converter_module
+    return converter_module.Converter(ENTITY, stream=True)
+
+
+def read_tree(directory):
+    """{relative path: text} of the files under directory."""
+    files = {}
+    for parent, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(parent, name)
+            with open(path, encoding="utf-8") as f:
+                files[os.path.relpath(path, directory)] = f.read()
+    return files
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from conftest import INSTANCES
+from conversion_daemon import ConversionDaemon
+
+
+def _route(converter, method, target, body=b""):
+    return asyncio.run(ConversionDaemon(converter).route(method, target, body))
+
+
+@pytest.fixture(scope="module")
+def abox():
+    with open(INSTANCES, "rb") as f:
+        return f.read()
+
+
+def test_health(converter):
+    status, result = _route(converter, "GET", "/health")
+    assert status == 200
+    assert result == {"status": "ok", "classes": converter.class_file, "stream": True}
+
+
+def test_convert(converter, abox):
+    status, result = _route(converter, "POST", "/convert", abox)
+    assert status == 200
+    assert result["files"] == converter.render(INSTANCES)
+    assert "docker-compose.generated.yml" in result["files"]
+
+
+def test_convert_by_namespace(converter, abox):
+    status, result = _route(converter, "POST", "/convert?bundle=namespace", abox)
+    assert status == 200
+    assert result["files"] == converter.render(INSTANCES, "namespace")
+
+
+def test_bad_bundle(converter, abox):
+    status, result = _route(converter, "POST", "/convert?bundle=everything", abox)
+    assert status == 400
+    assert "bundle must be one of" in result["error"]
+
+
+def test_unparsable_body(converter):
+    status, result = _route(converter, "POST", "/convert", b"<Ontology")
+    assert status == 400
+    assert result["error"]
+
+
+def test_other_paths_and_methods(converter):
+    assert _route(converter, "GET", "/metrics")[0] == 404
+    assert _route(converter, "GET", "/convert")[0] == 405
@@ -0,0 +1,57 @@
+import os
+import shutil
+
+import pytest
+
+import converter
+from conftest import ENTITY, INSTANCES, MULTI_NAMESPACE, read_tree
+
+
+@pytest.fixture
+def batch(tmp_path):
+    """Instance files of the same name in two directories, and one differing only by its extension."""
+    root = tmp_path / "abox"
+    for directory in ("a", "b"):
+        (root / directory).mkdir(parents=True)
+    shutil.copy(INSTANCES, root / "a" / "app.owl")
+    shutil.copy(MULTI_NAMESPACE, root / "b" / "app.owl")
+    shutil.copy(MULTI_NAMESPACE, root / "b" / "app.owx")
+    # instances.owl is also in the TBox directory, which owlready2 searches by file name
+    with open(INSTANCES) as f:
+        (root / "a" / "instances.owl").write_text(f.read().replace("mysql:5.7", "mysql:8.0"))
+    return sorted(str(path) for path in root.glob("*/*.ow?"))
+
+
+def test_batch_output_dirs(batch):
+    names = [os.path.relpath(path, "out") for path in converter.batch_output_dirs(batch, "out")]
+    assert names == ["a/app", "a/instances", "b/app.owl", "b/app.owx"]
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_batch_jobs_give_the_same_files(batch, tmp_path, stream):
+    trees = []
+    for jobs in (1, 2):
+        output_dir = str(tmp_path / f"jobs{jobs}")
+        assert converter.run_batch(ENTITY, batch, output_dir, jobs, stream) == 0
+        trees.append(read_tree(output_dir))
+    assert trees[0] == trees[1]
+
+    files = trees[0]
+    assert files["a/app/docker-compose.generated.yml"] != files["b/app.owl/docker-compose.generated.yml"]
+    assert files["b/app.owl/docker-compose.generated.yml"] == files["b/app.owx/docker-compose.generated.yml"]
+    assert "mysql:8.0" in files["a/instances/docker-compose.generated.yml"]
+
+
+def test_batch_directory_holding_the_tbox(tmp_path):
+    shutil.copy(ENTITY, tmp_path)
+    shutil.copy(INSTANCES, tmp_path)
+    class_file = str(tmp_path / "entity.owx")
+    assert converter.find_instance_files(str(tmp_path), class_file) == [str(tmp_path / "instances.owl")]
+    assert converter.find_instance_files(str(tmp_path / "*.ow?"), class_file) == [str(tmp_path / "instances.owl")]
+
+    output_dir = tmp_path / "out"
+    with pytest.raises(SystemExit) as exit_info:
+        converter.main(["--classes", class_file, "--batch", str(tmp_path), "--output-dir", str(output_dir),
+                        "--jobs", "1", "--stream"])
+    assert exit_info.value.code == 0
+    assert sorted(os.listdir(output_dir)) == ["instances"]
@@ -0,0 +1,64 @@
+import generated_output
+import manifest_import
+from deployment_plan import build_deployment_plan
+from emitters import kubernetes_outputs
+
+BASE = "http://test.org/abox#"
+
+
+def _plan(pod_data, volume_data=None):
+    """The plan of a pod App_Pod binding the volumes Data and Logs, and those its related_volume names."""
+    volume_data = volume_data or {}
+    volumes = [BASE + name for name in ("Data", "Logs", "Cache")]
+    data_index = {BASE + "App_Pod": dict(deployment_name=["app"], container_name=["app"], related_image=["app:1"],
+                                         **pod_data)}
+    for name in ("Data", "Logs", "Cache"):
+        data_index[BASE + name] = dict(volume_name=[name.lower()], **volume_data.get(name, {}))
+    class_index = {
+        "platform": [BASE + "Kubernetes"],
+        "minimal_deployment_unit": [],
+        "deployment_unit": [BASE + "App_Pod"],
+        "persistent": volumes,
+    }
+    link_index = {BASE + "Kubernetes": {"deploys": [BASE + "App_Pod"]}, BASE + "App_Pod": {"binds": volumes[:2]}}
+    return build_deployment_plan(class_index, data_index, link_index)
+
+
+def _mounts(plan):
+    (pod,) = plan.pods
+    return {iri[len(BASE):]: path for iri, path in pod.mounts.items()}
+
+
+def test_pod_mount_path_goes_to_its_first_volume():
+    assert _mounts(_plan({"volume_mount_path": ["/data"]})) == {"Data": "/data"}
+
+
+def test_each_binding_has_its_own_path():
+    plan = _plan({"volume_mount_path": ["/data"], "related_volume": ["logs:/var/log", "cache:/cache"]},
+                 {"Data": {"volume_mount_path": ["/srv"]}})
+    assert _mounts(plan) == {"Data": "/srv", "Logs": "/var/log", "Cache": "/cache"}
+
+
+def test_mount_paths_are_unique():
+    plan = _plan({"volume_mount_path": ["/data"], "related_volume": ["logs:/data"]})
+    assert _mounts(plan) == {"Logs": "/data"}
+    (output,) = [output for output in kubernetes_outputs(plan, {}) if output[1] == "Deployment"]
+    (container,) = output[3]["spec"]["template"]["spec"]["containers"]
+    assert container["volumeMounts"] == [{"name": "logs", "mountPath": "/data"}]
+
+
+def test_several_mounts_round_trip(converter, tmp_path):
+    plan = _plan({"volume_mount_path": ["/data"], "related_volume": ["logs:/var/log", "cache:/cache"]})
+    manifests = tmp_path / "manifests"
+    manifests.mkdir()
+    for name, text in generated_output.render_outputs(kubernetes_outputs(plan, {})).items():
+        (manifests / name).write_text(text)
+
+    abox = manifest_import.import_manifests([str(manifests)])
+    path = str(tmp_path / "imported.owl")
+    manifest_import.write_abox(abox, path)
+    rendered = converter.render(path)
+    deployment = "kubernetes-deployment-app.generated.yml"
+    assert (manifests / deployment).read_text().count("mountPath") == 3
+    for name in (deployment, "kubernetes-pvc-cachec.generated.yml"):
+        assert rendered[name] == (manifests / name).read_text()
@@ -0,0 +1,40 @@
+import time
+
+import emitters
+from conftest import INSTANCES
+
+
+def test_emitter_messages_in_registry_order(converter, capsys):
+    converter.render(INSTANCES)
+    assert capsys.readouterr().out.splitlines() == [
+        "Generate Kubernetes deployment plan",
+        "Generated Kubernetes files",
+        "Generate Docker deployment plan",
+        "Generated Docker Compose file",
+        "Generated Docker Swarm stack file",
+    ]
+
+
+def test_outputs_in_registry_order(converter):
+    with converter.indexes(INSTANCES) as (class_index, data_index, link_index):
+        plan = emitters.deployment_plan.build_deployment_plan(class_index, data_index, link_index)
+        outputs = emitters.build_outputs(plan, data_index)
+    kinds = [kind for _, kind, _, _ in outputs]
+    assert kinds.index("Deployment") < kinds.index("Compose") < kinds.index("Stack")
+
+
+def test_concurrent_emitters_do_not_interleave(capsys):
+    def slow(plan, data_index):
+        emitters.progress("slow: start")
+        time.sleep(0.05)
+        emitters.progress("slow: done")
+        return [("slow.yml", "Slow", "slow", {})]
+
+    def fast(plan, data_index):
+        emitters.progress("fast: done")
+        return [("fast.yml", "Fast", "fast", {})]
+
+    selected = [emitters.Emitter("slow", frozenset(), slow), emitters.Emitter("fast", frozenset(), fast)]
+    outputs = emitters.build_outputs(emitters.deployment_plan.DeploymentPlan(), {}, selected)
+    assert [name for name, _, _, _ in outputs] == ["slow.yml", "fast.yml"]
+    assert capsys.readouterr().out.splitlines() == ["slow: start", "slow: done", "fast: done"]
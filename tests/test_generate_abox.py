@@ -0,0 +1,55 @@
+import pytest
+import yaml
+from owlready2 import World, onto_path
+
+import generate_abox
+import ontology_cache
+from conftest import ONTOLOGY_DIR
+
+SHAPE = generate_abox.AboxShape(pods=7, containers=4, volumes=3, namespaces=2, env=3)
+
+
+@pytest.fixture(scope="module")
+def abox(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("abox") / "abox.owl")
+    assert generate_abox.write_abox(SHAPE, path) == SHAPE.individuals
+    return path
+
+
+def test_shape_for_individuals():
+    shape = generate_abox.AboxShape.for_individuals(1000)
+    assert shape.individuals == 1000
+    assert (shape.pods, shape.containers, shape.volumes, shape.namespaces) == (329, 328, 328, 9)
+
+
+def test_loads_with_the_requested_individuals(abox):
+    # The generated file imports entity.owx by file name, like instances.owl
+    onto_path.append(ONTOLOGY_DIR)
+    try:
+        world = World()
+        onto = world.get_ontology(ontology_cache.file_iri(abox)).load()
+    finally:
+        onto_path.remove(ONTOLOGY_DIR)
+    names = [ind.name for ind in onto.individuals()]
+    assert len(names) == SHAPE.individuals
+    assert sum(name.endswith("_Pod") for name in names) == SHAPE.pods
+    assert sum(name.endswith("_Docker_Container") for name in names) == SHAPE.containers
+    assert sum(name.startswith("Volume_") for name in names) == SHAPE.volumes
+    assert sorted(ns for ind in onto.individuals() for ns in ind.namespace_name) == ["namespace-0", "namespace-1"]
+    pod = onto.search_one(iri="*App0_Pod")
+    assert len([prop for prop in pod.get_properties() if prop.name.startswith("env_")]) == SHAPE.env
+
+
+def test_generated_files(converter, abox):
+    files = converter.render(abox)
+    kinds = [name.split("-")[1] for name in files if name.startswith("kubernetes-")]
+    assert sorted(kinds) == sorted(["deployment"] * SHAPE.pods + ["namespace"] * SHAPE.namespaces
+                                   + ["volume", "pvc"] * SHAPE.volumes)
+    assert len(yaml.safe_load(files["docker-compose.generated.yml"])["services"]) == SHAPE.containers
+
+
+def test_deterministic(abox, tmp_path):
+    again = str(tmp_path / "again.owl")
+    generate_abox.write_abox(SHAPE, again)
+    with open(abox) as first, open(again) as second:
+        assert first.read() == second.read()
@@ -0,0 +1,103 @@
+import os
+
+import yaml
+from owlready2 import World
+
+import deployment_plan
+import emitters
+import generated_output
+import manifest_import
+import ontology_index
+import quick_validation
+from conftest import ENTITY, GENERATED_DIR, MULTI_NAMESPACE, read_tree
+
+
+def _reimport(converter, manifest_dir, tmp_path, jobs=1):
+    abox = manifest_import.import_manifests([str(manifest_dir)], jobs)
+    path = str(tmp_path / "imported.owl")
+    manifest_import.write_abox(abox, path)
+    return abox, converter.render(path)
+
+
+def test_generated_files_round_trip(converter, tmp_path):
+    abox, rendered = _reimport(converter, GENERATED_DIR, tmp_path)
+    # The Swarm stack file deploys the Compose containers; it is not a second project
+    assert not [name for name in abox.individuals if name.endswith("_2")]
+    assert sorted(obj for subject, prop, obj in abox.links if subject == "Docker_Swarm" and prop == "#deploys") \
+        == ["mysql_Docker_Container", "wordpress_Docker_Container"]
+    expected = read_tree(GENERATED_DIR)
+    expected.pop("generated-manifest.json")
+    assert rendered == expected
+
+
+def test_same_name_deployments_of_two_namespaces(converter, tmp_path):
+    first = tmp_path / "first"
+    first.mkdir()
+    for name, text in converter.render(MULTI_NAMESPACE).items():
+        (first / name).write_text(text)
+
+    _, rendered = _reimport(converter, first, tmp_path)
+    deployments = [
+        yaml.safe_load(text) for name, text in rendered.items()
+        if name.startswith("kubernetes-deployment-")
+    ]
+    web = sorted((d["metadata"]["namespace"], d["spec"]["template"]["spec"]["containers"][0]["image"])
+                 for d in deployments if d["metadata"]["name"] == "web")
+    assert web == [("team-a", "nginx:1.25"), ("team-b", "httpd:2.4")]
+
+
+def test_jobs_do_not_change_the_abox(tmp_path):
+    serial = manifest_import.import_manifests([GENERATED_DIR], jobs=1)
+    parallel = manifest_import.import_manifests([GENERATED_DIR], jobs=2)
+    assert list(manifest_import.abox_lines(serial)) == list(manifest_import.abox_lines(parallel))
+    assert serial.skipped == parallel.skipped
+
+
+def test_stack_file_without_compose_file(converter, tmp_path):
+    stack = tmp_path / "stack"
+    stack.mkdir()
+    (stack / "docker-stack.generated.yml").write_text(
+        open(os.path.join(GENERATED_DIR, "docker-stack.generated.yml")).read())
+    abox, rendered = _reimport(converter, stack, tmp_path)
+    assert "mysql_Docker_Container" in abox.individuals
+    assert ("Docker_Swarm", "#deploys", "mysql_Docker_Container") in abox.links
+    assert "docker-stack.generated.yml" in rendered
+
+
+def test_insert_abox_matches_the_instance_file(converter, tmp_path):
+    abox = manifest_import.import_manifests([GENERATED_DIR])
+    world = World()
+    tbox = world.get_ontology(ENTITY).load()
+    manifest_import.insert_abox(abox, world, tbox)
+    assert [v for v in quick_validation.validate(world) if v.severity == "error"] == []
+
+    data_index = ontology_index.build_data_property_index(world)
+    plan = deployment_plan.build_deployment_plan(ontology_index.build_class_index(world), data_index,
+                                                 ontology_index.build_object_property_index(world))
+    path = str(tmp_path / "imported.owl")
+    manifest_import.write_abox(abox, path)
+    assert generated_output.render_outputs(emitters.build_outputs(plan, data_index)) == converter.render(path)
+
+
+def test_documents_of_other_forms(tmp_path):
+    (tmp_path / "app.yaml").write_text(yaml.safe_dump_all([
+        {"services": {"web": {"image": "nginx", "environment": ["A=1", "B"],
+                              "volumes": [{"source": "data", "target": "/data"}, "./conf:/etc/nginx"]}}},
+        {"kind": "List", "items": [
+            {"kind": "Service", "metadata": {"name": "web"}},
+            {"kind": "PersistentVolumeClaim", "metadata": {"name": "claim", "namespace": "ns"},
+             "spec": {"volumeName": "disk"}},
+        ]},
+        {"kind": "Deployment", "metadata": {"name": "api", "namespace": "ns"}, "spec": {"template": {"spec": {
+            "containers": [{"name": "api", "image": "api:1", "volumeMounts": [{"name": "v", "mountPath": "/v"}]}],
+            "volumes": [{"name": "v", "persistentVolumeClaim": {"claimName": "claim"}}]}}}},
+    ]))
+    abox = manifest_import.import_manifests([str(tmp_path)])
+    assert abox.skipped == {"Service": 1}
+    assert ("web_Docker_Container", "env_a", "1") in abox.data
+    assert ("web_Docker_Container", "env_b", "") in abox.data
+    assert ("web_Docker_Container", "#binds", "data_Docker_Volume") in abox.links
+    # A bind mount is no named volume
+    assert "._conf_Docker_Volume" not in abox.individuals
+    assert ("api_Pod", "#binds", "disk_Kubernetes_Volume") in abox.links
+    assert ("api_Pod", "related_namespace", "ns") in abox.data
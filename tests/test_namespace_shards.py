@@ -0,0 +1,63 @@
+import os
+
+import pytest
+import yaml
+
+import emitters
+from conftest import INSTANCES, MULTI_NAMESPACE, read_tree
+
+MANIFEST = "generated-manifest.json"
+
+
+def _convert(converter, instance_file, output_dir, **options):
+    with converter.indexes(instance_file) as indexes:
+        return emitters.convert(*indexes, str(output_dir), **options)
+
+
+def _resources(files):
+    """{(kind, namespace, name): document} of the Kubernetes files among files."""
+    resources = {}
+    for path, text in files.items():
+        if os.path.basename(path).startswith("kubernetes-"):
+            for document in yaml.safe_load_all(text):
+                metadata = document["metadata"]
+                resources[document["kind"], metadata.get("namespace"), metadata["name"]] = document
+    return resources
+
+
+@pytest.mark.parametrize("instance_file", [INSTANCES, MULTI_NAMESPACE])
+def test_shards_hold_the_flat_resources(converter, tmp_path, instance_file):
+    _convert(converter, instance_file, tmp_path / "flat")
+    _convert(converter, instance_file, tmp_path / "shards", shard=True)
+    flat, shards = read_tree(tmp_path / "flat"), read_tree(tmp_path / "shards")
+    assert _resources(shards) == _resources(flat)
+    # The other platforms' files stay at the root
+    assert {path for path in shards if "/" not in path and path != MANIFEST} == \
+        {path for path in flat if not path.startswith("kubernetes-") and path != MANIFEST}
+
+
+def test_jobs_write_the_same_shards(converter, tmp_path):
+    _convert(converter, MULTI_NAMESPACE, tmp_path / "serial", shard=True, jobs=1)
+    _convert(converter, MULTI_NAMESPACE, tmp_path / "parallel", shard=True, jobs=3)
+    assert read_tree(tmp_path / "serial") == read_tree(tmp_path / "parallel")
+
+
+def test_same_named_deployments_and_unowned_volumes(converter, tmp_path):
+    _convert(converter, MULTI_NAMESPACE, tmp_path, shard=True, jobs=2)
+    files = read_tree(tmp_path)
+    for namespace, image in (("team-a", "nginx:1.25"), ("team-b", "httpd:2.4")):
+        (deployment,) = [yaml.safe_load(text) for path, text in files.items()
+                         if path.startswith(namespace + "/kubernetes-deployment-")]
+        assert deployment["metadata"]["name"] == "web"
+        assert deployment["spec"]["template"]["spec"]["containers"][0]["image"] == image
+    # Bound only by a pod outside any Deployment
+    assert any(path.startswith("default/") and "scratch" in path for path in files)
+
+
+def test_namespace_option_rewrites_only_its_shard(converter, tmp_path):
+    _convert(converter, MULTI_NAMESPACE, tmp_path, shard=True)
+    before = read_tree(tmp_path)
+    (tmp_path / "team-b" / MANIFEST).unlink()
+    _, report = _convert(converter, MULTI_NAMESPACE, tmp_path, namespaces=["team-a"], incremental=True)
+    assert read_tree(tmp_path) == {path: text for path, text in before.items() if path != "team-b/" + MANIFEST}
+    assert report["added"] == report["changed"] == report["removed"] == []
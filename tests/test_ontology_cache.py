@@ -0,0 +1,47 @@
+"""The converter runs in its own processes: the cache loads into owlready2's default_world."""
+import os
+import re
+import subprocess
+import sys
+
+from conftest import ENTITY, INSTANCES, MULTI_NAMESPACE, ROOT, read_tree
+
+TOOLS = os.path.join(ROOT, "ontology_python_tools")
+
+
+def _start(instance_file, cache_dir, output_dir):
+    return subprocess.Popen(
+        [sys.executable, "converter.py", "--classes", ENTITY, "--instances", instance_file,
+         "--cache-dir", str(cache_dir), "--output-dir", str(output_dir)],
+        cwd=TOOLS, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+
+def _status(process):
+    output = process.communicate()[0]
+    assert process.returncode == 0, output
+    return re.search(r"\(cache: (\w+)\)", output).group(1)
+
+
+def _convert(instance_file, cache_dir, output_dir):
+    return _status(_start(instance_file, cache_dir, output_dir))
+
+
+def test_alternating_aboxes_stay_cached(tmp_path):
+    cache = tmp_path / "cache"
+    statuses = [_convert(instance_file, cache, tmp_path / f"run{n}")
+                for n, instance_file in enumerate([INSTANCES, MULTI_NAMESPACE, INSTANCES, MULTI_NAMESPACE])]
+    assert statuses == ["cold", "abox", "warm", "warm"]
+    assert read_tree(tmp_path / "run2") == read_tree(tmp_path / "run0")
+    assert read_tree(tmp_path / "run3") == read_tree(tmp_path / "run1")
+    # The private working copies are removed on exit
+    assert not [name for name in os.listdir(cache) if name.startswith("work-")]
+
+
+def test_concurrent_runs(tmp_path):
+    cache = tmp_path / "cache"
+    runs = [_start(instance_file, cache, tmp_path / f"run{n}")
+            for n, instance_file in enumerate([INSTANCES, INSTANCES, MULTI_NAMESPACE])]
+    assert set(map(_status, runs)) <= {"cold", "abox"}
+    assert _convert(INSTANCES, cache, tmp_path / "warm") == "warm"
+    assert read_tree(tmp_path / "warm") == read_tree(tmp_path / "run0")
+    assert read_tree(tmp_path / "run0") == read_tree(tmp_path / "run1")
@@ -0,0 +1,52 @@
+import pytest
+from owlready2 import World, onto_path
+
+import ontology_cache
+import ontology_module
+from conftest import INSTANCES, ONTOLOGY_DIR
+
+# The catalogue entries the example application does not use
+UNUSED = ["Hashicorp_Nomad", "Mesos_Marathon", "Wordpress_Container_Volume"]
+
+
+@pytest.fixture(scope="module")
+def world():
+    """The example application in a World of its own (instances.owl imports entity.owx by file name)."""
+    onto_path.append(ONTOLOGY_DIR)
+    try:
+        world = World()
+        world.get_ontology(ontology_cache.file_iri(INSTANCES)).load()
+    finally:
+        onto_path.remove(ONTOLOGY_DIR)
+    return world
+
+
+def test_module_individuals(world):
+    module = ontology_module.extract_module(world)
+    kept = {ind.name for ind in world.individuals() if ind.storid in module}
+    assert sorted({ind.name for ind in world.individuals()} - kept) == UNUSED
+    # The deployment units, what deploys or includes them, and what they point to
+    assert {"MySQL_Pod", "Wordpress_Pod", "MySQL_Docker_Container", "Wordpress_Docker_Container", "Kubernetes",
+            "Docker_Compose", "Namespace", "Network", "MySQL_Docker_Image", "Dockerhub"} <= kept
+
+
+def test_module_axioms(world):
+    module = ontology_module.extract_module(world)
+    classes = {cls.name for cls in world.classes() if cls.storid in module}
+    assert {"deployment_unit", "minimal_deployment_unit", "platform", "image", "public_image_registry"} <= classes
+    assert not classes & {"private_image_registry", "secrets", "persistent"}
+
+    # Anonymous axioms that are not part of another one are always kept
+    objects = {o for (o,) in world.graph.execute("SELECT o FROM objs WHERE o < 0")}
+    subjects = {s for (s,) in world.graph.execute("SELECT s FROM objs WHERE s < 0")}
+    assert subjects - objects and subjects - objects <= module
+
+
+def test_module_world_holds_the_module(world):
+    module = ontology_module.extract_module(world)
+    module_world = ontology_module.build_module_world(world, module)
+    try:
+        assert sorted(ind.name for ind in module_world.individuals()) == sorted(
+            ind.name for ind in world.individuals() if ind.storid in module)
+    finally:
+        module_world.close()
@@ -0,0 +1,44 @@
+import pytest
+
+import deployment_plan
+import emitters
+import generated_output
+import ontology_snapshot
+from conftest import INSTANCES, MULTI_NAMESPACE
+
+
+@pytest.mark.parametrize("instance_file", [INSTANCES, MULTI_NAMESPACE])
+def test_indexes_and_files_round_trip(converter, tmp_path, instance_file):
+    path = str(tmp_path / "abox.cadosnap")
+    with converter.indexes(instance_file) as indexes:
+        ontology_snapshot.write_snapshot(path, *indexes)
+        expected = indexes
+    assert ontology_snapshot.read_indexes(path) == expected
+
+    class_index, data_index, link_index = ontology_snapshot.read_indexes(path)
+    plan = deployment_plan.build_deployment_plan(class_index, data_index, link_index)
+    files = generated_output.render_outputs(emitters.build_outputs(plan, data_index))
+    assert files == converter.render(instance_file)
+
+
+def test_value_kinds(tmp_path):
+    path = str(tmp_path / "values.cadosnap")
+    indexes = (
+        {"deployment_unit": ["http://x/a", "http://x/b"], "persistent": []},
+        {"http://x/a": {"replicas": [3, -2**40], "ratio": [0.25], "enabled": [True, False], "name": ["dép ✓", ""]},
+         "http://x/b": {"bytes": [2**63 - 1, 2**63, -2**63 - 1, 10**30], "id": ["9223372036854775808"]}},
+        {"http://x/a": {"binds": ["http://x/b"]}, "http://x/b": {"hostedBy": ["http://x/a"]}},
+    )
+    ontology_snapshot.write_snapshot(path, *indexes)
+    assert ontology_snapshot.read_indexes(path) == indexes
+    # Integers outside int64 and their digits as a string stay apart
+    _, data_index, _ = ontology_snapshot.read_indexes(path)
+    assert [type(value) for value in data_index["http://x/b"]["bytes"]] == [int] * 4
+    assert data_index["http://x/b"]["id"] == ["9223372036854775808"]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.cadosnap"
+    path.write_bytes(b"<Ontology/>" * 20)
+    with pytest.raises(ValueError, match="not a CADO snapshot"):
+        ontology_snapshot.Snapshot(str(path))
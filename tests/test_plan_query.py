@@ -0,0 +1,51 @@
+import pytest
+
+import deployment_plan
+import plan_query
+from conftest import INSTANCES
+
+
+@pytest.fixture(scope="module")
+def plan_index(converter):
+    with converter.indexes(INSTANCES) as indexes:
+        return plan_query.build_plan_index(deployment_plan.build_deployment_plan(*indexes))
+
+
+def _names(units):
+    return [unit.name for unit in units]
+
+
+def test_find(plan_index):
+    assert _names(plan_index.find("image", "mysql:5.7")) == ["MySQL_Pod", "MySQL_Docker_Container"]
+    assert plan_index.find("image", "mysql") == plan_index.find("image", "mysql:5.7")
+    assert _names(plan_index.find("namespace", "wordpress-namespace")) == ["MySQL_Pod", "Wordpress_Pod"]
+    # A Kubernetes volume by its individual and by its volume_name; a Compose volume by its name
+    assert _names(plan_index.find("volume", "MySQL_Kubernetes_Volume")) == ["MySQL_Pod"]
+    assert _names(plan_index.find("volume", "wp-pv")) == ["Wordpress_Pod", "Wordpress_Docker_Container"]
+    assert _names(plan_index.find("volume", "mysql_data")) == ["MySQL_Docker_Container"]
+    assert _names(plan_index.find("network", "wordpress_network")) == [
+        "MySQL_Docker_Container", "Wordpress_Docker_Container"]
+    assert plan_index.find("image", "nginx") == []
+
+
+def test_values(plan_index):
+    assert plan_index.values("image") == {"mysql:5.7": 2, "mysql": 2, "wordpress:latest": 2, "wordpress": 2}
+    assert plan_index.values("host") == {"Physical_Machine": 3, "Virtual_Machine": 1}
+    assert plan_index.values("namespace") == {"wordpress-namespace": 2}
+
+
+def test_match(plan_index):
+    assert _names(plan_index.match(image="wordpress", host="Physical_Machine")) == ["Wordpress_Pod"]
+    assert _names(plan_index.match(namespace="wordpress-namespace", volume="wp-pv")) == ["Wordpress_Pod"]
+    assert _names(plan_index.match(image="mysql")) == ["MySQL_Pod", "MySQL_Docker_Container"]
+    assert plan_index.match(image="mysql", network="other") == []
+
+
+@pytest.mark.parametrize("image, names", [
+    ("mysql:5.7", ["mysql:5.7", "mysql"]),
+    ("registry.local:5000/app", ["registry.local:5000/app"]),
+    ("registry.local:5000/app:1.2", ["registry.local:5000/app:1.2", "registry.local:5000/app"]),
+    ("app@sha256:abc", ["app@sha256:abc", "app"]),
+])
+def test_image_names(image, names):
+    assert plan_query._image_names(image) == names
@@ -0,0 +1,98 @@
+import pytest
+from owlready2 import AllDisjoint, DataProperty, ObjectProperty, Thing, World
+
+import quick_validation
+import validation_report
+
+
+def _world():
+    """A TBox whose axioms a second import states again, and an ABox breaking each of them once."""
+    world = World()
+    tbox = world.get_ontology("http://test.org/tbox.owl#")
+    other = world.get_ontology("http://test.org/other.owl#")
+    with tbox:
+        class Unit(Thing):
+            pass
+
+        class Host(Thing):
+            pass
+
+        class hostedBy(ObjectProperty):
+            pass
+
+        class replicas(DataProperty):
+            pass
+
+    for onto in (tbox, other):
+        with onto:
+            Unit.is_a.append(hostedBy.exactly(1, Host))
+            hostedBy.domain.append(Unit)
+            replicas.range.append(int)
+            AllDisjoint([Unit, Host])
+    abox = world.get_ontology("http://test.org/abox.owl#")
+    with abox:
+        host = Host("host")
+        Unit("unit", replicas=["two"])
+        host.hostedBy = [host]
+    tbox.imported_ontologies.extend([other, abox])
+    return world
+
+
+def test_axioms_stated_twice_give_one_violation_each():
+    violations = quick_validation.validate(_world(), rules=(), property_rules=())
+    assert sorted((v.rule, v.property, quick_validation.local_name(v.individual)) for v in violations) == [
+        ("cardinality", "hostedBy", "unit"),
+        ("domain", "hostedBy", "host"),
+        ("range", "replicas", "unit"),
+    ]
+    (range_violation,) = [v for v in violations if v.rule == "range"]
+    assert range_violation.message == "replicas = 'two' is not a int (TBox)"
+
+
+def test_compile_tbox_rules_deduplicates():
+    cardinality, properties, disjoint = quick_validation.compile_tbox_rules(quick_validation.Facts(_world()))
+    assert [(rule.cls, rule.prop, rule.min, rule.max) for rule in cardinality] == [("Unit", "hostedBy", 1, 1)]
+    assert [(rule.prop, rule.domain, rule.datatypes) for rule in properties] == [
+        ("hostedBy", ("Unit",), ()),
+        ("replicas", (), (int,)),
+    ]
+    assert disjoint == [("Unit", "Host")]
+
+
+def test_checks_stop_at_the_limit(monkeypatch):
+    started = []
+    for name in ("check_properties", "check_disjoint"):
+        check = getattr(quick_validation, name)
+        monkeypatch.setattr(quick_validation, name,
+                            lambda *args, name=name, check=check: started.append(name) or check(*args))
+
+    report = validation_report.Report(None, max_violations=1)
+    with pytest.raises(validation_report.ViolationLimit):
+        report.extend(quick_validation.iter_violations(_world(), rules=(), property_rules=()))
+    # Stopped at the first cardinality error, before the other checks started
+    assert [v.rule for v in report.violations] == ["cardinality"]
+    assert started == []
+
+
+def test_all_disjoint_classes_are_checked_in_pairs():
+    world = World()
+    onto = world.get_ontology("http://test.org/disjoint.owl#")
+    with onto:
+        class Pod(Thing):
+            pass
+
+        class Container(Thing):
+            pass
+
+        class Volume(Thing):
+            pass
+
+        AllDisjoint([Pod, Container, Volume])
+        both = Pod("both")
+        both.is_a.append(Volume)
+        Container("container")
+
+    _, _, disjoint = quick_validation.compile_tbox_rules(quick_validation.Facts(world))
+    assert sorted(map(sorted, disjoint)) == [["Container", "Pod"], ["Container", "Volume"], ["Pod", "Volume"]]
+    violations = quick_validation.validate(world, rules=(), property_rules=())
+    assert [(v.rule, quick_validation.local_name(v.individual)) for v in violations] == [("disjoint", "both")]
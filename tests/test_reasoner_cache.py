@@ -0,0 +1,61 @@
+import shutil
+
+from owlready2 import Thing, World
+
+import reasoner_cache
+from conftest import ENTITY, INSTANCES
+
+INFERENCES_IRI = "http://localhost/cado-inferences/"
+
+
+def _world():
+    """A world with a class, its subclass, an individual and the ontology the reasoner's facts go into."""
+    world = World()
+    onto = world.get_ontology("http://test.org/onto.owl#")
+    with onto:
+        class Unit(Thing):
+            pass
+
+        class Job(Unit):
+            pass
+
+        Unit("unit", comment=["asserted"])
+    return world, onto, world.get_ontology(INFERENCES_IRI)
+
+
+def test_restore_gives_back_the_stored_facts(tmp_path):
+    world, onto, inferences = _world()
+    with inferences:
+        # As the reasoner would: an inferred type and an inferred data value
+        onto.unit.is_a.append(onto.Job)
+        onto.unit.comment.append("inferred")
+    stored = reasoner_cache.store(str(tmp_path), "key", "hermit", True, "", inferences)
+    assert len(stored["objs"]) == 1 and len(stored["datas"]) == 1
+
+    cached = reasoner_cache.load(str(tmp_path), "key")
+    assert (cached["reasoner"], cached["consistent"]) == ("hermit", True)
+    world, onto, inferences = _world()
+    assert world.search(type=onto.Job) == []
+    assert reasoner_cache.restore(cached, inferences) == 2
+    assert reasoner_cache.inferred_facts(inferences) == {"objs": stored["objs"], "datas": stored["datas"]}
+    assert world.search(type=onto.Job) == [onto.unit]
+    assert world.search(comment="inferred") == [onto.unit]
+
+
+def test_other_inputs_miss_the_cache(tmp_path):
+    tbox, abox = tmp_path / "entity.owx", tmp_path / "instances.owl"
+    shutil.copy(ENTITY, tbox)
+    shutil.copy(INSTANCES, abox)
+    key = reasoner_cache.cache_key(tbox, abox, "hermit")
+    assert reasoner_cache.cache_key(tbox, abox, "hermit") == key
+    assert reasoner_cache.cache_key(tbox, abox, "pellet") != key
+    assert reasoner_cache.cache_key(tbox, abox, "hermit+module") != key
+
+    reasoner_cache.store(str(tmp_path), key, "hermit", True, "", _world()[2])
+    assert reasoner_cache.load(str(tmp_path), key) is not None
+    for path, original in ((tbox, ENTITY), (abox, INSTANCES)):
+        with open(path, "a") as f:
+            f.write("\n")
+        assert reasoner_cache.load(str(tmp_path), reasoner_cache.cache_key(tbox, abox, "hermit")) is None
+        shutil.copy(original, path)
+    assert reasoner_cache.load(str(tmp_path), reasoner_cache.cache_key(tbox, abox, "hermit")) is not None
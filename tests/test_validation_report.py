@@ -0,0 +1,78 @@
+import argparse
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import validation_report
+from conftest import ENTITY, INSTANCES, ROOT
+from ontology_names import local_name
+from quick_validation import Violation
+from validation_report import Report, ViolationLimit
+
+
+def _violation(n, severity="error"):
+    return Violation("range", f"http://x/unit{n}", "replicas", "two", severity, f"replicas = two ({n})")
+
+
+def test_one_json_record_per_violation(capsys):
+    stream = io.StringIO()
+    report = Report(stream)
+    report.extend([_violation(1), _violation(2, "warning"), Violation("cardinality", "http://x/u", value=0)])
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == [validation_report.record(v) for v in report.violations]
+    assert json.loads(lines[1])["severity"] == "warning"
+    assert (report.errors, report.exit_status, report.stopped) == (2, 1, False)
+    assert capsys.readouterr().out.count("\n") == 3
+
+
+def test_max_violations_counts_errors_only(capsys):
+    report = Report(io.StringIO(), max_violations=2)
+    report.add(_violation(1))
+    report.add(_violation(2, "warning"))
+    with pytest.raises(ViolationLimit):
+        report.extend([_violation(3), _violation(4)])
+    assert (len(report.violations), report.errors, report.stopped) == (3, 2, True)
+    assert len(report.stream.getvalue().splitlines()) == 3
+
+
+def test_no_violation_exits_0():
+    assert Report().exit_status == 0
+
+
+def _args(*argv):
+    parser = argparse.ArgumentParser()
+    validation_report.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def test_report_to_standard_output(capsys):
+    with validation_report.opened(_args("--report", "-", "--fail-fast")) as report:
+        assert report.max_violations == 1
+        report.add(_violation(1, "warning"))
+    captured = capsys.readouterr()
+    assert json.loads(captured.out)["individual"] == "http://x/unit1"
+    assert "replicas = two (1)" in captured.err
+
+
+def test_quick_validator_report_file(tmp_path):
+    """End to end, in its own process (the validator loads into owlready2's default_world)."""
+    broken = tmp_path / "instances.owl"
+    with open(INSTANCES) as f:
+        broken.write_text("".join(line for line in f if not ("related_image" in line and "_Pod" in line)))
+    shutil.copy(ENTITY, tmp_path)
+    report = tmp_path / "violations.jsonl"
+    tools = os.path.join(ROOT, "ontology_python_tools")
+    result = subprocess.run(
+        [sys.executable, "validator.py", "--classes", str(tmp_path / "entity.owx"), "--instances", str(broken),
+         "--quick", "--report", str(report)],
+        cwd=tools, capture_output=True, text=True)
+    assert result.returncode == 1
+    records = [json.loads(line) for line in report.read_text().splitlines()]
+    assert sorted(local_name(record["individual"]) for record in records) == ["MySQL_Pod", "Wordpress_Pod"]
+    assert {(record["rule"], record["property"], record["value"]) for record in records} == {
+        ("cardinality", "related_image", 0)}
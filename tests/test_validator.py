@@ -0,0 +1,96 @@
+import contextlib
+
+import pytest
+from owlready2 import DataProperty, ObjectProperty, Thing, World
+
+import validation_report
+import validator
+
+UNITS = 7
+
+
+@pytest.fixture(scope="module")
+def tbox():
+    """A TBox whose restriction is asserted again by a second import, and an ABox breaking it and a range."""
+    world = World()
+    tbox = world.get_ontology("http://test.org/tbox.owl#")
+    with tbox:
+        class Unit(Thing):
+            pass
+
+        class Volume(Thing):
+            pass
+
+        class binds(ObjectProperty):
+            pass
+
+        class replicas(DataProperty):
+            range = [int]
+
+        Unit.is_a.append(binds.some(Volume))
+    other = world.get_ontology("http://test.org/other.owl#")
+    with other:
+        Unit.is_a.append(binds.some(Volume))
+    abox = world.get_ontology("http://test.org/abox.owl#")
+    with abox:
+        for n in range(UNITS):
+            Unit(f"unit{n}", replicas=["two", "three"])
+    tbox.imported_ontologies.extend([other, abox])
+    return tbox
+
+
+def _validate(tbox, jobs, max_violations=None):
+    report = validation_report.Report(None, max_violations)
+    pool = validator.worker_pool(tbox, jobs) if jobs > 1 else contextlib.nullcontext()
+    with pool as executor, contextlib.suppress(validation_report.ViolationLimit):
+        validator.validate_restrictions(tbox, executor, jobs * 4, report)
+        validator.validate_data_ranges(tbox, executor, jobs * 4, report)
+    return [validation_report.record(violation) for violation in report.violations]
+
+
+def test_restrictions_asserted_twice_are_checked_once(tbox):
+    records = _validate(tbox, 1)
+    assert sum(record["rule"] == "restriction" for record in records) == UNITS
+    assert sum(record["rule"] == "range" for record in records) == 2 * UNITS
+
+
+@pytest.mark.parametrize("jobs", [2, 3])
+def test_jobs_report_the_same_violations(tbox, jobs):
+    assert _validate(tbox, jobs) == _validate(tbox, 1)
+
+
+@pytest.mark.parametrize("max_violations", [3, UNITS + 2])
+def test_jobs_stop_at_max_violations(tbox, max_violations):
+    serial = _validate(tbox, 1, max_violations)
+    assert len(serial) == max_violations
+    assert _validate(tbox, 3, max_violations) == serial
+
+
+def test_workers_stop_their_chunk_at_the_limit(tbox):
+    with validator.worker_pool(tbox, 1) as executor:
+        subjects = [unit.storid for unit in tbox.world.search(iri="*unit*")]
+        bounds = (min(subjects), max(subjects))
+        assert len(executor.submit(validator._data_ranges_chunk, bounds).result()) == 2 * UNITS
+        assert len(executor.submit(validator._data_ranges_chunk, bounds, 2).result()) == 2
+
+
+def test_iter_instances_matches_instances():
+    world = World()
+    onto = world.get_ontology("http://test.org/classes.owl#")
+    with onto:
+        class Unit(Thing):
+            pass
+
+        class Job(Unit):
+            pass
+
+        class Workload(Thing):
+            equivalent_to = [Unit]
+
+        Unit("unit")
+        Job("job")
+        Workload("workload")
+    for cls in (Unit, Job, Workload):
+        instances = list(validator.iter_instances(cls))
+        assert len(instances) == len(set(instances))
+        assert set(instances) == set(cls.instances())